@@ -14,8 +14,9 @@ from ...gomap import (
     search_nearby_pois_paginated,
     search_objects_smart,
 )
-from ...maps import compute_eta_with_traffic
+from ...maps import compute_eta_with_traffic, format_route_geometry
 from ...settings import settings
+from ..types import GeometryFormatQuery, MapZoomQuery, SimplifyToleranceQuery
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +106,9 @@ async def calculate_route_endpoint(
     route_type: Literal["fastest", "shortest", "pedestrian"] = Query("fastest"),
     include_polyline: bool = Query(False),
     language: str | None = Query(None, regex="^(az|en|ru)$"),
+    geometry_format: GeometryFormatQuery = "coordinates",
+    simplify_m: SimplifyToleranceQuery = None,
+    zoom: MapZoomQuery = None,
 ):
     try:
         route = await asyncio.to_thread(
@@ -137,7 +141,14 @@ async def calculate_route_endpoint(
             ),
             "route_type": route_type,
             "summary": route.notice,
-            "geometry": route.geometry if include_polyline else None,
+            "geometry": (
+                format_route_geometry(
+                    route.geometry, geometry_format, tolerance_m=simplify_m, zoom=zoom
+                )
+                if include_polyline
+                else None
+            ),
+            "geometry_format": geometry_format,
             "provider": "gomap",
         }
     except HTTPException:
@@ -155,6 +166,9 @@ async def calculate_eta_with_traffic_endpoint(
     dest_lon: float = Query(..., ge=-180, le=180),
     route_type: Literal["fastest", "shortest"] = Query("fastest"),
     include_polyline: bool = Query(False),
+    geometry_format: GeometryFormatQuery = "coordinates",
+    simplify_m: SimplifyToleranceQuery = None,
+    zoom: MapZoomQuery = None,
 ):
     try:
         eta_result = await asyncio.to_thread(
@@ -188,8 +202,16 @@ async def calculate_eta_with_traffic_endpoint(
             "traffic_condition": eta_result.traffic_condition,
             "traffic_delay_minutes": eta_result.traffic_delay_minutes,
             "route_type": route_type,
-            "geometry": eta_result.route_geometry if include_polyline else None,
+            "geometry": (
+                format_route_geometry(
+                    eta_result.route_geometry, geometry_format, tolerance_m=simplify_m, zoom=zoom
+                )
+                if include_polyline
+                else None
+            ),
+            "geometry_format": geometry_format,
             "provider": eta_result.provider,
+            "traffic_source": eta_result.traffic_source,
         }
     except HTTPException:
         raise
@@ -7,6 +7,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
+from ...arrival_tracking import arrival_routes
 from ...auth import require_auth
 from ...contracts import (
     ArrivalEtaConfirmation,
@@ -368,15 +369,25 @@ async def arrival_location_ping(
                 return rec_to_reservation(updated)
 
     distance = haversine_km(payload.latitude, payload.longitude, dest_lat, dest_lon)
-    eta_result = await asyncio.to_thread(
-        compute_eta_with_traffic,
-        payload.latitude,
-        payload.longitude,
-        dest_lat,
-        dest_lon,
-    )
+    # While the guest follows the last route, update the ETA from it without a provider call
+    eta_result = arrival_routes.estimate(str(resid), payload.latitude, payload.longitude)
+    if eta_result is None:
+        eta_result = await asyncio.to_thread(
+            compute_eta_with_traffic,
+            payload.latitude,
+            payload.longitude,
+            dest_lat,
+            dest_lon,
+        )
+        if eta_result:
+            arrival_routes.remember(str(resid), eta_result)
     if not eta_result:
-        eta_result = build_fallback_eta(distance, estimate_eta_minutes(distance))
+        eta_result = build_fallback_eta(
+            distance,
+            estimate_eta_minutes(distance),
+            origin=(payload.latitude, payload.longitude),
+            destination=(dest_lat, dest_lon),
+        )
     signal_time = datetime.utcnow()
     summary = eta_result.route_summary
     if eta_result.calibration_note:
@@ -8,11 +8,26 @@ from fastapi import APIRouter, HTTPException, Query, Request
 
 from ...availability import availability_for_day
 from ...contracts import GeocodeResult, Restaurant, RestaurantListItem
+from ...eta_model import get_eta_model
 from ...input_validation import sanitize_query
-from ...maps import build_fallback_eta, compute_eta_with_traffic, search_places
+from ...maps import (
+    build_fallback_eta,
+    compute_eta_matrix,
+    compute_eta_with_traffic,
+    format_route_geometry,
+    search_places,
+)
 from ...serializers import get_attr, restaurant_to_detail, restaurant_to_list_item
+from ...settings import settings
 from ...storage import DB
-from ..types import CoordinateString, DateQuery, RestaurantSearch
+from ..types import (
+    CoordinateString,
+    DateQuery,
+    GeometryFormatQuery,
+    MapZoomQuery,
+    RestaurantSearch,
+    SimplifyToleranceQuery,
+)
 from ..utils import estimate_eta_minutes, haversine_km, parse_coordinate_string
 
 router = APIRouter(tags=["restaurants"])
@@ -82,7 +97,13 @@ def restaurant_availability(rid: UUID, date_: DateQuery, party_size: int = 2):
 
 
 @router.get("/directions")
-async def get_directions(origin: CoordinateString, destination: CoordinateString):
+async def get_directions(
+    origin: CoordinateString,
+    destination: CoordinateString,
+    geometry_format: GeometryFormatQuery = "coordinates",
+    simplify_m: SimplifyToleranceQuery = None,
+    zoom: MapZoomQuery = None,
+):
     try:
         origin_lat, origin_lon = parse_coordinate_string(origin)
         dest_lat, dest_lon = parse_coordinate_string(destination)
@@ -101,7 +122,12 @@ async def get_directions(origin: CoordinateString, destination: CoordinateString
     if not eta:
         distance_km = haversine_km(origin_lat, origin_lon, dest_lat, dest_lon)
         fallback_minutes = estimate_eta_minutes(distance_km)
-        eta = build_fallback_eta(distance_km or 1.0, fallback_minutes)
+        eta = build_fallback_eta(
+            distance_km or 1.0,
+            fallback_minutes,
+            origin=(origin_lat, origin_lon),
+            destination=(dest_lat, dest_lon),
+        )
 
     response: dict[str, Any] = {
         "eta_minutes": eta.eta_minutes,
@@ -112,13 +138,93 @@ async def get_directions(origin: CoordinateString, destination: CoordinateString
         "traffic_condition": eta.traffic_condition,
         "traffic_delay_minutes": eta.traffic_delay_minutes,
         "typical_eta_minutes": eta.typical_eta_minutes,
+        "traffic_source": eta.traffic_source,
     }
     if eta.route_geometry:
-        response["route_geometry"] = eta.route_geometry
+        response["route_geometry"] = format_route_geometry(
+            eta.route_geometry, geometry_format, tolerance_m=simplify_m, zoom=zoom
+        )
+        response["route_geometry_format"] = geometry_format
 
     return response
 
 
+@router.get("/directions/matrix")
+async def get_directions_matrix(
+    origin: CoordinateString,
+    restaurant_id: list[str] | None = Query(None, max_length=200),
+    q: RestaurantSearch = None,
+    max_distance_km: float = Query(25.0, gt=0, le=100),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """ETAs from one origin to many restaurants, nearest first."""
+    try:
+        origin_lat, origin_lon = parse_coordinate_string(origin)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+    except HTTPException as exc:
+        raise HTTPException(400, exc.detail) from exc
+
+    ids = restaurant_id or [summary["id"] for summary in DB.list_restaurants(q)]
+    records = [record for rid in ids if (record := DB.get_restaurant(rid))]
+
+    # Straight-line distance is a lower bound on road distance, so far restaurants drop out
+    model = get_eta_model()
+    candidates: list[tuple[float, float, dict[str, Any]]] = []
+    for record in records:
+        lat, lon = record.get("latitude"), record.get("longitude")
+        if lat is None or lon is None:
+            continue
+        straight_km = haversine_km(origin_lat, origin_lon, float(lat), float(lon))
+        if straight_km > max_distance_km:
+            continue
+        # The offline model ranks by expected drive time when it has been trained
+        rank = (
+            model.predict(origin_lat, origin_lon, float(lat), float(lon))[1]
+            if model
+            else straight_km
+        )
+        candidates.append((rank, straight_km, record))
+    candidates.sort(key=lambda item: item[0])
+    candidates = candidates[: settings.ETA_MATRIX_MAX_DESTINATIONS]
+
+    etas = await asyncio.to_thread(
+        compute_eta_matrix,
+        origin_lat,
+        origin_lon,
+        [
+            (str(record["id"]), float(record["latitude"]), float(record["longitude"]))
+            for _, _, record in candidates
+        ],
+    )
+
+    results = []
+    for _, straight_km, record in candidates:
+        eta = etas.get(str(record["id"])) or build_fallback_eta(
+            straight_km,
+            estimate_eta_minutes(straight_km),
+            origin=(origin_lat, origin_lon),
+            destination=(float(record["latitude"]), float(record["longitude"])),
+        )
+        results.append(
+            {
+                "restaurant_id": str(record["id"]),
+                "name": record.get("name"),
+                "eta_minutes": eta.eta_minutes,
+                "eta_seconds": eta.eta_seconds,
+                "route_distance_km": eta.route_distance_km,
+                "straight_line_km": round(straight_km, 2),
+                "provider": eta.provider,
+            }
+        )
+    results.sort(key=lambda item: item["eta_seconds"])
+    return {
+        "origin": {"latitude": origin_lat, "longitude": origin_lon},
+        "results": results[:limit],
+        "considered": len(candidates),
+    }
+
+
 @router.get("/maps/geocode", response_model=list[GeocodeResult])
 async def geocode(query: str = Query(..., min_length=2, max_length=80)) -> list[GeocodeResult]:
     sanitized_query = sanitize_query(query, context="geocode query")
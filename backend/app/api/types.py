@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Annotated
+from typing import Annotated, Literal
 
 from fastapi import Query
 
@@ -25,3 +25,23 @@ RestaurantSearch = Annotated[
         description="Optional search term for restaurants",
     ),
 ]
+
+GeometryFormatQuery = Annotated[
+    Literal["coordinates", "polyline", "polyline6"],
+    Query(
+        description=(
+            "Route geometry encoding: coordinate pairs, or a Google encoded polyline "
+            "with 5 or 6 decimal precision"
+        ),
+    ),
+]
+
+SimplifyToleranceQuery = Annotated[
+    float | None,
+    Query(ge=0, le=500, description="Douglas-Peucker tolerance in metres"),
+]
+
+MapZoomQuery = Annotated[
+    int | None,
+    Query(ge=1, le=22, description="Map zoom level; simplifies to one-pixel accuracy"),
+]
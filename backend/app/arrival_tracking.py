@@ -0,0 +1,153 @@
+"""
+Local ETA updates for guests sharing their location on the way to a restaurant.
+
+Each upstream ETA keeps its route polyline. Later location pings are projected
+onto that polyline and the remaining distance and time are scaled from the
+original route, so the provider is only called again when the guest leaves the
+route or the snapshot is older than the refresh interval.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, replace
+from math import cos, radians
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+from .cache import TTLCache
+from .maps import EtaComputation
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6_371_000.0
+
+
+@dataclass(slots=True)
+class RouteProjection:
+    offset_m: float  # Distance from the ping to the nearest point on the route
+    along_m: float  # Distance travelled along the route up to that point
+    remaining_fraction: float
+
+
+class RouteSnapshot:
+    """An upstream ETA plus its polyline in a local planar frame (metres)."""
+
+    def __init__(self, eta: EtaComputation, geometry: list[tuple[float, float]]):
+        self.eta = eta
+        points = np.asarray(geometry, dtype=float)
+        self._lat0 = float(points[0, 0])
+        self._lon0 = float(points[0, 1])
+        self._xy = self._to_plane(points[:, 0], points[:, 1])
+        self._segments = np.diff(self._xy, axis=0)
+        self._segment_len2 = np.einsum("ij,ij->i", self._segments, self._segments)
+        lengths = np.sqrt(self._segment_len2)
+        self._cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+        self.length_m = float(self._cumulative[-1])
+
+    @classmethod
+    def from_eta(cls, eta: EtaComputation) -> RouteSnapshot | None:
+        geometry = eta.route_geometry
+        if not geometry or len(geometry) < 2:
+            return None
+        snapshot = cls(eta, geometry)
+        if snapshot.length_m <= 0:
+            return None
+        return snapshot
+
+    def _to_plane(self, lat: Any, lon: Any) -> np.ndarray:
+        # Equirectangular projection is accurate to well under a metre at city scale
+        x = np.radians(np.asarray(lon) - self._lon0) * cos(radians(self._lat0)) * EARTH_RADIUS_M
+        y = np.radians(np.asarray(lat) - self._lat0) * EARTH_RADIUS_M
+        return np.column_stack((np.atleast_1d(x), np.atleast_1d(y)))
+
+    def project(self, latitude: float, longitude: float) -> RouteProjection:
+        """Snap a point to the nearest position on the route."""
+        point = self._to_plane(latitude, longitude)[0]
+        starts = self._xy[:-1]
+        rel = point - starts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.einsum("ij,ij->i", rel, self._segments) / self._segment_len2
+        t = np.clip(np.nan_to_num(t, nan=0.0), 0.0, 1.0)
+        nearest = starts + self._segments * t[:, None]
+        offsets = np.hypot(*(point - nearest).T)
+        index = int(np.argmin(offsets))
+        along = float(self._cumulative[index] + t[index] * np.sqrt(self._segment_len2[index]))
+        return RouteProjection(
+            offset_m=float(offsets[index]),
+            along_m=along,
+            remaining_fraction=max(0.0, 1.0 - along / self.length_m),
+        )
+
+    def estimate(self, projection: RouteProjection) -> EtaComputation:
+        """Scale the upstream ETA to the part of the route still ahead."""
+        fraction = projection.remaining_fraction
+        seconds = max(1, int(round(self.eta.eta_seconds * fraction)))
+        distance = self.eta.route_distance_km
+        return replace(
+            self.eta,
+            eta_seconds=seconds,
+            eta_minutes=max(1, (seconds + 59) // 60),
+            route_distance_km=round(distance * fraction, 2) if distance is not None else None,
+            route_geometry=None,
+        )
+
+
+class ArrivalRouteTracker:
+    """Per-reservation route snapshots used to answer location pings locally."""
+
+    def __init__(self) -> None:
+        self._routes: TTLCache[RouteSnapshot] = TTLCache(
+            "arrival_routes",
+            max_size=2000,
+            default_ttl=settings.ARRIVAL_REROUTE_INTERVAL_SECONDS,
+        )
+        self._lock = Lock()
+        self._local_estimates = 0
+        self._reroutes = 0
+
+    def estimate(self, key: str, latitude: float, longitude: float) -> EtaComputation | None:
+        """ETA from the stored route, or None when the guest needs a fresh route."""
+        snapshot = self._routes.get(key)
+        if snapshot is None:
+            return None
+        projection = snapshot.project(latitude, longitude)
+        if projection.offset_m > settings.ARRIVAL_REROUTE_DEVIATION_METERS:
+            logger.debug("Guest %s is %.0fm off route, re-routing", key, projection.offset_m)
+            return None
+        with self._lock:
+            self._local_estimates += 1
+        return snapshot.estimate(projection)
+
+    def remember(self, key: str, eta: EtaComputation) -> None:
+        """Keep an upstream ETA's route for subsequent pings."""
+        with self._lock:
+            self._reroutes += 1
+        snapshot = RouteSnapshot.from_eta(eta)
+        if snapshot is not None:
+            self._routes.set(key, snapshot, ttl=settings.ARRIVAL_REROUTE_INTERVAL_SECONDS)
+
+    def clear(self) -> None:
+        self._routes.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "local_estimates": self._local_estimates,
+                "reroutes": self._reroutes,
+                "tracked_routes": self._routes.get_stats()["size"],
+            }
+
+
+arrival_routes = ArrivalRouteTracker()
+
+
+__all__ = [
+    "ArrivalRouteTracker",
+    "RouteProjection",
+    "RouteSnapshot",
+    "arrival_routes",
+]
@@ -1,23 +1,57 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import logging
+import threading
 import time
+from dataclasses import dataclass
 from typing import Annotated, Any
 
 import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
+from jose import jwk, jwt
+from jose.backends.base import Key
 
+from .cache import TTLCache
 from .settings import settings
 
+logger = logging.getLogger(__name__)
+
 security = HTTPBearer(auto_error=False)
 AuthCredentials = Annotated[HTTPAuthorizationCredentials | None, Depends(security)]
 
+# Refresh the key set this far into its TTL so requests never wait on a fetch
+JWKS_REFRESH_AHEAD_FRACTION = 0.8
+JWKS_RETRY_SECONDS = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class _VerifiedClaims:
+    kid: str
+    claims: dict[str, Any]
+
+
+def token_digest(token: str) -> str:
+    """Cache key for a bearer token; the raw token is never kept in memory."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 
 class Auth0Verifier:
     def __init__(self) -> None:
         self._jwks: dict[str, Any] | None = None
+        self._keys: dict[str, Key] = {}
+        self._jwks_fetched_at: float = 0.0
         self._jwks_expiry: float = 0.0
+        self._lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+        self._task: asyncio.Task | None = None
+        self._claims: TTLCache[_VerifiedClaims] = TTLCache(
+            "auth_claims",
+            max_size=settings.AUTH0_CLAIMS_CACHE_SIZE,
+            default_ttl=settings.AUTH0_CLAIMS_CACHE_TTL_SECONDS,
+        )
 
     def _fetch_jwks(self) -> dict[str, Any]:
         issuer = settings.auth0_issuer
@@ -37,14 +71,135 @@ class Auth0Verifier:
                 detail="Failed to fetch Auth0 JWKS",
             ) from exc
 
-    def _get_jwks(self) -> dict[str, Any]:
-        now = time.time()
-        if self._jwks and now < self._jwks_expiry:
-            return self._jwks
+    @staticmethod
+    def _parse_keys(jwks: dict[str, Any]) -> dict[str, Key]:
+        """Build public key objects once per key set instead of on every verify."""
+        keys: dict[str, Key] = {}
+        for entry in jwks.get("keys", []):
+            kid = entry.get("kid")
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwk.construct(entry, algorithm="RS256")
+            except Exception as exc:
+                logger.warning("Ignoring unusable JWKS key %s: %s", kid, exc)
+        return keys
+
+    def refresh_jwks(self) -> dict[str, Key]:
+        """Fetch the key set now and swap it in. Raises HTTPException on failure."""
         jwks = self._fetch_jwks()
-        self._jwks = jwks
-        self._jwks_expiry = now + 60 * 15  # cache for 15 minutes
-        return jwks
+        keys = self._parse_keys(jwks)
+        now = time.time()
+        with self._lock:
+            self._jwks = jwks
+            self._keys = keys
+            self._jwks_fetched_at = now
+            self._jwks_expiry = now + settings.AUTH0_JWKS_TTL_SECONDS
+        return keys
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh_jwks()
+        except HTTPException as exc:
+            logger.warning("Background JWKS refresh failed: %s", exc.detail)
+        finally:
+            with self._lock:
+                self._refresh_thread = None
+
+    def _schedule_refresh(self) -> None:
+        with self._lock:
+            if self._refresh_thread is not None:
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_quietly, name="auth0-jwks-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def _get_keys(self) -> dict[str, Key]:
+        """
+        Current signing keys, fetching synchronously only when none are usable.
+
+        Expired keys are still served (up to ``AUTH0_JWKS_MAX_STALE_SECONDS``)
+        while a background thread revalidates them.
+        """
+        now = time.time()
+        keys = self._keys
+        if keys and now < self._jwks_expiry:
+            return keys
+        if keys and now < self._jwks_fetched_at + settings.AUTH0_JWKS_MAX_STALE_SECONDS:
+            self._schedule_refresh()
+            return keys
+        return self.refresh_jwks()
+
+    def _get_key(self, kid: str) -> Key | None:
+        keys = self._get_keys()
+        key = keys.get(kid)
+        if key is None and time.time() - self._jwks_fetched_at >= (
+            settings.AUTH0_JWKS_MIN_REFRESH_SECONDS
+        ):
+            # Auth0 may have rotated keys; throttled so random kids can't force refetches
+            key = self.refresh_jwks().get(kid)
+        return key
+
+    def cached_claims(
+        self, token: str, required_scopes: list[str] | None = None
+    ) -> dict[str, Any] | None:
+        """Claims of a token verified earlier, or None when it needs a full check."""
+        cached = self._claims.get(token_digest(token))
+        if cached is None or cached.kid not in self._keys:
+            return None
+        if required_scopes:
+            self._validate_scopes(cached.claims, required_scopes)
+        return dict(cached.claims)
+
+    def _remember(self, token: str, kid: str, payload: dict[str, Any]) -> None:
+        ttl = float(settings.AUTH0_CLAIMS_CACHE_TTL_SECONDS)
+        exp = payload.get("exp")
+        if exp:
+            # Stop serving from cache once _validate_token_security would reject it
+            ttl = min(ttl, float(exp) - 60 - time.time())
+        if ttl > 0:
+            self._claims.set(token_digest(token), _VerifiedClaims(kid, dict(payload)), ttl=ttl)
+
+    def clear_cache(self) -> None:
+        self._claims.clear()
+
+    async def _refresh_loop(self) -> None:
+        try:
+            while True:
+                delay = JWKS_RETRY_SECONDS
+                try:
+                    await asyncio.to_thread(self.refresh_jwks)
+                    delay = settings.AUTH0_JWKS_TTL_SECONDS * JWKS_REFRESH_AHEAD_FRACTION
+                except HTTPException as exc:
+                    logger.warning("JWKS refresh failed, retrying: %s", exc.detail)
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            pass
+
+    async def startup(self) -> None:
+        if self._task or settings.AUTH0_BYPASS or not settings.auth0_issuer:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "jwks_age_seconds": (
+                round(time.time() - self._jwks_fetched_at, 1) if self._jwks_fetched_at else None
+            ),
+            "background_refresh": self._task is not None,
+            "claims_cache": self._claims.get_stats(),
+        }
 
     def verify(self, token: str, required_scopes: list[str] | None = None) -> dict[str, Any]:
         """
@@ -68,8 +223,12 @@ class Auth0Verifier:
                 detail="Auth0 audience/domain not configured",
             )
 
+        # Repeat tokens skip signature verification entirely
+        cached = self.cached_claims(token, required_scopes)
+        if cached is not None:
+            return cached
+
         # Step 1: Verify token structure and get signing key
-        jwks = self._get_jwks()
         try:
             unverified_header = jwt.get_unverified_header(token)
         except Exception as exc:
@@ -92,7 +251,7 @@ class Auth0Verifier:
                 detail=f"Unsupported algorithm: {alg}. Only RS256 allowed.",
             )
 
-        key = next((k for k in jwks.get("keys", []) if k.get("kid") == kid), None)
+        key = self._get_key(kid)
         if not key:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Unknown token signature key"
@@ -124,6 +283,7 @@ class Auth0Verifier:
 
         # Step 3: Additional security validations
         self._validate_token_security(payload)
+        self._remember(token, kid, payload)
 
         # Step 4: Scope validation (if required)
         if required_scopes:
@@ -239,4 +399,8 @@ async def require_auth(credentials: AuthCredentials) -> dict[str, Any]:
         )
 
     token = credentials.credentials
-    return auth0_verifier.verify(token)
+    claims = auth0_verifier.cached_claims(token)
+    if claims is not None:
+        return claims
+    # Signature checks and JWKS fetches stay off the event loop
+    return await asyncio.to_thread(auth0_verifier.verify, token)
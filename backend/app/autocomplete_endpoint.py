@@ -6,13 +6,15 @@ efficient autocomplete that reduces API calls by 70%.
 """
 
 import asyncio
+import json
 import logging
-from typing import Annotated
-from uuid import UUID
+from typing import Annotated, Any
+from uuid import uuid4
 
 from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
 
 from .request_batcher import get_autocomplete_batcher
+from .settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,195 @@ async def autocomplete_endpoint(
         raise HTTPException(500, "Autocomplete service temporarily unavailable")
 
 
+def _result_key(item: Any) -> str:
+    """Stable identity for a result row so deltas can reference earlier frames."""
+    return json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def build_results_delta(previous: list[Any] | None, current: list[Any]) -> list[Any] | None:
+    """
+    Describe ``current`` relative to ``previous`` as a compact patch.
+
+    Each patch entry is either an ``int`` (index of a row already sent in the
+    previous frame) or a full row for anything new. Returns ``None`` when no
+    row can be reused, in which case a full frame is cheaper.
+    """
+    if not previous or not current:
+        return None
+    positions: dict[str, int] = {}
+    for index, item in enumerate(previous):
+        positions.setdefault(_result_key(item), index)
+
+    patch: list[Any] = []
+    reused = 0
+    for item in current:
+        index = positions.get(_result_key(item))
+        if index is None:
+            patch.append(item)
+        else:
+            patch.append(index)
+            reused += 1
+    return patch if reused else None
+
+
+class AutocompleteSession:
+    """
+    Per-connection state for the autocomplete WebSocket.
+
+    Incoming messages only overwrite a single pending slot; a worker picks up
+    the latest one after a short debounce, so queries superseded by further
+    typing never reach the batcher. Results that are already stale when they
+    come back are dropped instead of sent.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        batcher: Any,
+        *,
+        session_id: str,
+        delta_enabled: bool = False,
+        debounce_ms: int | None = None,
+        send_timeout: float | None = None,
+    ):
+        self.websocket = websocket
+        self.batcher = batcher
+        self.session_id = session_id
+        self.delta_enabled = delta_enabled
+        if debounce_ms is None:
+            debounce_ms = settings.AUTOCOMPLETE_WS_DEBOUNCE_MS
+        self.debounce_seconds = max(0, debounce_ms) / 1000.0
+        self.send_timeout = (
+            settings.AUTOCOMPLETE_WS_SEND_TIMEOUT_SECONDS if send_timeout is None else send_timeout
+        )
+
+        self._pending: dict[str, Any] | None = None
+        self._wakeup = asyncio.Event()
+        self._seq = 0
+        self._last_results: list[Any] | None = None
+        self._last_results_seq = 0
+        self.stats = {
+            "received": 0,
+            "superseded": 0,
+            "processed": 0,
+            "stale_dropped": 0,
+            "full_frames": 0,
+            "delta_frames": 0,
+        }
+
+    def offer(self, data: dict[str, Any]) -> None:
+        """Replace the pending query with the newest message from the client."""
+        self.stats["received"] += 1
+        if self._pending is not None:
+            self.stats["superseded"] += 1
+        self._pending = data
+        self._wakeup.set()
+
+    async def receive_loop(self) -> None:
+        """Read client messages until the socket closes."""
+        while True:
+            data = await self.websocket.receive_json()
+            if isinstance(data, dict):
+                self.offer(data)
+
+    async def process_loop(self) -> None:
+        """Resolve the latest pending query, one at a time."""
+        try:
+            await self._process_pending()
+        except Exception:
+            # Nobody awaits this task; close the socket rather than leave the
+            # client sending queries that will never be answered
+            logger.exception("Autocomplete worker failed for session %s", self.session_id)
+            await self.websocket.close(code=1011)
+
+    async def _process_pending(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self.debounce_seconds:
+                await asyncio.sleep(self.debounce_seconds)
+            self._wakeup.clear()
+            data, self._pending = self._pending, None
+            if data is None:
+                continue
+
+            frame = await self._resolve(data)
+            if self._pending is not None:
+                # The user kept typing while we were waiting on upstream
+                self.stats["stale_dropped"] += 1
+                continue
+            try:
+                await self._send(frame)
+            except TimeoutError:
+                logger.warning("Closing slow autocomplete client for session %s", self.session_id)
+                await self.websocket.close(code=1013)
+                return
+
+    async def _resolve(self, data: dict[str, Any]) -> dict[str, Any]:
+        query = str(data.get("query") or "").strip()
+        if not query:
+            return {"results": [], "query": ""}
+
+        self.stats["processed"] += 1
+        try:
+            results = await self.batcher.submit(
+                query,
+                query_type="search",
+                session_id=self.session_id,
+                lat=data.get("lat"),
+                lon=data.get("lon"),
+                limit=data.get("limit", 5),
+                fuzzy=data.get("fuzzy", True),
+                language=data.get("language"),
+            )
+        except asyncio.CancelledError:
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise
+            # Request was cancelled by the batcher, send empty results
+            return {"results": [], "query": query, "cancelled": True}
+        except Exception as exc:
+            # The batcher forwards processor failures to every waiting query
+            logger.error("Autocomplete failed for session %s: %s", self.session_id, exc)
+            return {
+                "results": [],
+                "query": query,
+                "error": "Autocomplete service temporarily unavailable",
+            }
+
+        return {
+            "results": results or [],
+            "query": query,
+            "cached": False,  # Could track if from cache
+        }
+
+    async def _send(self, frame: dict[str, Any]) -> None:
+        self._seq += 1
+        frame["seq"] = self._seq
+        results = frame.get("results")
+        outgoing = frame
+
+        if self.delta_enabled and not frame.get("cancelled") and results is not None:
+            patch = build_results_delta(self._last_results, results)
+            if patch is not None:
+                delta = {key: value for key, value in frame.items() if key != "results"}
+                delta["type"] = "delta"
+                delta["base_seq"] = self._last_results_seq
+                delta["patch"] = patch
+                if len(json.dumps(delta, default=str)) < len(json.dumps(frame, default=str)):
+                    outgoing = delta
+            self._last_results = results
+            self._last_results_seq = self._seq
+
+        if outgoing is frame:
+            self.stats["full_frames"] += 1
+        else:
+            self.stats["delta_frames"] += 1
+
+        # A client that stops reading holds the worker here; further messages
+        # only replace the pending slot, so nothing queues up behind it.
+        await asyncio.wait_for(self.websocket.send_json(outgoing), timeout=self.send_timeout)
+
+
 @router.websocket("/api/v1/search/autocomplete/ws")
 async def autocomplete_websocket(websocket: WebSocket):
     """
@@ -74,64 +265,37 @@ async def autocomplete_websocket(websocket: WebSocket):
 
     Protocol:
     - Send: {"query": "search text", "lat": 40.4, "lon": 49.8}
-    - Receive: {"results": [...], "query": "search text", "cached": false}
+    - Receive: {"results": [...], "query": "search text", "cached": false, "seq": 1}
+
+    Connect with ``?delta=1`` to receive ``{"type": "delta", "base_seq": n, "patch": [...]}``
+    frames when results change incrementally. Integer patch entries refer to rows of
+    the previous frame; anything else is a new row.
 
     Features:
-    - Real-time updates as user types
-    - Automatic request cancellation
-    - Performance statistics
+    - Only the latest pending query per connection is sent upstream
+    - Stale results are dropped instead of delivered out of date
+    - Slow readers are disconnected after a send timeout
     """
     await websocket.accept()
-    batcher = get_autocomplete_batcher()
-    session_id = str(UUID())
-
+    delta_enabled = websocket.query_params.get("delta", "").lower() in {"1", "true", "yes"}
+    session = AutocompleteSession(
+        websocket,
+        get_autocomplete_batcher(),
+        session_id=str(uuid4()),
+        delta_enabled=delta_enabled,
+    )
+
+    worker = asyncio.create_task(session.process_loop())
     try:
-        while True:
-            # Receive search request
-            data = await websocket.receive_json()
-
-            query = data.get("query", "").strip()
-            if not query:
-                await websocket.send_json({"results": [], "query": ""})
-                continue
-
-            # Submit to batcher
-            try:
-                results = await batcher.submit(
-                    query,
-                    query_type="search",
-                    session_id=session_id,
-                    lat=data.get("lat"),
-                    lon=data.get("lon"),
-                    limit=data.get("limit", 5),
-                    fuzzy=data.get("fuzzy", True),
-                    language=data.get("language"),
-                )
-
-                # Send results back
-                await websocket.send_json(
-                    {
-                        "results": results,
-                        "query": query,
-                        "cached": False,  # Could track if from cache
-                    }
-                )
-
-            except asyncio.CancelledError:
-                # Request was cancelled, send empty results
-                await websocket.send_json(
-                    {
-                        "results": [],
-                        "query": query,
-                        "cancelled": True,
-                    }
-                )
-
+        await session.receive_loop()
     except WebSocketDisconnect:
-        logger.info("WebSocket disconnected for session %s", session_id)
+        logger.info("WebSocket disconnected for session %s", session.session_id)
     except Exception as exc:
         logger.error("WebSocket error: %s", exc)
         await websocket.close()
+    finally:
+        worker.cancel()
+        logger.debug("Autocomplete session %s stats: %s", session.session_id, session.stats)
 
 
 @router.get("/api/v1/search/autocomplete/stats")
@@ -201,10 +365,11 @@ def get_performance_recommendations(stats: dict) -> list[str]:
 WEBSOCKET_CLIENT_EXAMPLE = """
 // JavaScript WebSocket client for autocomplete
 class AutocompleteClient {
-    constructor(url = 'ws://localhost:8000/api/v1/search/autocomplete/ws') {
+    constructor(url = 'ws://localhost:8000/api/v1/search/autocomplete/ws?delta=1') {
         this.url = url;
         this.ws = null;
         this.pendingQuery = null;
+        this.lastResults = [];
     }
 
     connect() {
@@ -216,6 +381,15 @@ class AutocompleteClient {
 
         this.ws.onmessage = (event) => {
             const data = JSON.parse(event.data);
+            if (data.type === 'delta') {
+                // Integer entries point at rows from the previous frame
+                data.results = data.patch.map(
+                    (entry) => (typeof entry === 'number' ? this.lastResults[entry] : entry)
+                );
+            }
+            if (data.results && !data.cancelled) {
+                this.lastResults = data.results;
+            }
             this.handleResults(data);
         };
 
@@ -2,6 +2,8 @@ from datetime import date, datetime, time, timedelta
 from typing import Any
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from .stage_timing import stage_timer
+
 RES_DURATION = timedelta(minutes=90)
 INTERVAL = timedelta(minutes=30)
 OPEN = time(10, 0)
@@ -44,64 +46,66 @@ def availability_for_day(restaurant: Any, party_size: int, day: date, db) -> dic
         restaurant_tz = getattr(restaurant, "timezone", DEFAULT_TIMEZONE) or DEFAULT_TIMEZONE
     tzinfo = _resolve_timezone(restaurant_tz)
 
-    # Tables that fit the party
-    tables: list[dict[str, Any]] = db.eligible_tables(rid, party_size)
-
-    # Existing booked reservations for that date, same restaurant
-    todays: list[dict[str, Any]] = []
-    for r in db.reservations.values():
-        if str(r.get("restaurant_id")) != rid:
-            continue
-        if r.get("status", "booked") != "booked":
-            continue
-        try:
-            rs = _normalize_timezone(_iso_parse(str(r["start"])), tzinfo)
-            re = _normalize_timezone(_iso_parse(str(r["end"])), tzinfo)
-        except Exception:
-            continue
-        if rs.date() == day:
-            todays.append({"table_id": str(r.get("table_id") or ""), "start": rs, "end": re})
-
-    bookings_by_table: dict[str, list[tuple[datetime, datetime]]] = {}
-    shared_blocks: list[tuple[datetime, datetime]] = []
-    for booking in todays:
-        block = (booking["start"], booking["end"])
-        tid = booking["table_id"]
-        if tid:
-            bookings_by_table.setdefault(tid, []).append(block)
-        else:
-            shared_blocks.append(block)
-
-    slots = []
-    cur = datetime.combine(day, OPEN, tzinfo=tzinfo)
-    last_start = datetime.combine(day, CLOSE, tzinfo=tzinfo) - RES_DURATION
-
-    while cur <= last_start:
-        slot_end = cur + RES_DURATION
-        free_ids: list[str] = []
-        for t in tables:
-            tid = str(t.get("id"))
-            taken = False
-            for rs, re in bookings_by_table.get(tid, ()):
-                if _overlaps(cur, slot_end, rs, re):
-                    taken = True
-                    break
-            if not taken:
-                for rs, re in shared_blocks:
+    with stage_timer("availability", "index_lookup"):
+        # Tables that fit the party
+        tables: list[dict[str, Any]] = db.eligible_tables(rid, party_size)
+
+        # Existing booked reservations for that date, same restaurant
+        todays: list[dict[str, Any]] = []
+        for r in db.reservations.values():
+            if str(r.get("restaurant_id")) != rid:
+                continue
+            if r.get("status", "booked") != "booked":
+                continue
+            try:
+                rs = _normalize_timezone(_iso_parse(str(r["start"])), tzinfo)
+                re = _normalize_timezone(_iso_parse(str(r["end"])), tzinfo)
+            except Exception:
+                continue
+            if rs.date() == day:
+                todays.append({"table_id": str(r.get("table_id") or ""), "start": rs, "end": re})
+
+        bookings_by_table: dict[str, list[tuple[datetime, datetime]]] = {}
+        shared_blocks: list[tuple[datetime, datetime]] = []
+        for booking in todays:
+            block = (booking["start"], booking["end"])
+            tid = booking["table_id"]
+            if tid:
+                bookings_by_table.setdefault(tid, []).append(block)
+            else:
+                shared_blocks.append(block)
+
+    with stage_timer("availability", "grid_build"):
+        slots = []
+        cur = datetime.combine(day, OPEN, tzinfo=tzinfo)
+        last_start = datetime.combine(day, CLOSE, tzinfo=tzinfo) - RES_DURATION
+
+        while cur <= last_start:
+            slot_end = cur + RES_DURATION
+            free_ids: list[str] = []
+            for t in tables:
+                tid = str(t.get("id"))
+                taken = False
+                for rs, re in bookings_by_table.get(tid, ()):
                     if _overlaps(cur, slot_end, rs, re):
                         taken = True
                         break
-            if not taken:
-                free_ids.append(tid)
-
-        slots.append(
-            {
-                "start": cur.isoformat(timespec="seconds"),
-                "end": slot_end.isoformat(timespec="seconds"),
-                "available_table_ids": free_ids,
-                "count": len(free_ids),
-            }
-        )
-        cur += INTERVAL
+                if not taken:
+                    for rs, re in shared_blocks:
+                        if _overlaps(cur, slot_end, rs, re):
+                            taken = True
+                            break
+                if not taken:
+                    free_ids.append(tid)
+
+            slots.append(
+                {
+                    "start": cur.isoformat(timespec="seconds"),
+                    "end": slot_end.isoformat(timespec="seconds"),
+                    "available_table_ids": free_ids,
+                    "count": len(free_ids),
+                }
+            )
+            cur += INTERVAL
 
     return {"slots": slots, "restaurant_timezone": restaurant_tz}
@@ -4,11 +4,13 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import math
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, is_dataclass, replace
 from threading import Lock
 from typing import Any, Generic, TypeVar
 
+from . import geohash
 from .settings import settings
 
 logger = logging.getLogger(__name__)
@@ -103,9 +105,42 @@ class TTLCache(Generic[T]):
 
             entry.increment_hits()
             self._stats["hits"] += 1
-            logger.debug("Cache hit for '%s' in '%s' (hits: %d)", key, self.name, entry.hits)
+            logger.debug(
+                "Cache hit for '%s' in '%s' (hits: %d)",
+                key,
+                self.name,
+                entry.hits,
+                extra={"sample_key": "cache.hit"},
+            )
             return entry.value
 
+    def get_many(self, keys: list[str]) -> dict[str, T]:
+        """
+        Look up several candidate keys as one logical request.
+
+        Counts a single hit if any key is present, otherwise a single miss, so
+        probing neighbouring keys does not distort the hit rate.
+        """
+        if not self.enabled:
+            return {}
+
+        found: dict[str, T] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._cache.get(key)
+                if entry is None:
+                    continue
+                if entry.is_expired():
+                    self._stats["expirations"] += 1
+                    self._remove_entry(key)
+                    continue
+                self._access_order.remove(key)
+                self._access_order.append(key)
+                entry.increment_hits()
+                found[key] = entry.value
+            self._stats["hits" if found else "misses"] += 1
+        return found
+
     def set(
         self,
         key: str,
@@ -218,13 +253,26 @@ _geocode_cache: TTLCache[Any] = TTLCache(
     default_ttl=settings.GOMAP_GEOCODE_CACHE_TTL_SECONDS,
 )
 
+# Encoded/simplified variants of route geometry, keyed by its points
+_geometry_cache: TTLCache[Any] = TTLCache(
+    "route_geometry",
+    max_size=500,
+    default_ttl=settings.GOMAP_CACHE_TTL_SECONDS,
+)
+
 _traffic_cache: TTLCache[Any] = TTLCache(
     "gomap_traffic",
-    max_size=200,
+    max_size=2000,
     default_ttl=settings.GOMAP_TRAFFIC_UPDATE_INTERVAL_SECONDS,
 )
 
 
+# Road distance / straight-line distance used when a cached route is too short to measure it
+ROUTE_DEFAULT_CIRCUITY = 1.3
+# Geometry points this close to a route's origin are too near to give its heading
+ROUTE_HEADING_MIN_KM = 0.02
+
+
 def make_cache_key(*args: Any) -> str:
     """
     Create a cache key from arguments.
@@ -243,40 +291,148 @@ def make_cache_key(*args: Any) -> str:
     return hashlib.sha256(key_string.encode()).hexdigest()[:16]
 
 
-def cache_route(
+@dataclass(slots=True)
+class _RouteEntry:
+    """Cached route plus the exact origin it was computed from."""
+
+    origin_lat: float
+    origin_lon: float
+    value: Any
+
+
+def _route_key(prefix: str, cell: str, dest_lat: float, dest_lon: float) -> str:
+    # Destinations are restaurants, so they keep (near) exact keys
+    return make_cache_key(prefix, cell, round(dest_lat, 5), round(dest_lon, 5))
+
+
+def _store_route(
+    cache: TTLCache[Any],
+    prefix: str,
     origin_lat: float,
     origin_lon: float,
     dest_lat: float,
     dest_lon: float,
     result: Any,
 ) -> None:
-    """Cache a route calculation result."""
-    # Round coordinates to reduce key variations
-    key = make_cache_key(
-        "route",
-        round(origin_lat, 5),
-        round(origin_lon, 5),
-        round(dest_lat, 5),
-        round(dest_lon, 5),
+    cell = geohash.encode(origin_lat, origin_lon, settings.ROUTE_CACHE_GEOHASH_PRECISION)
+    cache.set(
+        _route_key(prefix, cell, dest_lat, dest_lon),
+        _RouteEntry(origin_lat, origin_lon, result),
     )
-    _route_cache.set(key, result)
 
 
-def get_cached_route(
+def _lookup_route(
+    cache: TTLCache[Any],
+    prefix: str,
     origin_lat: float,
     origin_lon: float,
     dest_lat: float,
     dest_lon: float,
 ) -> Any | None:
-    """Get cached route calculation if available."""
-    key = make_cache_key(
-        "route",
-        round(origin_lat, 5),
-        round(origin_lon, 5),
-        round(dest_lat, 5),
-        round(dest_lon, 5),
+    """Find a route from the origin's geohash cell or, failing that, a neighbouring one."""
+    cell = geohash.encode(origin_lat, origin_lon, settings.ROUTE_CACHE_GEOHASH_PRECISION)
+    candidates = [cell, *geohash.neighbors(cell)]
+    found = cache.get_many([_route_key(prefix, c, dest_lat, dest_lon) for c in candidates])
+    best: tuple[float, _RouteEntry] | None = None
+    for entry in found.values():
+        shift_km = geohash.haversine_km(origin_lat, origin_lon, entry.origin_lat, entry.origin_lon)
+        if shift_km > settings.ROUTE_CACHE_NEIGHBOR_MAX_KM:
+            continue
+        if not _projects_onto_start(entry, origin_lat, origin_lon, dest_lat, dest_lon):
+            continue
+        if best is None or shift_km < best[0]:
+            best = (shift_km, entry)
+    if best is None:
+        return None
+    return _shift_route_origin(best[1], origin_lat, origin_lon, dest_lat, dest_lon)
+
+
+def _projects_onto_start(
+    entry: _RouteEntry,
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+) -> bool:
+    """
+    Whether the cached route's start is its closest point to the new origin.
+
+    A guest who is already past the cached origin along the route's first leg
+    would get a route that backtracks to it, so only origins behind or beside
+    the start qualify. The first leg comes from the geometry when there is
+    one, otherwise from the straight line to the destination.
+    """
+    start_lat, start_lon = entry.origin_lat, entry.origin_lon
+    ahead_lat, ahead_lon = dest_lat, dest_lon
+    for point in getattr(entry.value, "geometry", None) or ():
+        if geohash.haversine_km(start_lat, start_lon, point[0], point[1]) >= ROUTE_HEADING_MIN_KM:
+            ahead_lat, ahead_lon = point[0], point[1]
+            break
+    # Flat-earth projection is plenty over a few hundred metres
+    lon_scale = math.cos(math.radians(start_lat))
+    heading = (ahead_lat - start_lat) * (origin_lat - start_lat) + (ahead_lon - start_lon) * (
+        origin_lon - start_lon
+    ) * lon_scale * lon_scale
+    return heading <= 0
+
+
+def _shift_route_origin(
+    entry: _RouteEntry,
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+) -> Any:
+    """
+    Adapt a cached route to a nearby origin.
+
+    The change in straight-line distance to the destination is scaled by the
+    cached route's own circuity and pace, which keeps the correction in line
+    with the road network the route actually follows.
+    """
+    value = entry.value
+    distance_km = getattr(value, "distance_km", None)
+    duration_seconds = getattr(value, "duration_seconds", None)
+    if not is_dataclass(value) or not distance_km or duration_seconds is None:
+        return value
+    if (origin_lat, origin_lon) == (entry.origin_lat, entry.origin_lon):
+        return value
+
+    cached_crow = geohash.haversine_km(entry.origin_lat, entry.origin_lon, dest_lat, dest_lon)
+    new_crow = geohash.haversine_km(origin_lat, origin_lon, dest_lat, dest_lon)
+    circuity = distance_km / cached_crow if cached_crow > 0.05 else ROUTE_DEFAULT_CIRCUITY
+    circuity = min(max(circuity, 1.0), 3.0)
+    delta_km = (new_crow - cached_crow) * circuity
+    seconds_per_km = duration_seconds / distance_km
+
+    geometry = getattr(value, "geometry", None)
+    return replace(
+        value,
+        distance_km=round(max(0.0, distance_km + delta_km), 3),
+        duration_seconds=max(1, int(round(duration_seconds + delta_km * seconds_per_km))),
+        geometry=[(origin_lat, origin_lon), *geometry] if geometry else geometry,
     )
-    return _route_cache.get(key)
+
+
+def cache_route(
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+    result: Any,
+) -> None:
+    """Cache a route calculation result under the origin's geohash cell."""
+    _store_route(_route_cache, "route", origin_lat, origin_lon, dest_lat, dest_lon, result)
+
+
+def get_cached_route(
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+) -> Any | None:
+    """Get a cached route from this or a neighbouring origin cell if available."""
+    return _lookup_route(_route_cache, "route", origin_lat, origin_lon, dest_lat, dest_lon)
 
 
 def cache_osrm_route(
@@ -286,14 +442,7 @@ def cache_osrm_route(
     dest_lon: float,
     result: Any,
 ) -> None:
-    key = make_cache_key(
-        "osrm",
-        round(origin_lat, 5),
-        round(origin_lon, 5),
-        round(dest_lat, 5),
-        round(dest_lon, 5),
-    )
-    _osrm_route_cache.set(key, result)
+    _store_route(_osrm_route_cache, "osrm", origin_lat, origin_lon, dest_lat, dest_lon, result)
 
 
 def get_cached_osrm_route(
@@ -302,14 +451,31 @@ def get_cached_osrm_route(
     dest_lat: float,
     dest_lon: float,
 ) -> Any | None:
-    key = make_cache_key(
-        "osrm",
-        round(origin_lat, 5),
-        round(origin_lon, 5),
-        round(dest_lat, 5),
-        round(dest_lon, 5),
-    )
-    return _osrm_route_cache.get(key)
+    return _lookup_route(_osrm_route_cache, "osrm", origin_lat, origin_lon, dest_lat, dest_lon)
+
+
+def _geometry_points(geometry: list[Any]) -> tuple[tuple[float, float], ...]:
+    return tuple((point[0], point[1]) for point in geometry)
+
+
+def _geometry_key(points: tuple[tuple[float, float], ...], variant: str) -> str:
+    # By content, not identity: shifted or rebuilt routes are new lists
+    return make_cache_key("geometry", variant, len(points), hash(points))
+
+
+def cache_geometry(geometry: list[Any], variant: str, result: Any) -> None:
+    """Cache a derived form of a route's geometry."""
+    points = _geometry_points(geometry)
+    _geometry_cache.set(_geometry_key(points, variant), (points, result))
+
+
+def get_cached_geometry(geometry: list[Any], variant: str) -> Any | None:
+    """Get a derived geometry form if it was computed for the same points."""
+    points = _geometry_points(geometry)
+    entry = _geometry_cache.get(_geometry_key(points, variant))
+    if entry is None or entry[0] != points:
+        return None
+    return entry[1]
 
 
 def cache_geocode(query: str, results: list[Any]) -> None:
@@ -324,26 +490,44 @@ def get_cached_geocode(query: str) -> list[Any] | None:
     return _geocode_cache.get(key)
 
 
+# Radius classes (km) a traffic reading is stored under; queries round up to the next class
+TRAFFIC_RADIUS_CLASSES_KM = (1.0, 2.0, 5.0, 10.0)
+
+
+def traffic_tile(lat: float, lon: float) -> tuple[float, float]:
+    """Snap a coordinate to the centre of its traffic tile."""
+    decimals = settings.TRAFFIC_TILE_DECIMALS
+    return round(lat, decimals), round(lon, decimals)
+
+
+def traffic_tile_id(lat: float, lon: float) -> str:
+    """Stable tile identifier, shared with historical traffic pattern grid cells."""
+    decimals = settings.TRAFFIC_TILE_DECIMALS
+    tile_lat, tile_lon = traffic_tile(lat, lon)
+    return f"{tile_lat:.{decimals}f},{tile_lon:.{decimals}f}"
+
+
+def traffic_radius_class(radius_km: float) -> float:
+    """Smallest radius class that covers ``radius_km``."""
+    for radius_class in TRAFFIC_RADIUS_CLASSES_KM:
+        if radius_km <= radius_class:
+            return radius_class
+    return TRAFFIC_RADIUS_CLASSES_KM[-1]
+
+
+def traffic_cache_key(lat: float, lon: float, radius_km: float) -> str:
+    """Cache key shared by every point in the same tile and radius class."""
+    return make_cache_key("traffic", traffic_tile_id(lat, lon), traffic_radius_class(radius_km))
+
+
 def cache_traffic(lat: float, lon: float, radius_km: float, result: Any) -> None:
     """Cache traffic conditions."""
-    key = make_cache_key(
-        "traffic",
-        round(lat, 4),  # Less precision for traffic areas
-        round(lon, 4),
-        round(radius_km, 1),
-    )
-    _traffic_cache.set(key, result)
+    _traffic_cache.set(traffic_cache_key(lat, lon, radius_km), result)
 
 
 def get_cached_traffic(lat: float, lon: float, radius_km: float) -> Any | None:
     """Get cached traffic conditions if available."""
-    key = make_cache_key(
-        "traffic",
-        round(lat, 4),
-        round(lon, 4),
-        round(radius_km, 1),
-    )
-    return _traffic_cache.get(key)
+    return _traffic_cache.get(traffic_cache_key(lat, lon, radius_km))
 
 
 def get_all_cache_stats() -> dict[str, Any]:
@@ -353,6 +537,7 @@ def get_all_cache_stats() -> dict[str, Any]:
         "osrm_routes": _osrm_route_cache.get_stats(),
         "geocoding": _geocode_cache.get_stats(),
         "traffic": _traffic_cache.get_stats(),
+        "geometry": _geometry_cache.get_stats(),
     }
 
 
@@ -362,6 +547,7 @@ def clear_all_caches() -> None:
     _osrm_route_cache.clear()
     _geocode_cache.clear()
     _traffic_cache.clear()
+    _geometry_cache.clear()
     logger.info("Cleared all GoMap caches")
 
 
@@ -373,8 +559,15 @@ __all__ = [
     "get_cached_route",
     "cache_osrm_route",
     "get_cached_osrm_route",
+    "cache_geometry",
+    "get_cached_geometry",
     "cache_geocode",
     "get_cached_geocode",
+    "TRAFFIC_RADIUS_CLASSES_KM",
+    "traffic_tile",
+    "traffic_tile_id",
+    "traffic_radius_class",
+    "traffic_cache_key",
     "cache_traffic",
     "get_cached_traffic",
     "get_all_cache_stats",
@@ -0,0 +1,282 @@
+"""
+Restaurant catalog: normalised seed records plus everything derived from them.
+
+``compile_catalog`` turns the bytes of ``restaurants.json`` into what
+``Database`` and ``ConciergeService`` need at startup: normalised records, list
+summaries with their search text, per-restaurant table caches and the
+concierge scoring features. The result is pickled to ``restaurants.snapshot``
+next to the JSON, keyed by the JSON's SHA-256 and a fingerprint of the code
+that derives the indexes, so a process start reads and unpickles one file
+instead of parsing the JSON and rebuilding every index. A snapshot whose
+hash, fingerprint or ``SNAPSHOT_VERSION`` does not match is ignored; the
+catalog is compiled from the JSON and the snapshot rewritten for the next
+start. ``tools/build_catalog_snapshot.py`` builds it ahead of time.
+
+The snapshot holds builtins only (dicts, lists, tuples, sets, strings and
+numbers) and is read with an unpickler that refuses to import anything, so it
+cannot carry code and does not depend on module paths. Bump
+``SNAPSHOT_VERSION`` whenever the derived data changes shape or meaning.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+from dataclasses import asdict, dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from .concierge_tags import (
+    derive_restaurant_cuisines,
+    derive_restaurant_locations,
+    derive_restaurant_tags,
+    restaurant_price_bucket,
+)
+from .scoring import RestaurantFeatures
+from .serializers import restaurant_to_list_item
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".snapshot"
+# Modules whose code shapes the derived indexes; editing any invalidates snapshots
+DERIVING_MODULES = ("catalog", "concierge_tags", "scoring", "serializers")
+
+
+class _BuiltinsUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        raise pickle.UnpicklingError(f"Catalog snapshots cannot reference {module}.{name}")
+
+
+@dataclass(slots=True)
+class Catalog:
+    source_hash: str
+    restaurants: dict[str, dict[str, Any]]
+    restaurants_by_slug: dict[str, dict[str, Any]]
+    summaries: list[dict[str, Any]]
+    summary_index: list[tuple[dict[str, Any], str]]
+    tables: dict[str, list[tuple[dict[str, Any], int]]]
+    table_lookup: dict[str, dict[str, dict[str, Any]]]
+    list_items: dict[str, dict[str, Any]]
+    features: dict[str, RestaurantFeatures]
+    # The records the indexes were derived from; ``restaurants`` is shared with
+    # Database and may gain or replace records later
+    compiled_records: dict[str, dict[str, Any]]
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def snapshot_path(seed_path: Path) -> Path:
+    return seed_path.with_suffix(SNAPSHOT_SUFFIX)
+
+
+@lru_cache(maxsize=1)
+def code_fingerprint() -> str:
+    """SHA-256 over the source of ``DERIVING_MODULES``."""
+    digest = hashlib.sha256()
+    for name in DERIVING_MODULES:
+        digest.update(Path(__file__).with_name(f"{name}.py").read_bytes())
+    return digest.hexdigest()
+
+
+def _header(source_hash: str) -> dict[str, Any]:
+    return {
+        "version": SNAPSHOT_VERSION,
+        "source_hash": source_hash,
+        "code_hash": code_fingerprint(),
+    }
+
+
+def restaurant_features(record: dict[str, Any]) -> RestaurantFeatures:
+    """Concierge scoring features for one normalised restaurant record."""
+    return RestaurantFeatures(
+        restaurant_id=str(record.get("id")),
+        slug=record.get("slug"),
+        name=record.get("name"),
+        tags=derive_restaurant_tags(record),
+        cuisines=derive_restaurant_cuisines(record),
+        locations=derive_restaurant_locations(record),
+        price_bucket=restaurant_price_bucket(record.get("price_level")),
+        short_description=record.get("short_description"),
+        search_blob=" ".join(
+            filter(
+                None,
+                [
+                    record.get("name"),
+                    record.get("short_description"),
+                    " ".join(record.get("tags") or []),
+                    " ".join(record.get("cuisine") or []),
+                    record.get("neighborhood"),
+                    record.get("address"),
+                ],
+            )
+        ),
+    )
+
+
+def _normalise(item: dict[str, Any]) -> dict[str, Any]:
+    entry = dict(item)
+    entry_id = entry.get("id") or uuid4()
+    entry["id"] = str(entry_id)
+    slug = entry.get("slug")
+    if slug:
+        entry["slug"] = str(slug)
+    elif entry.get("name"):
+        entry["slug"] = str(entry["name"]).lower().replace(" ", "-")
+    entry.setdefault("city", "Baku")
+    entry.setdefault("timezone", "Asia/Baku")
+    return entry
+
+
+def compile_catalog(raw: bytes, source: Path | str = "restaurants.json") -> Catalog:
+    """Parse seed JSON and build every index served from memory."""
+    text = raw.decode("utf-8").strip()
+    if not text:
+        seed_restaurants: list[dict[str, Any]] = []
+    else:
+        try:
+            seed_restaurants = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise RuntimeError(f"Invalid restaurant seed data: {source}") from exc
+
+    normalised = [_normalise(item) for item in seed_restaurants if isinstance(item, dict)]
+    catalog = Catalog(
+        source_hash=content_hash(raw),
+        restaurants={r["id"]: r for r in normalised},
+        restaurants_by_slug={str(r.get("slug")).lower(): r for r in normalised if r.get("slug")},
+        summaries=[],
+        summary_index=[],
+        tables={},
+        table_lookup={},
+        list_items={},
+        features={},
+        compiled_records={},
+    )
+
+    for r in normalised:
+        rid = r["id"]
+        cover = r.get("cover_photo") or (r["photos"][0] if r.get("photos") else "")
+        summary = {
+            "id": rid,
+            "name": r["name"],
+            "slug": r.get("slug"),
+            "cuisine": r.get("cuisine", []),
+            "city": r.get("city"),
+            "timezone": r.get("timezone") or "Asia/Baku",
+            "cover_photo": cover,
+            "short_description": r.get("short_description"),
+            "price_level": r.get("price_level"),
+            "tags": r.get("tags", []),
+            "average_spend": r.get("average_spend"),
+        }
+        catalog.summaries.append(summary)
+        search_text = " ".join(
+            [
+                r.get("name", ""),
+                r.get("city", ""),
+                r.get("slug", ""),
+                " ".join(r.get("cuisine", []) or []),
+            ]
+        ).lower()
+        catalog.summary_index.append((summary, search_text))
+
+        table_entries: list[tuple[dict[str, Any], int]] = []
+        for area in r.get("areas") or []:
+            for t in area.get("tables") or []:
+                cap = int(t.get("capacity", 2) or 2)
+                table_entries.append((t, cap))
+        table_entries.sort(key=lambda entry: entry[1])
+        catalog.tables[rid] = table_entries
+        catalog.table_lookup[rid] = {str(t.get("id")): t for t, _ in table_entries}
+
+        catalog.list_items[rid] = restaurant_to_list_item(r, request=None)
+        catalog.features[rid] = restaurant_features(r)
+    catalog.compiled_records.update(catalog.restaurants)
+    return catalog
+
+
+def compiled_record(catalog: Catalog, record: dict[str, Any]) -> bool:
+    """Whether ``record`` is the one ``catalog``'s derived indexes were built from."""
+    return catalog.compiled_records.get(str(record.get("id"))) is record
+
+
+def write_snapshot(catalog: Catalog, path: Path) -> int:
+    """Atomically write ``catalog`` to ``path``; returns the size in bytes."""
+    payload = {field.name: getattr(catalog, field.name) for field in fields(catalog)}
+    payload["features"] = {rid: asdict(feature) for rid, feature in catalog.features.items()}
+    buffer = io.BytesIO()
+    pickle.dump(_header(catalog.source_hash), buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    # One dump keeps the records shared between the indexes, as after compiling
+    pickle.dump(payload, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(buffer.getvalue())
+    os.replace(tmp_path, path)
+    return buffer.tell()
+
+
+def read_snapshot(path: Path, source_hash: str) -> Catalog | None:
+    """The snapshot at ``path`` if it was built from JSON hashing to ``source_hash``."""
+    try:
+        stream = io.BytesIO(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    try:
+        header = _BuiltinsUnpickler(stream).load()
+        if header != _header(source_hash):
+            logger.info("Catalog snapshot %s is stale; loading restaurants from JSON", path)
+            return None
+        # A fresh unpickler per pickle; memo indexes restart with each dump
+        payload = _BuiltinsUnpickler(stream).load()
+        payload["features"] = {
+            rid: RestaurantFeatures(**feature) for rid, feature in payload["features"].items()
+        }
+        return Catalog(**payload)
+    except Exception:
+        logger.warning("Ignoring unreadable catalog snapshot %s", path, exc_info=True)
+        return None
+
+
+def load_catalog(seed_path: Path) -> Catalog:
+    """Catalog for ``seed_path``, from its snapshot when one matches the JSON."""
+    try:
+        raw = seed_path.read_bytes()
+    except FileNotFoundError:
+        raw = b""
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        return compile_catalog(raw, source=seed_path)
+    target = snapshot_path(seed_path)
+    catalog = read_snapshot(target, content_hash(raw))
+    if catalog is None:
+        catalog = compile_catalog(raw, source=seed_path)
+        if raw:
+            # So the next start (or worker) can skip compiling
+            try:
+                write_snapshot(catalog, target)
+            except OSError as exc:
+                logger.warning("Could not write catalog snapshot %s: %s", target, exc)
+    return catalog
+
+
+__all__ = [
+    "DERIVING_MODULES",
+    "SNAPSHOT_VERSION",
+    "Catalog",
+    "code_fingerprint",
+    "compile_catalog",
+    "compiled_record",
+    "content_hash",
+    "load_catalog",
+    "read_snapshot",
+    "restaurant_features",
+    "snapshot_path",
+    "write_snapshot",
+]
@@ -7,11 +7,13 @@ import re
 import time
 from collections import OrderedDict
 from collections.abc import Iterable
+from contextlib import AbstractContextManager, nullcontext
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from threading import Lock
+from typing import Any
 
-import sentry_sdk
-
+from .catalog import compiled_record, restaurant_features
 from .concierge_tags import (
     CANONICAL_LOCATION_TAGS,
     CANONICAL_VIBE_TAGS,
@@ -22,11 +24,7 @@ from .concierge_tags import (
     canonicalize_locations,
     canonicalize_negatives,
     canonicalize_vibes,
-    derive_restaurant_cuisines,
-    derive_restaurant_locations,
-    derive_restaurant_tags,
     prompt_keywords,
-    restaurant_price_bucket,
 )
 from .contracts import RestaurantListItem
 from .embeddings import (
@@ -43,6 +41,7 @@ from .schemas import ConciergeIntent, ConciergeRequest, ConciergeResponse
 from .scoring import RestaurantFeatures, hybrid_score
 from .serializers import restaurant_to_list_item
 from .settings import settings
+from .stage_timing import stage_timer
 from .storage import DB
 
 logger = logging.getLogger(__name__)
@@ -171,43 +170,25 @@ class ConciergeService:
         self._features.clear()
         self._records.clear()
         self._unique_cuisines.clear()
+        catalog = DB.catalog
         for record in DB.restaurants.values():
-            summary = restaurant_to_list_item(record, request=None)
+            # Records added after the catalog was built are derived here instead
+            compiled = compiled_record(catalog, record)
+            if compiled:
+                summary = catalog.list_items[record["id"]]
+            else:
+                summary = restaurant_to_list_item(record, request=None)
             summary_item = RestaurantListItem(**summary)
             rid = str(summary_item.id)
             self._records[rid] = record
             self._list_items[rid] = summary_item
-            tags = derive_restaurant_tags(record)
-            cuisines = derive_restaurant_cuisines(record)
-            locations = derive_restaurant_locations(record)
-            price_bucket = restaurant_price_bucket(record.get("price_level"))
             for cuisine_name in record.get("cuisine") or []:
                 if isinstance(cuisine_name, str):
                     self._unique_cuisines.add(cuisine_name.lower())
-            features = RestaurantFeatures(
-                restaurant_id=rid,
-                slug=record.get("slug"),
-                name=record.get("name"),
-                tags=tags,
-                cuisines=cuisines,
-                locations=locations,
-                price_bucket=price_bucket,
-                short_description=record.get("short_description"),
-                search_blob=" ".join(
-                    filter(
-                        None,
-                        [
-                            record.get("name"),
-                            record.get("short_description"),
-                            " ".join(record.get("tags") or []),
-                            " ".join(record.get("cuisine") or []),
-                            record.get("neighborhood"),
-                            record.get("address"),
-                        ],
-                    )
-                ),
-            )
-            self._features[rid] = features
+            if compiled:
+                self._features[rid] = catalog.features[record["id"]]
+            else:
+                self._features[rid] = restaurant_features(record)
 
     async def refresh_embeddings(self) -> None:
         self._load_restaurants()
@@ -362,30 +343,40 @@ class ConciergeService:
     async def _ai_recommend(
         self, payload: ConciergeRequest, limit: int, request, mode: str
     ) -> tuple[ConciergeResponse, CachedPayload]:
+        sentry = _sentry()
         prompt = payload.prompt.strip()
         prompt_fp = _prompt_digest(prompt)
-        with sentry_sdk.configure_scope() as scope:
-            scope.set_tag("feature_flag.concierge_mode", mode)
-            scope.set_extra("concierge_prompt_fp", prompt_fp)
-        sentry_sdk.add_breadcrumb(
-            category="concierge",
-            message="assignment",
-            data={"mode": mode, "prompt_fp": prompt_fp},
-        )
+        if sentry is not None:
+            with sentry.configure_scope() as scope:
+                scope.set_tag("feature_flag.concierge_mode", mode)
+                scope.set_extra("concierge_prompt_fp", prompt_fp)
+            sentry.add_breadcrumb(
+                category="concierge",
+                message="assignment",
+                data={"mode": mode, "prompt_fp": prompt_fp},
+            )
 
-        with sentry_sdk.start_span(op="concierge.intent", description="llm_intent"):
+        with (
+            _span(sentry, "concierge.intent", "llm_intent"),
+            stage_timer("concierge", "intent"),
+        ):
             intent = await parse_intent_async(prompt, payload.lang)
 
-        with sentry_sdk.start_span(op="concierge.embed", description="query_embedding"):
+        with (
+            _span(sentry, "concierge.embed", "query_embedding"),
+            stage_timer("concierge", "embed"),
+        ):
             query_vector = await embed(prompt)
 
-        similarities = self._similarities(query_vector)
-        if not similarities:
-            raise EmbeddingUnavailable("No restaurant vectors available")
-
         prompt_terms = prompt_keywords(prompt)
         candidates = []
-        with sentry_sdk.start_span(op="concierge.score", description="hybrid_scoring"):
+        with (
+            _span(sentry, "concierge.score", "hybrid_scoring"),
+            stage_timer("concierge", "score"),
+        ):
+            similarities = self._similarities(query_vector)
+            if not similarities:
+                raise EmbeddingUnavailable("No restaurant vectors available")
             for rid, emb_sim in similarities[:CANDIDATE_POOL]:
                 features = self._features.get(rid)
                 item = self._list_items.get(rid)
@@ -404,7 +395,10 @@ class ConciergeService:
         if not filtered:
             raise RuntimeError("No candidates cleared AI floor")
 
-        with sentry_sdk.start_span(op="concierge.serialize", description="response_build"):
+        with (
+            _span(sentry, "concierge.serialize", "response_build"),
+            stage_timer("concierge", "serialize"),
+        ):
             results = []
             reason_map: dict[str, list[str]] = {}
             reasons_by_id: dict[str, list[str]] = {}
@@ -457,14 +451,15 @@ class ConciergeService:
         intent = self._simple_intent(prompt)
         prompt_terms = prompt_keywords(prompt)
         scored: list[tuple[float, list[str], RestaurantListItem]] = []
-        for rid, features in self._features.items():
-            item = self._records.get(rid)
-            summary = self._list_items.get(rid)
-            if not item or not summary:
-                continue
-            sim = self._lexical_similarity(prompt_terms, features)
-            score, reasons = hybrid_score(intent, features, sim, self._weights, prompt_terms)
-            scored.append((score, reasons, summary))
+        with stage_timer("concierge", "score"):
+            for rid, features in self._features.items():
+                item = self._records.get(rid)
+                summary = self._list_items.get(rid)
+                if not item or not summary:
+                    continue
+                sim = self._lexical_similarity(prompt_terms, features)
+                score, reasons = hybrid_score(intent, features, sim, self._weights, prompt_terms)
+                scored.append((score, reasons, summary))
 
         scored.sort(key=lambda entry: (-entry[0], entry[2].slug or str(entry[2].id)))
         floor = max(settings.AI_SCORE_FLOOR or 0.0, 0.05)
@@ -476,19 +471,20 @@ class ConciergeService:
         reason_map: dict[str, list[str]] = {}
         reasons_by_id: dict[str, list[str]] = {}
         ids: list[str] = []
-        for _score, reasons, summary in filtered[:limit]:
-            record = self._records.get(str(summary.id))
-            if record:
-                summary_obj = RestaurantListItem(**restaurant_to_list_item(record, request))
-            else:
-                summary_obj = summary
-            results.append(summary_obj)
-            key = (summary_obj.slug or str(summary_obj.id)).lower()
-            chips = self._format_reasons(reasons)
-            reason_map[key] = chips
-            rid = str(summary_obj.id)
-            reasons_by_id[rid] = chips
-            ids.append(rid)
+        with stage_timer("concierge", "serialize"):
+            for _score, reasons, summary in filtered[:limit]:
+                record = self._records.get(str(summary.id))
+                if record:
+                    summary_obj = RestaurantListItem(**restaurant_to_list_item(record, request))
+                else:
+                    summary_obj = summary
+                results.append(summary_obj)
+                key = (summary_obj.slug or str(summary_obj.id)).lower()
+                chips = self._format_reasons(reasons)
+                reason_map[key] = chips
+                rid = str(summary_obj.id)
+                reasons_by_id[rid] = chips
+                ids.append(rid)
         response = ConciergeResponse(results=results, match_reason=reason_map, mode="local")
         cache_payload = CachedPayload(restaurant_ids=ids, reasons_by_id=reasons_by_id)
         return response, cache_payload
@@ -607,4 +603,37 @@ class ConciergeService:
         return overlap / max(1.0, (len(prompt_terms) * len(doc_terms)) ** 0.5)
 
 
-concierge_service = ConciergeService()
+def _sentry() -> Any | None:
+    """The Sentry SDK when configured; main imports and initialises it at startup."""
+    if not settings.SENTRY_DSN:
+        return None
+    import sentry_sdk
+
+    return sentry_sdk
+
+
+def _span(sentry: Any | None, op: str, description: str) -> AbstractContextManager:
+    if sentry is None:
+        return nullcontext()
+    return sentry.start_span(op=op, description=description)
+
+
+_service: ConciergeService | None = None
+_service_lock = Lock()
+
+
+def get_concierge_service() -> ConciergeService:
+    """Shared concierge, built (restaurant features included) on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ConciergeService()
+    return _service
+
+
+def __getattr__(name: str):
+    # ``from .concierge_service import concierge_service`` still works, building on demand
+    if name == "concierge_service":
+        return get_concierge_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,359 @@
+"""
+Offline ETA model learned from logged routing provider results.
+
+Every successful GoMap/OSRM ETA is logged as a training sample. A small ridge
+regression over log travel time (piecewise-linear in straight-line distance,
+hour-of-week, and hashed origin/destination traffic tiles) is fitted from that
+log and persisted as ``eta_model.npz`` in the data directory. When the
+providers are down or their circuit is open, ``maps.build_fallback_eta`` asks
+this model instead of dividing straight-line distance by a single city speed.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .cache import traffic_tile_id
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+DISTANCE_KNOTS_KM = (1.0, 3.0, 6.0, 10.0, 20.0)
+CELL_BUCKETS = 256  # Hashed traffic tiles per side (origin, destination)
+_DISTANCE_FEATURES = 3 + len(DISTANCE_KNOTS_KM)
+_HOUR_FEATURES = 7 * 24
+_FIT_CHUNK_ROWS = 4096
+
+
+def _haversine_km(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> Any:
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(value, dtype=float)) for value in (lat1, lon1, lat2, lon2)
+    )
+    d_lat, d_lon = lat2 - lat1, lon2 - lon1
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(d_lon / 2) ** 2
+    return 6371.0 * 2 * np.arcsin(np.sqrt(a))
+
+
+def _cell_bucket(lat: float, lon: float) -> int:
+    # crc32 rather than hash() so buckets are stable across processes
+    return zlib.crc32(traffic_tile_id(lat, lon).encode()) % CELL_BUCKETS
+
+
+def _design_matrix(samples: np.ndarray) -> np.ndarray:
+    """Features for rows of ``(o_lat, o_lon, d_lat, d_lon, day_of_week, hour)``."""
+    rows = samples.shape[0]
+    width = _DISTANCE_FEATURES + _HOUR_FEATURES + 2 * CELL_BUCKETS
+    features = np.zeros((rows, width))
+    distance = _haversine_km(samples[:, 0], samples[:, 1], samples[:, 2], samples[:, 3])
+    features[:, 0] = 1.0
+    features[:, 1] = np.log1p(distance)
+    features[:, 2] = distance
+    for offset, knot in enumerate(DISTANCE_KNOTS_KM, start=3):
+        features[:, offset] = np.maximum(distance - knot, 0.0)
+    index = np.arange(rows)
+    hour_of_week = samples[:, 4].astype(int) * 24 + samples[:, 5].astype(int)
+    features[index, _DISTANCE_FEATURES + hour_of_week] = 1.0
+    cells_start = _DISTANCE_FEATURES + _HOUR_FEATURES
+    origin_cells = [_cell_bucket(lat, lon) for lat, lon in samples[:, 0:2]]
+    dest_cells = [_cell_bucket(lat, lon) for lat, lon in samples[:, 2:4]]
+    features[index, cells_start + np.asarray(origin_cells, dtype=int)] = 1.0
+    features[index, cells_start + CELL_BUCKETS + np.asarray(dest_cells, dtype=int)] = 1.0
+    return features
+
+
+@dataclass
+class EtaModel:
+    duration_weights: np.ndarray  # Predicts log(seconds)
+    distance_weights: np.ndarray  # Predicts log(road km)
+    samples: int
+    mae_seconds: float
+    trained_at: datetime
+
+    def predict(
+        self,
+        origin_lat: float,
+        origin_lon: float,
+        dest_lat: float,
+        dest_lon: float,
+        when: datetime | None = None,
+    ) -> tuple[float, int]:
+        """Predicted ``(road_distance_km, duration_seconds)`` for one trip."""
+        when = when or datetime.now()
+        row = np.array(
+            [[origin_lat, origin_lon, dest_lat, dest_lon, when.weekday(), when.hour]], dtype=float
+        )
+        features = _design_matrix(row)[0]
+        seconds = float(np.exp(features @ self.duration_weights))
+        distance = float(np.exp(features @ self.distance_weights))
+        return round(distance, 2), max(1, int(round(seconds)))
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            version=MODEL_VERSION,
+            duration_weights=self.duration_weights,
+            distance_weights=self.distance_weights,
+            samples=self.samples,
+            mae_seconds=self.mae_seconds,
+            trained_at=self.trained_at.isoformat(),
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> EtaModel | None:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != MODEL_VERSION:
+                    logger.info("Ignoring ETA model with version %s", int(data["version"]))
+                    return None
+                return cls(
+                    duration_weights=data["duration_weights"],
+                    distance_weights=data["distance_weights"],
+                    samples=int(data["samples"]),
+                    mae_seconds=float(data["mae_seconds"]),
+                    trained_at=datetime.fromisoformat(str(data["trained_at"])),
+                )
+        except Exception as exc:
+            logger.warning("Could not load ETA model from %s: %s", path, exc)
+            return None
+
+
+def fit_eta_model(samples: np.ndarray, alpha: float | None = None) -> EtaModel:
+    """
+    Fit on rows of ``(o_lat, o_lon, d_lat, d_lon, day_of_week, hour, road_km, seconds)``.
+
+    Ridge regression keeps sparse hour/tile columns close to zero until they
+    have enough samples to move away from the distance curve.
+    """
+    alpha = settings.ETA_MODEL_RIDGE_ALPHA if alpha is None else alpha
+    width = _DISTANCE_FEATURES + _HOUR_FEATURES + 2 * CELL_BUCKETS
+    gram = alpha * np.eye(width)
+    gram[0, 0] = 0.0  # Leave the intercept unpenalised
+    moments = np.zeros((width, 2))
+    # Accumulate normal equations in chunks so large logs never build one dense matrix
+    for start in range(0, samples.shape[0], _FIT_CHUNK_ROWS):
+        chunk = samples[start : start + _FIT_CHUNK_ROWS]
+        features = _design_matrix(chunk[:, :6])
+        targets = np.column_stack(
+            (np.log(np.maximum(chunk[:, 7], 1.0)), np.log(np.maximum(chunk[:, 6], 0.01)))
+        )
+        gram += features.T @ features
+        moments += features.T @ targets
+    weights = np.linalg.solve(gram, moments)
+
+    errors = 0.0
+    for start in range(0, samples.shape[0], _FIT_CHUNK_ROWS):
+        chunk = samples[start : start + _FIT_CHUNK_ROWS]
+        predicted = np.exp(_design_matrix(chunk[:, :6]) @ weights[:, 0])
+        errors += float(np.sum(np.abs(predicted - chunk[:, 7])))
+    return EtaModel(
+        duration_weights=weights[:, 0],
+        distance_weights=weights[:, 1],
+        samples=int(samples.shape[0]),
+        mae_seconds=round(errors / max(1, samples.shape[0]), 1),
+        trained_at=datetime.now(),
+    )
+
+
+class EtaSampleLog:
+    """Buffered SQLite log of provider ETAs used as training data."""
+
+    def __init__(self, db_path: Path | None = None):
+        self.db_path = db_path or settings.data_dir / "eta_samples.db"
+        self._lock = threading.Lock()
+        self._buffer: list[tuple[Any, ...]] = []
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS eta_samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recorded_at TEXT NOT NULL,
+                origin_lat REAL NOT NULL,
+                origin_lon REAL NOT NULL,
+                dest_lat REAL NOT NULL,
+                dest_lon REAL NOT NULL,
+                day_of_week INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                distance_km REAL NOT NULL,
+                duration_seconds INTEGER NOT NULL,
+                provider TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+    def record(
+        self,
+        origin_lat: float,
+        origin_lon: float,
+        dest_lat: float,
+        dest_lon: float,
+        distance_km: float,
+        duration_seconds: int,
+        provider: str,
+        when: datetime | None = None,
+    ) -> None:
+        when = when or datetime.now()
+        row = (
+            when.isoformat(),
+            origin_lat,
+            origin_lon,
+            dest_lat,
+            dest_lon,
+            when.weekday(),
+            when.hour,
+            distance_km,
+            duration_seconds,
+            provider,
+        )
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= max(1, settings.ETA_MODEL_LOG_BATCH_SIZE):
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        self._conn.executemany(
+            """
+            INSERT INTO eta_samples (
+                recorded_at, origin_lat, origin_lon, dest_lat, dest_lon,
+                day_of_week, hour, distance_km, duration_seconds, provider
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            self._buffer,
+        )
+        self._conn.commit()
+        self._buffer.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def load_samples(self) -> np.ndarray:
+        """Most recent samples, newest first."""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT origin_lat, origin_lon, dest_lat, dest_lon, day_of_week, hour, "
+                "distance_km, duration_seconds FROM eta_samples ORDER BY id DESC LIMIT ?",
+                (settings.ETA_MODEL_MAX_TRAINING_SAMPLES,),
+            ).fetchall()
+        return np.asarray(rows, dtype=float).reshape(-1, 8)
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._flush_locked()
+            finally:
+                self._conn.close()
+
+
+_sample_log: EtaSampleLog | None = None
+_model: EtaModel | None = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def model_path() -> Path:
+    return settings.data_dir / "eta_model.npz"
+
+
+def get_sample_log() -> EtaSampleLog:
+    global _sample_log
+    if _sample_log is None:
+        _sample_log = EtaSampleLog()
+        atexit.register(_sample_log.close)
+    return _sample_log
+
+
+def record_eta_sample(
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+    distance_km: float | None,
+    duration_seconds: int | None,
+    provider: str,
+) -> None:
+    """Log a provider ETA for the next training run."""
+    if not settings.ETA_MODEL_ENABLED or not distance_km or not duration_seconds:
+        return
+    get_sample_log().record(
+        origin_lat, origin_lon, dest_lat, dest_lon, distance_km, duration_seconds, provider
+    )
+
+
+def load_eta_model() -> EtaModel | None:
+    """(Re)load the persisted model from the data directory."""
+    global _model, _model_loaded
+    with _model_lock:
+        _model = EtaModel.load(model_path())
+        _model_loaded = True
+    if _model:
+        logger.info(
+            "Loaded offline ETA model (%d samples, MAE %.0fs)", _model.samples, _model.mae_seconds
+        )
+    return _model
+
+
+def get_eta_model() -> EtaModel | None:
+    """The current model, or None when disabled or not trained yet."""
+    if not settings.ETA_MODEL_ENABLED:
+        return None
+    if not _model_loaded:
+        load_eta_model()
+    return _model
+
+
+def train_eta_model(min_samples: int | None = None) -> EtaModel | None:
+    """Fit on the sample log, persist, and swap the model in. None if data is too thin."""
+    global _model, _model_loaded
+    min_samples = settings.ETA_MODEL_MIN_SAMPLES if min_samples is None else min_samples
+    samples = get_sample_log().load_samples()
+    if samples.shape[0] < max(1, min_samples):
+        logger.info("Not training ETA model: %d/%d samples", samples.shape[0], min_samples)
+        return None
+    model = fit_eta_model(samples)
+    model.save(model_path())
+    with _model_lock:
+        _model = model
+        _model_loaded = True
+    logger.info(
+        "Trained offline ETA model on %d samples (MAE %.0fs)", model.samples, model.mae_seconds
+    )
+    return model
+
+
+def startup_eta_model() -> EtaModel | None:
+    """Load the persisted model, training one first if none exists and data allows."""
+    if not settings.ETA_MODEL_ENABLED:
+        return None
+    return load_eta_model() or train_eta_model()
+
+
+__all__ = [
+    "EtaModel",
+    "EtaSampleLog",
+    "fit_eta_model",
+    "get_eta_model",
+    "load_eta_model",
+    "record_eta_sample",
+    "startup_eta_model",
+    "train_eta_model",
+]
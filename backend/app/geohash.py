@@ -0,0 +1,88 @@
+"""
+Minimal geohash encoding used to bucket nearby coordinates for caching.
+
+A geohash cell at precision 7 is roughly 153 m x 153 m, which is small enough
+that a route from anywhere inside it is a good proxy for the whole cell.
+"""
+
+from __future__ import annotations
+
+from math import asin, cos, radians, sin, sqrt
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(_BASE32)}
+
+
+def encode(lat: float, lon: float, precision: int = 7) -> str:
+    """Geohash of ``lat``/``lon`` with ``precision`` characters."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars: list[str] = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if target >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def bounds(cell: str) -> tuple[float, float, float, float]:
+    """``(min_lat, min_lon, max_lat, max_lon)`` of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bound = lon_range if even else lat_range
+            mid = (bound[0] + bound[1]) / 2
+            if (value >> shift) & 1:
+                bound[0] = mid
+            else:
+                bound[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def neighbors(cell: str) -> list[str]:
+    """The eight cells surrounding ``cell`` at the same precision."""
+    min_lat, min_lon, max_lat, max_lon = bounds(cell)
+    height = max_lat - min_lat
+    width = max_lon - min_lon
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+    result = []
+    for dlat in (-1, 0, 1):
+        for dlon in (-1, 0, 1):
+            if dlat == 0 and dlon == 0:
+                continue
+            lat = center_lat + dlat * height
+            if not -90.0 <= lat <= 90.0:
+                continue
+            lon = (center_lon + dlon * width + 180.0) % 360.0 - 180.0
+            result.append(encode(lat, lon, len(cell)))
+    return result
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    d_lat = radians(lat2 - lat1)
+    d_lon = radians(lon2 - lon1)
+    a = sin(d_lat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(d_lon / 2) ** 2
+    return 6371.0 * 2 * asin(sqrt(a))
+
+
+__all__ = ["encode", "bounds", "neighbors", "haversine_km"]
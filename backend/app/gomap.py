@@ -4,7 +4,7 @@ import json
 import logging
 import re
 from collections.abc import Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any, Literal
 
 import httpx
@@ -16,9 +16,12 @@ from .cache import (
     get_cached_geocode,
     get_cached_route,
     get_cached_traffic,
+    traffic_radius_class,
+    traffic_tile,
 )
 from .circuit_breaker import CircuitOpenError, with_circuit_breaker
 from .input_validation import InputValidator
+from .logging_config import lazy
 from .settings import settings
 
 logger = logging.getLogger(__name__)
@@ -26,6 +29,11 @@ logger = logging.getLogger(__name__)
 SUPPORTED_LANGUAGES = {"az", "en", "ru"}
 
 
+def _payload_preview(payload: Any, limit: int) -> str:
+    """Truncated pretty JSON of an API response, for debug logs."""
+    return json.dumps(payload, indent=2, ensure_ascii=False)[:limit]
+
+
 @dataclass(slots=True)
 class GoMapRoute:
     distance_km: float | None
@@ -33,6 +41,7 @@ class GoMapRoute:
     geometry: list[tuple[float, float]] | None = None
     notice: str | None = None
     raw: dict[str, Any] | None = None
+    from_cache: bool = False  # Served from the route cache rather than fetched now
 
 
 @dataclass(slots=True)
@@ -292,12 +301,10 @@ def search_objects_with_distance(
             language=language,
         )
 
-        # Log response structure for debugging
-        import json
-
         logger.debug(
             "searchObjWithDistance response sample: %s",
-            json.dumps(payload, indent=2, ensure_ascii=False)[:500],
+            lazy(_payload_preview, payload, 500),
+            extra={"sample_key": "gomap.payload.search"},
         )
     except Exception as exc:
         logger.warning("GoMap distance search failed: %s", exc)
@@ -705,7 +712,7 @@ def route_directions(
             dest_lat,
             dest_lon,
         )
-        return cached
+        return replace(cached, from_cache=True)
 
     try:
         payload = _post(
@@ -1419,6 +1426,7 @@ def get_traffic_conditions(
     radius_km: float = 2.0,
     *,
     language: str | None = None,
+    refresh: bool = False,
 ) -> GoMapTraffic | None:
     """Get traffic conditions for a specific coordinate from GoMap API.
 
@@ -1427,6 +1435,7 @@ def get_traffic_conditions(
         longitude: Longitude of the point
         radius_km: Radius in km to check traffic (default 2km)
         language: Language for response
+        refresh: Skip the cache lookup and overwrite the entry (used by prefetching)
 
     Returns:
         GoMapTraffic object with traffic severity and conditions, or None if unavailable
@@ -1438,11 +1447,15 @@ def get_traffic_conditions(
         return None
 
     # Check cache first
-    cached = get_cached_traffic(latitude, longitude, radius_km)
+    cached = None if refresh else get_cached_traffic(latitude, longitude, radius_km)
     if cached is not None:
         logger.debug("Using cached traffic for %.4f,%.4f", latitude, longitude)
         return cached
 
+    # Query the tile centre with the radius class so the reading holds for the whole tile
+    latitude, longitude = traffic_tile(latitude, longitude)
+    radius_km = traffic_radius_class(radius_km)
+
     try:
         # Call GoMap traffic API
         payload = _post(
@@ -1455,14 +1468,12 @@ def get_traffic_conditions(
             language=language,
         )
 
-        # DEBUG: Log the actual API response structure
-        import json
-
-        logger.info(
+        logger.debug(
             "Traffic API raw response for lat=%.4f, lon=%.4f: %s",
             latitude,
             longitude,
-            json.dumps(payload, indent=2, ensure_ascii=False)[:1000],  # Truncate for logging
+            lazy(_payload_preview, payload, 1000),
+            extra={"sample_key": "gomap.payload.traffic"},
         )
     except Exception as exc:
         logger.warning("GoMap traffic check failed: %s", exc)
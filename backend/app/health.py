@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import time
+from collections.abc import Awaitable
 from typing import Any
 
 import httpx
 
 from .settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 def _is_configured(value: str | None) -> bool:
     """Return True when a config string is non-empty after trimming."""
@@ -20,11 +25,21 @@ def _is_configured(value: str | None) -> bool:
 
 
 class HealthChecker:
-    """Health checker for monitoring service dependencies."""
+    """
+    Health checker for monitoring service dependencies.
+
+    Checks run concurrently, each bounded by ``HEALTH_CHECK_TIMEOUT_SECONDS``.
+    ``get_snapshot`` serves the last result and refreshes it in the background,
+    so frequent load-balancer probes cost a dict lookup rather than upstream calls.
+    """
 
     def __init__(self) -> None:
         self._check_cache: dict[str, tuple[dict[str, Any], float]] = {}
         self._cache_ttl = 30.0  # Cache health checks for 30 seconds
+        self._snapshot: dict[str, Any] | None = None
+        self._snapshot_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self._loop_task: asyncio.Task | None = None
 
     async def check_all(self) -> dict[str, Any]:
         """
@@ -37,16 +52,20 @@ class HealthChecker:
         sentry_configured = _is_configured(settings.SENTRY_DSN)
         auth0_configured = _is_configured(settings.AUTH0_DOMAIN)
 
-        checks = {
-            "database": await self._check_database(),
-            "gomap": await self._check_gomap() if gomap_configured else {"status": "disabled"},
+        # Disabled dependencies get a static result; the rest are awaited together
+        checks: dict[str, Any] = {
+            "database": self._check_database(),
+            "gomap": self._check_gomap() if gomap_configured else {"status": "disabled"},
             "auth0": (
-                await self._check_auth0()
+                self._check_auth0()
                 if auth0_configured and not settings.AUTH0_BYPASS
                 else {"status": "bypassed"}
             ),
-            "sentry": await self._check_sentry() if sentry_configured else {"status": "disabled"},
+            "sentry": self._check_sentry() if sentry_configured else {"status": "disabled"},
         }
+        running = [name for name, check in checks.items() if not isinstance(check, dict)]
+        results = await asyncio.gather(*(self._bounded(name, checks[name]) for name in running))
+        checks.update(zip(running, results, strict=True))
 
         # Overall health is OK if all enabled checks pass
         all_ok = all(
@@ -59,23 +78,81 @@ class HealthChecker:
             "checks": checks,
         }
 
+    async def _bounded(self, name: str, check: Awaitable[dict[str, Any]]) -> dict[str, Any]:
+        """Run one check, turning a timeout into an error result."""
+        try:
+            return await asyncio.wait_for(check, settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        except TimeoutError:
+            result = {
+                "status": "error",
+                "error": "Check timed out",
+                "error_type": "TimeoutError",
+            }
+            # Keep a hung upstream from being retried on every refresh
+            self._cache_check(name, result)
+            return result
+
+    async def get_snapshot(self) -> dict[str, Any]:
+        """
+        Latest ``check_all`` result.
+
+        Only the first call waits for the checks. After that a snapshot older
+        than ``HEALTH_SNAPSHOT_MAX_AGE_SECONDS`` is still returned, and a
+        refresh starts in the background.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await asyncio.shield(self._start_refresh())
+        if time.monotonic() - self._snapshot_at > settings.HEALTH_SNAPSHOT_MAX_AGE_SECONDS:
+            self._start_refresh()
+        return snapshot
+
+    def _start_refresh(self) -> asyncio.Task:
+        # One refresh at a time; concurrent probes share it
+        loop = asyncio.get_running_loop()
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            task = loop.create_task(self.refresh())
+            self._refresh_task = task
+        return task
+
+    async def refresh(self) -> dict[str, Any]:
+        snapshot = await self.check_all()
+        self._snapshot, self._snapshot_at = snapshot, time.monotonic()
+        return snapshot
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Health snapshot refresh failed")
+            await asyncio.sleep(settings.HEALTH_REFRESH_INTERVAL_SECONDS)
+
+    async def startup(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def shutdown(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
     async def _check_database(self) -> dict[str, Any]:
         """Check if database (JSON file storage) is accessible."""
         try:
             from .storage import DB
 
-            # Try to read restaurants
-            restaurants = DB.list_restaurants()
-            restaurant_count = len(restaurants)
-
-            # Try to read reservations
-            reservations = DB.list_reservations()
-            reservation_count = len(reservations)
-
             return {
                 "status": "ok",
-                "restaurant_count": restaurant_count,
-                "reservation_count": reservation_count,
+                "restaurant_count": DB.restaurant_count(),
+                "reservation_count": DB.reservation_count(),
                 "storage_path": str(settings.data_dir),
             }
         except Exception as exc:
@@ -256,8 +333,9 @@ class HealthChecker:
         self._check_cache[key] = (result, time.time())
 
     def clear_cache(self) -> None:
-        """Clear cached dependency checks (useful for tests)."""
+        """Clear cached dependency checks and the snapshot (useful for tests)."""
         self._check_cache.clear()
+        self._snapshot = None
 
 
 # Global health checker instance
@@ -1,9 +1,25 @@
-"""Structured logging configuration using structlog."""
+"""
+Structured logging configuration using structlog.
+
+Records are written by a background thread: the root handler only puts them
+on a bounded queue, so request handlers never wait on stdout or a log
+shipper. Messages are formatted before queueing, so they show arguments as
+they were at the call; only ``lazy(...)`` fields are left for that thread to
+build, and only if the record is emitted. High-volume events pass
+``extra={"sample_key": ...}`` and are capped per key and time window.
+"""
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 import sys
+import threading
+import time
+from collections.abc import Callable
+from logging.handlers import QueueHandler, QueueListener
+from numbers import Number
 from typing import Any
 
 import structlog
@@ -47,6 +63,194 @@ def drop_color_message_key(logger: Any, method_name: str, event_dict: EventDict)
     return event_dict
 
 
+class lazy:
+    """
+    Log argument computed on first ``str()``, i.e. only when the record is written.
+
+    Usage:
+        logger.debug("payload: %s", lazy(json.dumps, payload, indent=2))
+    """
+
+    __slots__ = ("_func", "_args", "_kwargs", "_value")
+
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._value: str | None = None
+
+    def __str__(self) -> str:
+        if self._value is None:
+            self._value = str(self._func(*self._args, **self._kwargs))
+        return self._value
+
+    __repr__ = __str__
+
+
+class _FrozenArg:
+    """A log argument's ``str()`` and ``repr()`` as of the logging call."""
+
+    __slots__ = ("_str", "_repr")
+
+    def __init__(self, value: Any) -> None:
+        self._str = str(value)
+        self._repr = repr(value)
+
+    def __str__(self) -> str:
+        return self._str
+
+    def __repr__(self) -> str:
+        return self._repr
+
+
+def _frozen(arg: Any) -> Any:
+    # Numbers stay as they are for %d/%f (numpy scalars and Decimals included)
+    if arg is None or isinstance(arg, lazy | str | bytes | Number):
+        return arg
+    return _FrozenArg(arg)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through at most ``LOG_SAMPLE_LIMIT`` records per ``sample_key`` per window.
+
+    Records without a ``sample_key`` always pass. The first record of each new
+    window reports how many were dropped in the previous one.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        # sample_key -> [window_start, emitted, suppressed]
+        self._windows: dict[str, list[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= settings.LOG_SAMPLE_WINDOW_SECONDS:
+                suppressed = int(window[2]) if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < settings.LOG_SAMPLE_LIMIT:
+                window[1] += 1
+                return True
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+            if not record.args:
+                record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+            elif isinstance(record.args, tuple):
+                record.msg = f"{record.msg} (%d similar suppressed)"
+                record.args = (*record.args, suppressed)
+        return True
+
+    def suppressed(self) -> dict[str, int]:
+        with self._lock:
+            return {key: int(window[2]) for key, window in self._windows.items()}
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Queue handler that drops (and counts) records instead of blocking when full.
+
+    Once the queue has room again, a warning with the number of records lost
+    goes out ahead of the next record; the running total is exported as
+    ``log_records_dropped_total``.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks are rendered now, while their frames are intact
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        args = record.args
+        if isinstance(args, tuple) and any(isinstance(arg, lazy) for arg in args):
+            # The writer thread builds the lazy fields; pin the rest as they are now
+            record.args = tuple(_frozen(arg) for arg in args)
+        elif args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # Called under the handler lock, so the counters need no lock of their own
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._dropped_warning())
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _dropped_warning(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            __name__,
+            logging.WARNING,
+            __file__,
+            0,
+            f"Log queue full: dropped {self._unreported} records",
+            None,
+            None,
+        )
+
+
+def log_records_dropped() -> int:
+    """Records the root logger's queue has dropped since it was started."""
+    return sum(
+        handler.dropped
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, BoundedQueueHandler)
+    )
+
+
+_listener: QueueListener | None = None
+
+
+def start_log_queue(stream: Any = None, level: int = logging.INFO) -> BoundedQueueHandler:
+    """Route root logging through a bounded queue drained by a writer thread."""
+    global _listener
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, BoundedQueueHandler):
+            return handler
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(logging.Formatter("%(message)s"))
+    handler = BoundedQueueHandler(queue.Queue(maxsize=max(1, settings.LOG_QUEUE_SIZE)))
+    handler.addFilter(SamplingFilter())
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    root.addHandler(handler)
+    root.setLevel(level)
+    return handler
+
+
+def stop_log_queue() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, BoundedQueueHandler):
+            root.removeHandler(handler)
+
+
+atexit.register(stop_log_queue)
+
+
 def configure_structlog(json_logs: bool = False) -> None:
     """
     Configure structlog for the application.
@@ -94,12 +298,10 @@ def configure_structlog(json_logs: bool = False) -> None:
         cache_logger_on_first_use=True,
     )
 
-    # Configure standard library logging to use structlog
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=logging.INFO,
-    )
+    # Configure standard library logging; leaves handlers installed by a test
+    # runner or host process alone, as basicConfig would
+    if not logging.getLogger().handlers:
+        start_log_queue(sys.stdout, logging.INFO)
 
     # Set log levels for noisy libraries
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -124,4 +326,13 @@ def get_logger(name: str | None = None) -> structlog.stdlib.BoundLogger:
     return structlog.get_logger(name)
 
 
-__all__ = ["configure_structlog", "get_logger"]
+__all__ = [
+    "BoundedQueueHandler",
+    "SamplingFilter",
+    "configure_structlog",
+    "get_logger",
+    "lazy",
+    "log_records_dropped",
+    "start_log_queue",
+    "stop_log_queue",
+]
@@ -1,12 +1,11 @@
+import asyncio
 from pathlib import Path
 from typing import Any
 from uuid import UUID
 
-import sentry_sdk
-from fastapi import APIRouter, Body, Depends, FastAPI, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Body, Depends, FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
-from sentry_sdk.integrations.fastapi import FastApiIntegration
 
 from .api.routes import concierge as concierge_routes
 from .api.routes import gomap as gomap_routes
@@ -15,20 +14,24 @@ from .api.routes import restaurants as restaurants_routes
 from .api.types import CoordinateString
 from .api.utils import haversine_km, parse_coordinate_string
 from .api_v1 import v1_router
-from .auth import require_auth
+from .auth import auth0_verifier, require_auth
 from .backup import backup_manager
 from .cache import clear_all_caches, get_all_cache_stats
-from .concierge_service import concierge_service
+from .concierge_service import get_concierge_service
+from .eta_model import startup_eta_model
 from .gomap import route_directions  # noqa: F401 - used by proxy in reservations
 from .health import health_checker
 from .logging_config import configure_structlog, get_logger
 from .maps import search_places  # noqa: F401 - used by proxy in reservations
-from .metrics import PrometheusMiddleware, get_metrics
+from .metrics import add_prometheus_metrics, get_metrics, mark_worker_dead
+from .profiling import ProfilerBusy, StackSampler, add_request_profiling, get_request_profile
 from .settings import settings
+from .stage_timing import add_server_timing
 from .storage import DB
+from .traffic_prefetch import traffic_prefetcher
 from .ui import router as ui_router
 from .utils import add_cors, add_rate_limiting, add_request_id_tracing, add_security_headers
-from .versioning import APIVersionMiddleware
+from .versioning import add_api_versioning
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 PHOTO_DIR = (REPO_ROOT / "IGPics").resolve()
@@ -37,6 +40,10 @@ PHOTO_DIR = (REPO_ROOT / "IGPics").resolve()
 configure_structlog(json_logs=not settings.DEBUG)
 
 if settings.SENTRY_DSN:
+    # Imported only when configured; the SDK is one of the slowest imports at startup
+    import sentry_sdk
+    from sentry_sdk.integrations.fastapi import FastApiIntegration
+
     sentry_sdk.init(
         dsn=settings.SENTRY_DSN,
         environment=settings.SENTRY_ENVIRONMENT,
@@ -51,21 +58,64 @@ app = FastAPI(
     description="Restaurant reservation system for Baku, Azerbaijan",
 )
 add_cors(app)
-add_security_headers(app)
+# Pipeline stages run in this order; rate-limited responses still get the earlier stages' headers
+add_prometheus_metrics(app)
+add_server_timing(app)
+add_api_versioning(app, current_version="1.0", latest_version="1.0")
 add_request_id_tracing(app)
+add_security_headers(app)
 add_rate_limiting(app)
-app.add_middleware(APIVersionMiddleware, current_version="1.0", latest_version="1.0")
-app.add_middleware(PrometheusMiddleware)
+add_request_profiling(app)
+
+
+@app.on_event("startup")
+async def health_startup() -> None:
+    await health_checker.startup()
+
+
+@app.on_event("shutdown")
+async def health_shutdown() -> None:
+    await health_checker.shutdown()
 
 
 @app.on_event("startup")
 async def concierge_startup() -> None:
-    await concierge_service.startup()
+    await get_concierge_service().startup()
 
 
 @app.on_event("shutdown")
 async def concierge_shutdown() -> None:
-    await concierge_service.shutdown()
+    await get_concierge_service().shutdown()
+
+
+@app.on_event("shutdown")
+async def metrics_shutdown() -> None:
+    mark_worker_dead()
+
+
+@app.on_event("startup")
+async def auth_startup() -> None:
+    await auth0_verifier.startup()
+
+
+@app.on_event("shutdown")
+async def auth_shutdown() -> None:
+    await auth0_verifier.shutdown()
+
+
+@app.on_event("startup")
+async def eta_model_startup() -> None:
+    await asyncio.to_thread(startup_eta_model)
+
+
+@app.on_event("startup")
+async def traffic_prefetch_startup() -> None:
+    await traffic_prefetcher.startup()
+
+
+@app.on_event("shutdown")
+async def traffic_prefetch_shutdown() -> None:
+    await traffic_prefetcher.shutdown()
 
 
 # Include v1 API router (versioned endpoints)
@@ -105,7 +155,8 @@ def register_on_both(method: str, path: str, **kwargs):
 @register_on_both("get", "/health")
 async def health():
     """Return service health including upstream dependency checks."""
-    health_status = await health_checker.check_all()
+    # Served from the background-refreshed snapshot; copied before adding fields
+    health_status = {**await health_checker.get_snapshot()}
     status_code = 200 if health_status["status"] == "healthy" else 503
     health_status["service"] = "baku-reserve"
     health_status["version"] = "0.1.0"
@@ -125,6 +176,8 @@ if settings.DEBUG:
 
     @app.post("/dev/sentry-test")
     def dev_sentry_test(message: str = Body("manual ping", embed=True)):
+        import sentry_sdk
+
         sentry_sdk.capture_message(f"[dev-sentry-test] {message}")
         return {"ok": True, "message": message}
 
@@ -197,6 +250,44 @@ if settings.DEBUG:
         }
 
 
+def require_profiler_admin(claims: dict[str, Any] = Depends(require_auth)) -> dict[str, Any]:
+    """Profiling is served in production too, so it needs an explicit admin scope."""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(404, "Not Found")
+    scopes = claims.get("scope") or []
+    if isinstance(scopes, str):
+        scopes = scopes.split()
+    if settings.PROFILING_SCOPE not in scopes:
+        raise HTTPException(403, "Insufficient permissions")
+    return claims
+
+
+@app.get("/dev/profile", dependencies=[Depends(require_profiler_admin)])
+async def dev_profile(
+    seconds: float = Query(5.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    idle: bool = False,
+):
+    """Sample this worker's stacks for ``seconds``; returns collapsed stacks."""
+    sampler = StackSampler(interval=interval_ms / 1000, include_idle=idle)
+    try:
+        with sampler:
+            await asyncio.sleep(min(seconds, settings.PROFILING_MAX_SECONDS))
+    except ProfilerBusy as exc:
+        raise HTTPException(409, str(exc)) from exc
+    return PlainTextResponse(
+        sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)}
+    )
+
+
+@app.get("/dev/profile/requests/{profile_id}", dependencies=[Depends(require_profiler_admin)])
+def dev_request_profile(profile_id: str):
+    collapsed = get_request_profile(profile_id)
+    if collapsed is None:
+        raise HTTPException(404, "Profile not found")
+    return PlainTextResponse(collapsed)
+
+
 @app.get("/config/features")
 def feature_flags():
     gomap_ready = bool(settings.GOMAP_GUID)
@@ -2,10 +2,20 @@ from __future__ import annotations
 
 import logging
 import math
+from collections.abc import Sequence
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from math import asin, cos, radians, sin, sqrt
 from typing import Any, Literal
 
+from .cache import (
+    cache_geometry,
+    cache_osrm_route,
+    get_cached_geometry,
+    get_cached_osrm_route,
+    get_cached_route,
+)
+from .eta_model import get_eta_model, record_eta_sample
 from .gomap import (
     GoMapRoute,
 )
@@ -19,12 +29,19 @@ from .gomap import (
     search_objects as gomap_search,  # noqa: F401 - re-export for tests
 )
 from .osrm import OsrmRoute
+from .osrm import local_table as osrm_local_table
 from .osrm import route as osrm_route
+from .osrm import table as osrm_table
+from .polyline import GeometryFormat, compact_geometry, tolerance_for_zoom
 from .settings import settings
+from .stage_timing import stage_timer
+from .traffic_patterns import get_traffic_tracker
 
 logger = logging.getLogger(__name__)
 
 RouteCandidate = GoMapRoute | OsrmRoute
+TrafficSource = Literal["live", "historical", "blended"]
+TRAFFIC_CONDITIONS = {1: "smooth", 2: "moderate", 3: "heavy", 4: "severe"}
 
 
 @dataclass
@@ -39,6 +56,7 @@ class EtaComputation:
     traffic_delay_minutes: int | None = None
     route_geometry: list[tuple[float, float]] | None = None
     calibration_note: str | None = None
+    traffic_source: TrafficSource | None = None
 
 
 def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -50,6 +68,63 @@ def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return r * c
 
 
+def _historical_traffic(
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+    travel_seconds: int,
+) -> tuple[float, float] | None:
+    """Worse of origin/destination historical severity and the weaker confidence."""
+    if not settings.TRAFFIC_HISTORY_ENABLED:
+        return None
+    try:
+        departure = datetime.now()
+        predictions = get_traffic_tracker().predict_traffic_batch(
+            [(origin_lat, origin_lon), (dest_lat, dest_lon)],
+            [departure, departure + timedelta(seconds=travel_seconds)],
+        )
+    except Exception as exc:
+        logger.warning("Historical traffic prediction failed: %s", exc)
+        return None
+    if any(p.prediction_method != "historical_pattern" for p in predictions):
+        return None  # General time-of-day guesses are not worth blending
+    severity = max(p.expected_severity for p in predictions)
+    confidence = min(p.confidence for p in predictions)
+    return severity, confidence
+
+
+def _live_traffic(
+    origin_lat: float,
+    origin_lon: float,
+    dest_lat: float,
+    dest_lon: float,
+) -> int | None:
+    """Worse of origin/destination live severity; readings feed the historical tracker."""
+    # Check traffic at origin and destination
+    readings = [
+        (origin_lat, origin_lon, gomap_traffic(origin_lat, origin_lon, radius_km=2.0)),
+        (dest_lat, dest_lon, gomap_traffic(dest_lat, dest_lon, radius_km=2.0)),
+    ]
+    severity = 0
+    for lat, lon, traffic in readings:
+        if not traffic or not traffic.severity:
+            continue
+        severity = max(severity, traffic.severity)
+        if settings.TRAFFIC_HISTORY_ENABLED:
+            try:
+                get_traffic_tracker().record_observation(
+                    lat,
+                    lon,
+                    traffic.severity,
+                    speed_kmh=traffic.speed_kmh,
+                    delay_minutes=traffic.delay_minutes,
+                )
+            except Exception as exc:
+                logger.debug("Could not record traffic observation: %s", exc)
+    return severity or None
+
+
 def compute_eta_with_traffic(
     origin_lat: float,
     origin_lon: float,
@@ -59,8 +134,10 @@ def compute_eta_with_traffic(
     """Call GoMap routing to fetch driving ETA with optional traffic conditions."""
 
     # Get base route information
-    gomap = gomap_route(origin_lat, origin_lon, dest_lat, dest_lon)
-    osrm = osrm_route(origin_lat, origin_lon, dest_lat, dest_lon)
+    with stage_timer("directions", "gomap"):
+        gomap = gomap_route(origin_lat, origin_lon, dest_lat, dest_lon)
+    with stage_timer("directions", "osrm"):
+        osrm = osrm_route(origin_lat, origin_lon, dest_lat, dest_lon)
 
     if not gomap and not osrm:
         return None
@@ -100,6 +177,8 @@ def compute_eta_with_traffic(
                     duration_seconds=avg_seconds,
                     geometry=getattr(gomap, "geometry", None),
                     notice=gomap.notice,
+                    from_cache=getattr(gomap, "from_cache", False)
+                    or getattr(osrm, "from_cache", False),
                 )
             base_provider = "gomap"
 
@@ -126,56 +205,67 @@ def compute_eta_with_traffic(
     traffic_condition = None
     traffic_delay_minutes = None
 
-    # Try to get traffic conditions if enabled
-    if settings.GOMAP_TRAFFIC_ENABLED and gomap:
-        try:
-            # Check traffic at origin
-            origin_traffic = gomap_traffic(origin_lat, origin_lon, radius_km=2.0)
-            # Check traffic at destination
-            dest_traffic = gomap_traffic(dest_lat, dest_lon, radius_km=2.0)
-
-            # Use the worse traffic condition between origin and destination
-            traffic_severity = 0
-            if origin_traffic and origin_traffic.severity:
-                traffic_severity = origin_traffic.severity
-            if dest_traffic and dest_traffic.severity:
-                traffic_severity = max(traffic_severity, dest_traffic.severity)
-
-            # Apply traffic adjustments based on severity
-            if traffic_severity > 0:
-                # Map severity to condition
-                delays = settings.parsed_traffic_delay_factors
-                if traffic_severity == 1:
-                    traffic_condition = "smooth"
-                elif traffic_severity == 2:
-                    traffic_condition = "moderate"
-                elif traffic_severity == 3:
-                    traffic_condition = "heavy"
-                else:
-                    traffic_condition = "severe"
-                delay_factor = delays.get(traffic_condition, 1.0)
-
-                # Calculate adjusted ETA with traffic
-                if delay_factor > 1.0:
-                    adjusted_seconds = int(base_eta_seconds * delay_factor)
-                    traffic_delay_minutes = max(
-                        0, math.ceil((adjusted_seconds - base_eta_seconds) / 60)
-                    )
-                    eta_seconds = adjusted_seconds
-                    eta_minutes = max(1, math.ceil(eta_seconds / 60))
-
-                    logger.info(
-                        "Traffic adjustment: %s condition, %d min delay added to %d min base",
-                        traffic_condition,
-                        traffic_delay_minutes,
-                        base_eta_minutes,
-                    )
+    # Historical patterns first; live traffic only when they are not confident enough
+    traffic_source: TrafficSource | None = None
+    traffic_severity: float | None = None
+    with stage_timer("directions", "traffic"):
+        historical = _historical_traffic(
+            origin_lat, origin_lon, dest_lat, dest_lon, base_eta_seconds
+        )
+        if historical and historical[1] >= settings.TRAFFIC_HISTORY_CONFIDENCE_THRESHOLD:
+            traffic_severity, traffic_source = historical[0], "historical"
+        elif settings.GOMAP_TRAFFIC_ENABLED and gomap:
+            try:
+                live_severity = _live_traffic(origin_lat, origin_lon, dest_lat, dest_lon)
+            except Exception as exc:
+                logger.warning("Failed to fetch traffic conditions: %s", exc)
+                # Continue with base ETA if traffic check fails
+                live_severity = None
+            if live_severity and historical:
+                # Weight history by how much of it there is
+                hist_severity, confidence = historical
+                traffic_severity = confidence * hist_severity + (1 - confidence) * live_severity
+                traffic_source = "blended"
+            elif live_severity:
+                traffic_severity, traffic_source = live_severity, "live"
+            elif historical:
+                traffic_severity, traffic_source = historical[0], "historical"
             else:
                 traffic_condition = "unknown"
-
+        elif historical:
+            traffic_severity, traffic_source = historical[0], "historical"
+
+    # Apply traffic adjustments based on severity
+    if traffic_severity:
+        # Map severity to condition
+        level = min(4, max(1, int(round(traffic_severity))))
+        traffic_condition = TRAFFIC_CONDITIONS[level]
+        delay_factor = settings.parsed_traffic_delay_factors.get(traffic_condition, 1.0)
+
+        # Calculate adjusted ETA with traffic
+        if delay_factor > 1.0:
+            adjusted_seconds = int(base_eta_seconds * delay_factor)
+            traffic_delay_minutes = max(0, math.ceil((adjusted_seconds - base_eta_seconds) / 60))
+            eta_seconds = adjusted_seconds
+            eta_minutes = max(1, math.ceil(eta_seconds / 60))
+
+            logger.info(
+                "Traffic adjustment (%s): %s condition, %d min delay added to %d min base",
+                traffic_source,
+                traffic_condition,
+                traffic_delay_minutes,
+                base_eta_minutes,
+            )
+
+    # Log fresh provider answers (before display buffers) as offline model training data;
+    # cached and neighbour-shifted routes were logged when first fetched, or are estimates
+    if not getattr(base_route, "from_cache", False):
+        try:
+            record_eta_sample(
+                origin_lat, origin_lon, dest_lat, dest_lon, distance_km, eta_seconds, base_provider
+            )
         except Exception as exc:
-            logger.warning("Failed to fetch traffic conditions: %s", exc)
-            # Continue with base ETA if traffic check fails
+            logger.debug("Could not record ETA sample: %s", exc)
 
     # Add configured buffer minutes
     buffer_minutes = settings.ETA_BUFFER_MINUTES
@@ -200,10 +290,125 @@ def compute_eta_with_traffic(
         route_geometry=geometry,
         provider=base_provider,
         calibration_note=calibration_note,
+        traffic_source=traffic_source,
     )
 
 
-def build_fallback_eta(distance_km: float, fallback_minutes: int) -> EtaComputation:
+def _eta_from_cached(route: Any, provider: str) -> EtaComputation | None:
+    if not route or not route.duration_seconds:
+        return None
+    seconds = max(1, int(route.duration_seconds))
+    return EtaComputation(
+        eta_minutes=max(1, math.ceil(seconds / 60)),
+        eta_seconds=seconds,
+        route_distance_km=route.distance_km,
+        provider=provider,
+    )
+
+
+def compute_eta_matrix(
+    origin_lat: float,
+    origin_lon: float,
+    destinations: Sequence[tuple[str, float, float]],
+) -> dict[str, EtaComputation]:
+    """
+    Driving ETAs from one origin to many ``(key, lat, lon)`` destinations.
+
+    Pairs already in the GoMap or OSRM route cache are answered from it; the
+    rest go to the OSRM table service in one request. Destinations that cannot
+    be routed are left out so callers can apply their own fallback. Results
+    are base driving times without traffic adjustment.
+    """
+    results: dict[str, EtaComputation] = {}
+    pending: list[tuple[str, float, float]] = []
+    for key, dest_lat, dest_lon in destinations:
+        cached = _eta_from_cached(
+            get_cached_route(origin_lat, origin_lon, dest_lat, dest_lon), "gomap"
+        ) or _eta_from_cached(
+            get_cached_osrm_route(origin_lat, origin_lon, dest_lat, dest_lon), "osrm"
+        )
+        if cached:
+            results[key] = cached
+        else:
+            pending.append((key, dest_lat, dest_lon))
+    if not pending:
+        return results
+
+    use_osrm = settings.ETA_MATRIX_PROVIDER == "osrm"
+    fetch_table = osrm_table if use_osrm else osrm_local_table
+    cells = fetch_table(origin_lat, origin_lon, [(lat, lon) for _, lat, lon in pending])
+    for (key, dest_lat, dest_lon), cell in zip(pending, cells, strict=True):
+        if cell is None:
+            continue
+        if use_osrm:
+            cache_osrm_route(
+                origin_lat,
+                origin_lon,
+                dest_lat,
+                dest_lon,
+                OsrmRoute(cell.distance_km, cell.duration_seconds, notice="table"),
+            )
+        results[key] = EtaComputation(
+            eta_minutes=max(1, math.ceil(cell.duration_seconds / 60)),
+            eta_seconds=cell.duration_seconds,
+            route_distance_km=cell.distance_km,
+            provider="osrm" if use_osrm else "local",
+        )
+    return results
+
+
+def format_route_geometry(
+    geometry: list[tuple[float, float]] | None,
+    geometry_format: GeometryFormat = "coordinates",
+    *,
+    tolerance_m: float | None = None,
+    zoom: int | None = None,
+) -> list[tuple[float, float]] | str | None:
+    """
+    Shape route geometry for a response.
+
+    ``zoom`` picks a one-pixel simplification tolerance when ``tolerance_m`` is
+    not given. Derived forms are cached against the route's geometry, so repeat
+    requests for a cached route skip simplification and encoding.
+    """
+    if not geometry:
+        return geometry
+    if tolerance_m is None and zoom is not None:
+        tolerance_m = tolerance_for_zoom(zoom, geometry[0][0])
+    if geometry_format == "coordinates" and not tolerance_m:
+        return geometry
+    variant = f"{geometry_format}:{round(tolerance_m or 0.0, 2)}"
+    cached = get_cached_geometry(geometry, variant)
+    if cached is not None:
+        return cached
+    result = compact_geometry(geometry, geometry_format, tolerance_m)
+    cache_geometry(geometry, variant, result)
+    return result
+
+
+def build_fallback_eta(
+    distance_km: float,
+    fallback_minutes: int,
+    *,
+    origin: tuple[float, float] | None = None,
+    destination: tuple[float, float] | None = None,
+) -> EtaComputation:
+    """
+    ETA without a routing provider.
+
+    With coordinates and a trained offline model, the model's prediction is
+    used; otherwise the caller's straight-line estimate is.
+    """
+    model = get_eta_model() if origin and destination else None
+    if model is not None:
+        road_km, seconds = model.predict(*origin, *destination)
+        return EtaComputation(
+            eta_minutes=max(1, math.ceil(seconds / 60)),
+            eta_seconds=seconds,
+            route_distance_km=road_km,
+            provider="fallback",
+            calibration_note="offline ETA model",
+        )
     seconds = max(1, fallback_minutes * 60)
     return EtaComputation(
         eta_minutes=fallback_minutes,
@@ -216,7 +421,9 @@ def build_fallback_eta(distance_km: float, fallback_minutes: int) -> EtaComputat
 __all__ = [
     "EtaComputation",
     "compute_eta_with_traffic",
+    "compute_eta_matrix",
     "build_fallback_eta",
+    "format_route_geometry",
     "search_places",
 ]
 
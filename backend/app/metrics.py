@@ -1,28 +1,61 @@
-"""Prometheus metrics for monitoring and observability."""
+"""
+Prometheus metrics for monitoring and observability.
+
+With several uvicorn workers, start the server with ``PROMETHEUS_MULTIPROC_DIR``
+pointing at an empty directory. Each worker then writes its samples there and
+``/metrics`` aggregates all workers instead of reporting whichever one answered.
+"""
 
 from __future__ import annotations
 
+import os
 import time
-from collections.abc import Callable
+from dataclasses import dataclass
 from functools import lru_cache
-
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, Info, generate_latest
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from typing import Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    Info,
+    generate_latest,
+    multiprocess,
+)
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import Scope
+
+from .middleware import PipelineStage, add_pipeline_stage
 
 # ==============================================================================
 # APPLICATION INFO
 # ==============================================================================
 
-app_info = Info("baku_reserve", "Baku Reserve API information")
-app_info.info(
-    {
-        "version": "0.1.0",
-        "service": "baku-reserve-api",
-        "python_version": "3.11.14",
-    }
-)
+# prometheus_client picks its value storage from this variable at import time
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+APP_INFO = {
+    "version": "0.1.0",
+    "service": "baku-reserve-api",
+    "python_version": "3.11.14",
+}
+
+if MULTIPROCESS_DIR:
+    # Info metrics are not collected across processes; this exposes the same sample
+    app_info = Gauge(
+        "baku_reserve_info",
+        "Baku Reserve API information",
+        list(APP_INFO),
+        multiprocess_mode="livemax",
+    )
+    app_info.labels(**APP_INFO).set(1)
+else:
+    app_info = Info("baku_reserve", "Baku Reserve API information")
+    app_info.info(APP_INFO)
 
 # ==============================================================================
 # HTTP METRICS
@@ -41,10 +74,12 @@ http_request_duration_seconds = Histogram(
     buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
 )
 
+# Labelled by method only: the route template is not known until routing has run
 http_requests_in_progress = Gauge(
     "http_requests_in_progress",
     "HTTP requests currently in progress",
-    ["method", "endpoint"],
+    ["method"],
+    multiprocess_mode="livesum",
 )
 
 http_request_size_bytes = Histogram(
@@ -92,6 +127,7 @@ circuit_breaker_state = Gauge(
     "circuit_breaker_state",
     "Circuit breaker state (0=closed, 1=open, 2=half_open)",
     ["circuit_name"],
+    multiprocess_mode="livemax",
 )
 
 circuit_breaker_failures_total = Counter(
@@ -138,6 +174,7 @@ cache_size = Gauge(
     "cache_size",
     "Current cache size (number of entries)",
     ["cache_name"],
+    multiprocess_mode="livesum",
 )
 
 cache_evictions_total = Counter(
@@ -160,6 +197,7 @@ concierge_component_health = Gauge(
     "concierge_component_health",
     "Health of concierge dependencies (1=healthy, 0=degraded)",
     ["component"],
+    multiprocess_mode="livemin",
 )
 
 # ==============================================================================
@@ -176,6 +214,7 @@ reservations_current = Gauge(
     "reservations_current",
     "Current active reservations",
     ["status"],
+    multiprocess_mode="livemostrecent",
 )
 
 reservation_conflicts_total = Counter(
@@ -236,6 +275,18 @@ db_operation_duration_seconds = Histogram(
     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
 )
 
+# ==============================================================================
+# REQUEST STAGE METRICS
+# ==============================================================================
+
+# Where time goes inside hot endpoints; see stage_timing.stage_timer
+request_stage_duration_seconds = Histogram(
+    "request_stage_duration_seconds",
+    "Duration of named stages inside request handlers in seconds",
+    ["operation", "stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
 # ==============================================================================
 # BUSINESS METRICS
 # ==============================================================================
@@ -258,6 +309,15 @@ location_pings_total = Counter(
     ["throttled"],
 )
 
+# ==============================================================================
+# LOGGING METRICS
+# ==============================================================================
+
+log_records_dropped_total = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+)
+
 # ==============================================================================
 # HELPER FUNCTIONS
 # ==============================================================================
@@ -309,6 +369,17 @@ def track_cache_metrics(cache_name: str, stats: dict) -> None:
 track_cache_metrics._previous = {}  # type: ignore[attr-defined]
 
 
+def track_log_queue_metrics(dropped: int) -> None:
+    """Update the dropped-log counter from the log queue's running total."""
+    delta = max(0, dropped - track_log_queue_metrics._previous)
+    if delta:
+        log_records_dropped_total.inc(delta)
+    track_log_queue_metrics._previous = dropped
+
+
+track_log_queue_metrics._previous = 0  # type: ignore[attr-defined]
+
+
 @lru_cache(maxsize=2048)
 def normalize_endpoint(path: str) -> str:
     """
@@ -342,50 +413,126 @@ def normalize_endpoint(path: str) -> str:
 # ==============================================================================
 
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    """Middleware to track HTTP request metrics."""
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+UNMATCHED_ENDPOINT = "unmatched"
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip metrics endpoint itself
-        if request.url.path == "/metrics":
-            return await call_next(request)
 
-        method = request.method
-        endpoint = normalize_endpoint(request.url.path)
+def _with_router_prefix(template: str, path: str) -> str:
+    # FastAPI includes routers by reference (``_IncludedRouter``), so the
+    # matched route keeps the router's own path without the include prefix;
+    # take the prefix (e.g. "/v1") from the leading segments of the request path
+    extra = path.count("/") - template.count("/")
+    if extra <= 0 or ":path}" in template:
+        return template
+    return "/".join(path.split("/")[: extra + 1]) + template
 
-        # Track in-progress requests
-        http_requests_in_progress.labels(method=method, endpoint=endpoint).inc()
 
-        # Track request size
-        request_size = int(request.headers.get("content-length", 0))
+def route_template(scope: Scope, root_path: str = "") -> str:
+    """
+    Endpoint label for a routed request: the matched route's path template.
+
+    Mounted apps (static files) are labelled ``<mount>/{path}``; requests no
+    route matched share one label so scanners cannot inflate cardinality.
+    """
+    route = scope.get("route")
+    if route is not None:
+        template = getattr(route, "path_format", None) or route.path
+        return _with_router_prefix(template, scope["path"])
+    if scope.get("endpoint") is not None:
+        mount = scope.get("root_path", "")[len(root_path) :]
+        if mount:
+            return mount + "/{path}"
+        return UNMATCHED_ENDPOINT
+    # Answered before routing (e.g. rate limited): match against the app's routes
+    for candidate in getattr(scope.get("app"), "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match != Match.NONE:
+            return getattr(candidate, "path_format", None) or normalize_endpoint(scope["path"])
+    return UNMATCHED_ENDPOINT
+
+
+@dataclass(slots=True)
+class _EndpointMetrics:
+    duration: Any
+    request_size: Any
+    response_size: Any
+    totals: dict[str, Any]
+
+
+class PrometheusStage(PipelineStage):
+    """Pipeline stage tracking HTTP request metrics."""
+
+    def __init__(self) -> None:
+        # Label children per (method, route template); both sets are bounded
+        self._endpoints: dict[tuple[str, str], _EndpointMetrics] = {}
+        self._in_progress: dict[str, Any] = {}
+
+    def _in_progress_for(self, method: str) -> Any:
+        child = self._in_progress.get(method)
+        if child is None:
+            child = self._in_progress[method] = http_requests_in_progress.labels(method=method)
+        return child
+
+    def _endpoint(self, method: str, endpoint: str) -> _EndpointMetrics:
+        key = (method, endpoint)
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            labels = {"method": method, "endpoint": endpoint}
+            metrics = self._endpoints[key] = _EndpointMetrics(
+                duration=http_request_duration_seconds.labels(**labels),
+                request_size=http_request_size_bytes.labels(**labels),
+                response_size=http_response_size_bytes.labels(**labels),
+                totals={},
+            )
+        return metrics
+
+    async def on_request(self, scope: Scope, state: dict[str, Any]) -> None:
+        # Skip metrics endpoint itself
+        if scope["path"] == "/metrics":
+            return None
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+        self._in_progress_for(method).inc()
+        state["metrics"] = (method, scope.get("root_path", ""), time.time())
+        return None
+
+    def on_response(
+        self, scope: Scope, state: dict[str, Any], headers: MutableHeaders, status_code: int
+    ) -> None:
+        if "metrics" in state:
+            state["response_size"] = int(headers.get("content-length", 0))
+
+    def on_complete(self, scope: Scope, state: dict[str, Any], status_code: int) -> None:
+        if "metrics" not in state:
+            return
+        method, root_path, start_time = state["metrics"]
+        duration = time.time() - start_time
+        self._in_progress_for(method).dec()
+
+        endpoint = route_template(scope, root_path)
+        metrics = self._endpoint(method, endpoint)
+        metrics.duration.observe(duration)
+
+        # Track completed request (500 when the app raised)
+        status = str(status_code)
+        total = metrics.totals.get(status)
+        if total is None:
+            total = metrics.totals[status] = http_requests_total.labels(
+                method=method, endpoint=endpoint, status=status
+            )
+        total.inc()
+
+        # Track request and response sizes
+        request_size = int(Headers(scope=scope).get("content-length", 0))
         if request_size > 0:
-            http_request_size_bytes.labels(method=method, endpoint=endpoint).observe(request_size)
-
-        # Time the request
-        start_time = time.time()
-
-        try:
-            response = await call_next(request)
-            status = response.status_code
-        except Exception as exc:
-            # Track errors
-            http_requests_total.labels(method=method, endpoint=endpoint, status="500").inc()
-            http_requests_in_progress.labels(method=method, endpoint=endpoint).dec()
-            raise exc
-        finally:
-            duration = time.time() - start_time
-            http_request_duration_seconds.labels(method=method, endpoint=endpoint).observe(duration)
-
-        # Track completed request
-        http_requests_total.labels(method=method, endpoint=endpoint, status=str(status)).inc()
-        http_requests_in_progress.labels(method=method, endpoint=endpoint).dec()
-
-        # Track response size
-        response_size = int(response.headers.get("content-length", 0))
+            metrics.request_size.observe(request_size)
+        response_size = state.get("response_size", 0)
         if response_size > 0:
-            http_response_size_bytes.labels(method=method, endpoint=endpoint).observe(response_size)
+            metrics.response_size.observe(response_size)
 
-        return response
+
+def add_prometheus_metrics(app):
+    add_pipeline_stage(app, PrometheusStage())
 
 
 # ==============================================================================
@@ -394,17 +541,34 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
 
 
 def get_metrics() -> Response:
-    """Generate Prometheus metrics response."""
+    """Generate Prometheus metrics response, aggregated across workers if configured."""
+    from .logging_config import log_records_dropped
+
+    track_log_queue_metrics(log_records_dropped())
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
+def mark_worker_dead(pid: int | None = None) -> None:
+    """Drop this worker's live gauge samples when it shuts down (multiprocess mode)."""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
 __all__ = [
-    "PrometheusMiddleware",
+    "PrometheusStage",
+    "add_prometheus_metrics",
+    "mark_worker_dead",
+    "route_template",
     "get_metrics",
     "http_requests_total",
     "http_request_duration_seconds",
     "gomap_api_calls_total",
     "gomap_api_duration_seconds",
+    "request_stage_duration_seconds",
     "circuit_breaker_state",
     "cache_hits_total",
     "cache_misses_total",
@@ -412,6 +576,7 @@ __all__ = [
     "auth_requests_total",
     "track_circuit_breaker_metrics",
     "track_cache_metrics",
+    "track_log_queue_metrics",
     "normalize_endpoint",
     "concierge_component_health",
 ]
@@ -0,0 +1,104 @@
+"""
+Pure-ASGI request pipeline.
+
+Metrics, API version headers, request ids, security headers and rate limiting
+are small stage objects run by one middleware, rather than one
+``BaseHTTPMiddleware`` layer each. A request pays for a single ``send`` wrapper
+instead of a task and a response stream copy per layer, and streaming
+responses pass through unbuffered.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStage:
+    """Per-request hooks; stages override the ones they need."""
+
+    async def on_request(self, scope: Scope, state: dict[str, Any]) -> Response | None:
+        """Inspect the request. Returning a response skips later stages and the app."""
+        return None
+
+    def on_response(
+        self, scope: Scope, state: dict[str, Any], headers: MutableHeaders, status_code: int
+    ) -> None:
+        """Adjust response headers before they are sent."""
+
+    def on_complete(self, scope: Scope, state: dict[str, Any], status_code: int) -> None:
+        """Runs after the response is sent, with status 500 if the app raised."""
+
+
+class RequestPipeline:
+    """
+    ASGI middleware running ``stages`` like nested layers, outermost first.
+
+    Requests go through stages in registration order and responses unwind in
+    reverse. Stages see the response only if their ``on_request`` ran, so a
+    stage that short-circuits (e.g. with a 429) still gets the headers of
+    every stage registered before it.
+    """
+
+    def __init__(self, app: ASGIApp, stages: list[PipelineStage]):
+        self.app = app
+        self.stages = stages
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.stages:
+            await self.app(scope, receive, send)
+            return
+
+        state: dict[str, Any] = {}
+        active: list[PipelineStage] = []
+        status_code = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                for stage in reversed(active):
+                    stage.on_response(scope, state, headers, status_code)
+            await send(message)
+
+        try:
+            response: Response | None = None
+            for stage in self.stages:
+                response = await stage.on_request(scope, state)
+                active.append(stage)
+                if response is not None:
+                    break
+            if response is not None:
+                await response(scope, receive, send_with_headers)
+            else:
+                await self.app(scope, receive, send_with_headers)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            for stage in reversed(active):
+                try:
+                    stage.on_complete(scope, state, status_code)
+                except Exception:
+                    logger.exception("Request pipeline stage %r failed", stage)
+
+
+def add_pipeline_stage(app, stage: PipelineStage) -> PipelineStage:
+    """Append ``stage`` to the app's pipeline, installing the middleware on first use."""
+    stages: list[PipelineStage] | None = getattr(app.state, "pipeline_stages", None)
+    if stages is None:
+        stages = []
+        app.state.pipeline_stages = stages
+        app.add_middleware(RequestPipeline, stages=stages)
+    stages.append(stage)
+    return stage
+
+
+__all__ = ["PipelineStage", "RequestPipeline", "add_pipeline_stage"]
@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from math import asin, cos, radians, sin, sqrt
 from typing import Any
 
 import httpx
 
 from .cache import cache_osrm_route, get_cached_osrm_route
+from .settings import settings
 
 logger = logging.getLogger(__name__)
 
 OSRM_BASE = "https://router.project-osrm.org/route/v1/driving"
+OSRM_TABLE_BASE = "https://router.project-osrm.org/table/v1/driving"
+OSRM_TABLE_MAX_DESTINATIONS = 99  # Public server caps a table request at 100 coordinates
+LOCAL_TABLE_CIRCUITY = 1.3  # Typical road distance / straight-line distance in Baku
 
 
 @dataclass(slots=True)
@@ -20,6 +26,7 @@ class OsrmRoute:
     geometry: list[tuple[float, float]] | None = None
     notice: str | None = None
     raw: dict[str, Any] | None = None
+    from_cache: bool = False  # Served from the route cache rather than fetched now
 
 
 def _parse_geometry(coords: list[list[float]]) -> list[tuple[float, float]] | None:
@@ -35,8 +42,9 @@ def route(
     dest_lon: float,
 ) -> OsrmRoute | None:
     cache_hit = get_cached_osrm_route(origin_lat, origin_lon, dest_lat, dest_lon)
-    if cache_hit and isinstance(cache_hit, OsrmRoute):
-        return cache_hit
+    # Table results share the cache but carry no geometry; fetch the full route then
+    if cache_hit and isinstance(cache_hit, OsrmRoute) and cache_hit.geometry is not None:
+        return replace(cache_hit, from_cache=True)
 
     url = f"{OSRM_BASE}/{origin_lon},{origin_lat};{dest_lon},{dest_lat}"
     params = {
@@ -77,4 +85,88 @@ def route(
     return osrm_route
 
 
-__all__ = ["OsrmRoute", "route"]
+@dataclass(slots=True)
+class OsrmTableCell:
+    distance_km: float
+    duration_seconds: int
+
+
+def _table_chunk(
+    origin_lat: float,
+    origin_lon: float,
+    destinations: Sequence[tuple[float, float]],
+) -> list[OsrmTableCell | None]:
+    coords = ";".join(f"{lon},{lat}" for lat, lon in [(origin_lat, origin_lon), *destinations])
+    params = {
+        "sources": "0",
+        "destinations": ";".join(str(i) for i in range(1, len(destinations) + 1)),
+        "annotations": "duration,distance",
+    }
+    try:
+        resp = httpx.get(f"{OSRM_TABLE_BASE}/{coords}", params=params, timeout=6.0)
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as exc:
+        logger.warning("OSRM table fetch failed: %s", exc)
+        return [None] * len(destinations)
+
+    if data.get("code") != "Ok":
+        logger.warning("OSRM table returned %s", data.get("message") or data.get("code"))
+        return [None] * len(destinations)
+    durations = (data.get("durations") or [[]])[0]
+    distances = (data.get("distances") or [[]])[0]
+    cells: list[OsrmTableCell | None] = []
+    for index in range(len(destinations)):
+        duration = durations[index] if index < len(durations) else None
+        distance = distances[index] if index < len(distances) else None
+        if duration is None or distance is None:
+            cells.append(None)  # Unreachable from the origin
+            continue
+        cells.append(
+            OsrmTableCell(
+                distance_km=round(float(distance) / 1000.0, 3),
+                duration_seconds=max(1, int(round(float(duration)))),
+            )
+        )
+    return cells
+
+
+def table(
+    origin_lat: float,
+    origin_lon: float,
+    destinations: Sequence[tuple[float, float]],
+) -> list[OsrmTableCell | None]:
+    """Durations and distances from one origin to many destinations via the table service."""
+    cells: list[OsrmTableCell | None] = []
+    for start in range(0, len(destinations), OSRM_TABLE_MAX_DESTINATIONS):
+        chunk = destinations[start : start + OSRM_TABLE_MAX_DESTINATIONS]
+        cells.extend(_table_chunk(origin_lat, origin_lon, chunk))
+    return cells
+
+
+def local_table(
+    origin_lat: float,
+    origin_lon: float,
+    destinations: Sequence[tuple[float, float]],
+) -> list[OsrmTableCell | None]:
+    """Network-free stand-in for :func:`table` using straight-line distance."""
+    cells: list[OsrmTableCell | None] = []
+    for dest_lat, dest_lon in destinations:
+        d_lat = radians(dest_lat - origin_lat)
+        d_lon = radians(dest_lon - origin_lon)
+        a = (
+            sin(d_lat / 2) ** 2
+            + cos(radians(origin_lat)) * cos(radians(dest_lat)) * sin(d_lon / 2) ** 2
+        )
+        distance_km = 6371.0 * 2 * asin(sqrt(a)) * LOCAL_TABLE_CIRCUITY
+        seconds = distance_km / settings.FALLBACK_CITY_SPEED_KMH * 3600
+        cells.append(
+            OsrmTableCell(
+                distance_km=round(distance_km, 3),
+                duration_seconds=max(1, round(seconds)),
+            )
+        )
+    return cells
+
+
+__all__ = ["OsrmRoute", "OsrmTableCell", "local_table", "route", "table"]
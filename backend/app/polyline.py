@@ -0,0 +1,147 @@
+"""
+Compact route geometry: Douglas–Peucker simplification and encoded polylines.
+
+Routes come back from GoMap/OSRM as thousands of ``(lat, lon)`` pairs. Map
+clients only need the points that are visible at their zoom level, and the
+Google encoded polyline format stores each point as a few ASCII characters
+instead of two JSON floats.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from math import cos, radians
+from typing import Literal, get_args
+
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_000.0
+# Ground resolution of a 256px web-mercator tile at zoom 0, in metres per pixel
+_METRES_PER_PIXEL_Z0 = 156_543.03
+
+GeometryFormat = Literal["coordinates", "polyline", "polyline6"]
+GEOMETRY_FORMATS: tuple[str, ...] = get_args(GeometryFormat)
+_PRECISION = {"polyline": 5, "polyline6": 6}
+
+
+def tolerance_for_zoom(zoom: float, latitude: float = 40.4) -> float:
+    """Simplification tolerance (metres) that keeps error under one pixel at ``zoom``."""
+    return _METRES_PER_PIXEL_Z0 * cos(radians(latitude)) / (2**zoom)
+
+
+def simplify(
+    points: Sequence[tuple[float, float]], tolerance_m: float
+) -> list[tuple[float, float]]:
+    """
+    Douglas–Peucker simplification of a ``(lat, lon)`` polyline.
+
+    Endpoints are always kept; every dropped point lies within ``tolerance_m``
+    of the simplified line.
+    """
+    count = len(points)
+    if count <= 2 or tolerance_m <= 0:
+        return list(points)
+
+    coords = np.asarray(points, dtype=float)
+    lat0 = radians(float(coords[:, 0].mean()))
+    xy = np.column_stack(
+        (
+            np.radians(coords[:, 1]) * cos(lat0) * EARTH_RADIUS_M,
+            np.radians(coords[:, 0]) * EARTH_RADIUS_M,
+        )
+    )
+
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = xy[end] - xy[start]
+        rel = xy[start + 1 : end] - xy[start]
+        length = float(np.hypot(*segment))
+        if length == 0:
+            distances = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            distances = np.abs(rel[:, 0] * segment[1] - rel[:, 1] * segment[0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance_m:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return [points[i] for i in np.flatnonzero(keep)]
+
+
+def _encode_value(value: int, out: list[str]) -> None:
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def encode(points: Sequence[tuple[float, float]], precision: int = 5) -> str:
+    """Encode ``(lat, lon)`` pairs with the Google polyline algorithm."""
+    factor = 10**precision
+    out: list[str] = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        ilat = int(round(lat * factor))
+        ilon = int(round(lon * factor))
+        _encode_value(ilat - prev_lat, out)
+        _encode_value(ilon - prev_lon, out)
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(out)
+
+
+def decode(encoded: str, precision: int = 5) -> list[tuple[float, float]]:
+    """Inverse of :func:`encode`."""
+    factor = 10**precision
+    points: list[tuple[float, float]] = []
+    index = lat = lon = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                result |= (byte & 0x1F) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+    return points
+
+
+def compact_geometry(
+    points: Sequence[tuple[float, float]],
+    geometry_format: GeometryFormat = "coordinates",
+    tolerance_m: float | None = None,
+) -> list[tuple[float, float]] | str:
+    """Simplify (when a tolerance is given) and encode a route for a response."""
+    if geometry_format not in GEOMETRY_FORMATS:
+        raise ValueError(f"Unknown geometry format {geometry_format!r}")
+    if tolerance_m:
+        points = simplify(points, tolerance_m)
+    if geometry_format == "coordinates":
+        return list(points)
+    return encode(points, _PRECISION[geometry_format])
+
+
+__all__ = [
+    "GEOMETRY_FORMATS",
+    "GeometryFormat",
+    "compact_geometry",
+    "decode",
+    "encode",
+    "simplify",
+    "tolerance_for_zoom",
+]
@@ -0,0 +1,206 @@
+"""
+On-demand sampling profiler for live workers.
+
+``StackSampler`` runs a daemon thread that reads every thread's Python stack
+via ``sys._current_frames()`` at a fixed interval and counts identical stacks.
+The output is in the collapsed format ("frame;frame;frame count") that
+flamegraph.pl, speedscope and inferno read directly. Nothing is installed in
+the interpreter (no ``sys.setprofile``), so other threads run at full speed
+and nothing is left behind once sampling stops.
+
+Two ways in, both off by default (``PROFILING_ENABLED``):
+
+- ``GET /dev/profile?seconds=N`` samples the whole worker for N seconds.
+- An ``X-Profile`` header carrying ``PROFILING_REQUEST_TOKEN`` samples the
+  worker while that one request runs. The response names the trace in
+  ``X-Profile-Id``, to be fetched from ``/dev/profile/requests/{id}``.
+
+Only one sampler runs per worker at a time.
+"""
+
+from __future__ import annotations
+
+import hmac
+import logging
+import os
+import sys
+import sysconfig
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType
+from typing import Any
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Scope
+
+from .middleware import PipelineStage, add_pipeline_stage
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+STDLIB_ROOT = sysconfig.get_paths()["stdlib"]
+MAX_STACK_DEPTH = 128
+RECENT_REQUEST_PROFILES = 20
+
+# Leaf frames of threads parked waiting for work (thread pools, the event loop
+# selector); dropped unless idle stacks are requested
+IDLE_LEAVES = frozenset(
+    {
+        "threading.py:Condition.wait",
+        "threading.py:Event.wait",
+        "threading.py:Thread._wait_for_tstate_lock",
+        "queue.py:Queue.get",
+        "selectors.py:EpollSelector.select",
+        "selectors.py:KqueueSelector.select",
+        "selectors.py:PollSelector.select",
+        "selectors.py:SelectSelector.select",
+        "concurrent/futures/thread.py:_worker",
+    }
+)
+
+_sampler_lock = threading.Lock()
+_recent_profiles: OrderedDict[str, str] = OrderedDict()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile is already running in this worker."""
+
+
+@lru_cache(maxsize=4096)
+def _frame_label(code: CodeType) -> str:
+    filename = code.co_filename
+    _, sep, tail = filename.rpartition("site-packages" + os.sep)
+    if sep:
+        filename = tail
+    else:
+        for root in (REPO_ROOT, STDLIB_ROOT):
+            if filename.startswith(root + os.sep):
+                filename = filename[len(root) + 1 :]
+                break
+    # Collapsed stacks use ";" between frames and a space before the count
+    return f"{filename}:{code.co_qualname}".replace(";", "_").replace(" ", "_")
+
+
+class StackSampler:
+    """Counts the stacks of every other thread, ``1 / interval`` times per second."""
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = max(0.0005, interval)
+        self.include_idle = include_idle
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> StackSampler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        if not _sampler_lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running in this worker")
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        _sampler_lock.release()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample(own_id)
+            except Exception:
+                logger.exception("Stack sample failed")
+
+    def sample(self, skip_thread: int | None = None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == skip_thread:
+                continue
+            stack: list[str] = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if not stack or (not self.include_idle and stack[0] in IDLE_LEAVES):
+                continue
+            stack.append(names.get(thread_id, str(thread_id)).replace(" ", "_"))
+            stack.reverse()
+            self.counts[";".join(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Stacks with their sample counts, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def get_request_profile(profile_id: str) -> str | None:
+    return _recent_profiles.get(profile_id)
+
+
+def _remember_profile(profile_id: str, collapsed: str) -> None:
+    _recent_profiles[profile_id] = collapsed
+    while len(_recent_profiles) > RECENT_REQUEST_PROFILES:
+        _recent_profiles.popitem(last=False)
+
+
+class RequestProfilingStage(PipelineStage):
+    """Samples the worker while a request carrying a valid ``X-Profile`` token runs."""
+
+    async def on_request(self, scope: Scope, state: dict[str, Any]) -> None:
+        # One attribute read per request while profiling is off
+        if not settings.PROFILING_ENABLED or not settings.PROFILING_REQUEST_TOKEN:
+            return None
+        token = Headers(scope=scope).get("x-profile")
+        if not token or not hmac.compare_digest(
+            token.encode(), settings.PROFILING_REQUEST_TOKEN.encode()
+        ):
+            return None
+        sampler = StackSampler(interval=settings.PROFILING_REQUEST_INTERVAL_MS / 1000)
+        try:
+            sampler.start()
+        except ProfilerBusy:
+            logger.info("Skipping request profile; another profile is running")
+            return None
+        state["profile"] = (uuid4().hex, sampler)
+        return None
+
+    def on_response(
+        self, scope: Scope, state: dict[str, Any], headers: MutableHeaders, status_code: int
+    ) -> None:
+        if "profile" in state:
+            headers["X-Profile-Id"] = state["profile"][0]
+
+    def on_complete(self, scope: Scope, state: dict[str, Any], status_code: int) -> None:
+        profile = state.get("profile")
+        if profile is None:
+            return
+        profile_id, sampler = profile
+        sampler.stop()
+        _remember_profile(profile_id, sampler.collapsed())
+
+
+def add_request_profiling(app) -> RequestProfilingStage:
+    """Register per-request profiling on the app's request pipeline."""
+    return add_pipeline_stage(app, RequestProfilingStage())
+
+
+__all__ = [
+    "ProfilerBusy",
+    "RequestProfilingStage",
+    "StackSampler",
+    "add_request_profiling",
+    "get_request_profile",
+]
@@ -0,0 +1,177 @@
+"""
+Token-bucket storage for the request rate limiter.
+
+Each client gets a bucket of ``RATE_LIMIT_REQUESTS`` tokens that refills over
+``RATE_LIMIT_WINDOW_SECONDS``; expensive routes take more than one token.
+With Redis configured the buckets live server-side and one Lua script call
+refills and takes tokens atomically, so limits hold across workers. Otherwise
+buckets are kept in process in an LRU that drops idle (i.e. full) buckets.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = bucket key; ARGV = capacity, refill rate (tokens/s), cost.
+# Uses the Redis clock so every worker agrees on elapsed time.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class BucketResult:
+    allowed: bool
+    remaining: int
+    reset_in: float  # Seconds until full (allowed) or until the request would fit (denied)
+
+
+def take_tokens(
+    tokens: float, elapsed: float, capacity: float, rate: float, cost: float
+) -> tuple[bool, float]:
+    """Refill a bucket for ``elapsed`` seconds and try to take ``cost`` tokens."""
+    tokens = min(capacity, tokens + max(0.0, elapsed) * rate)
+    if tokens >= cost:
+        return True, tokens - cost
+    return False, tokens
+
+
+def bucket_result(
+    allowed: bool, tokens: float, capacity: float, rate: float, cost: float
+) -> BucketResult:
+    if allowed:
+        reset_in = (capacity - tokens) / rate if tokens < capacity else 0.0
+        return BucketResult(True, int(tokens), reset_in)
+    return BucketResult(False, 0, (cost - tokens) / rate)
+
+
+class LocalBucketStore:
+    """
+    In-process buckets ordered by last use.
+
+    A bucket idle for a full refill period is indistinguishable from a new one,
+    so those are dropped from the cold end on every call; ``max_buckets`` caps
+    memory when many clients are active at once.
+    """
+
+    def __init__(self, max_buckets: int = 10_000):
+        self.max_buckets = max(1, max_buckets)
+        # key -> [tokens, last_seen, refill_seconds]
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def consume(
+        self,
+        key: str,
+        capacity: float,
+        rate: float,
+        cost: float = 1.0,
+        now: float | None = None,
+    ) -> BucketResult:
+        now = time.monotonic() if now is None else now
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            allowed, tokens = take_tokens(capacity, 0.0, capacity, rate, cost)
+            buckets[key] = [tokens, now, capacity / rate]
+        else:
+            allowed, tokens = take_tokens(bucket[0], now - bucket[1], capacity, rate, cost)
+            bucket[0], bucket[1] = tokens, now
+            buckets.move_to_end(key)
+        self._prune(now)
+        return bucket_result(allowed, tokens, capacity, rate, cost)
+
+    def _prune(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            _, oldest = next(iter(buckets.items()))
+            if len(buckets) <= self.max_buckets and now - oldest[1] < oldest[2]:
+                break
+            buckets.popitem(last=False)
+            self.evictions += 1
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker, updated with one script call per request."""
+
+    def __init__(self, client: Any, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    async def consume(
+        self, key: str, capacity: float, rate: float, cost: float = 1.0
+    ) -> BucketResult:
+        allowed, tokens = await self._script(keys=[self.prefix + key], args=[capacity, rate, cost])
+        return bucket_result(bool(int(allowed)), float(tokens), capacity, rate, cost)
+
+
+def parse_route_costs(raw: str | None) -> list[tuple[str, int]]:
+    """Parse ``"/concierge=5,/directions=3"`` into prefixes, longest first."""
+    costs: list[tuple[str, int]] = []
+    for chunk in (raw or "").split(","):
+        prefix, sep, value = chunk.partition("=")
+        prefix = prefix.strip()
+        if not sep or not prefix.startswith("/"):
+            continue
+        try:
+            cost = int(value)
+        except ValueError:
+            logger.warning("Ignoring malformed rate limit route cost %r", chunk)
+            continue
+        if cost > 0:
+            costs.append((prefix.rstrip("/") or "/", cost))
+    return sorted(costs, key=lambda item: len(item[0]), reverse=True)
+
+
+def route_cost(path: str, costs: list[tuple[str, int]]) -> int:
+    """Tokens a request to ``path`` takes; versioned paths share their class."""
+    if path.startswith("/v1/"):
+        path = path[3:]
+    for prefix, cost in costs:
+        if path == prefix or path.startswith(prefix + "/"):
+            return cost
+    return 1
+
+
+__all__ = [
+    "BucketResult",
+    "LocalBucketStore",
+    "RedisBucketStore",
+    "TOKEN_BUCKET_LUA",
+    "parse_route_costs",
+    "route_cost",
+    "take_tokens",
+]
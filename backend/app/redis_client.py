@@ -9,8 +9,9 @@ from .settings import settings
 
 logger = logging.getLogger(__name__)
 
-# Global Redis client (None if Redis is not enabled/available)
+# Global Redis clients (None if Redis is not enabled/available)
 _redis_client: Any | None = None
+_async_redis_client: Any | None = None
 
 
 def get_redis_client() -> Any | None:
@@ -40,7 +41,7 @@ def get_redis_client() -> Any | None:
 
         # Test connection
         _redis_client.ping()
-        logger.info("Redis client initialized", url=settings.REDIS_URL)
+        logger.info("Redis client initialized: %s", settings.REDIS_URL)
         return _redis_client
 
     except ImportError:
@@ -48,12 +49,37 @@ def get_redis_client() -> Any | None:
         return None
     except Exception as exc:
         logger.warning(
-            "Failed to connect to Redis. Circuit breaker state will not persist.",
-            error=str(exc),
+            "Failed to connect to Redis. Circuit breaker state will not persist: %s", exc
         )
         return None
 
 
+def get_async_redis_client() -> Any | None:
+    """
+    Get the asyncio Redis client used on the request path.
+
+    The connection is opened lazily; callers handle connection errors.
+    """
+    global _async_redis_client
+
+    if not settings.REDIS_ENABLED or not settings.REDIS_URL:
+        return None
+
+    if _async_redis_client is None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            logger.warning("Redis library not installed. Rate limits will be per worker.")
+            return None
+        _async_redis_client = redis_asyncio.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+    return _async_redis_client
+
+
 def is_redis_available() -> bool:
     """Check if Redis is available and connected."""
     client = get_redis_client()
@@ -67,4 +93,4 @@ def is_redis_available() -> bool:
         return False
 
 
-__all__ = ["get_redis_client", "is_redis_available"]
+__all__ = ["get_async_redis_client", "get_redis_client", "is_redis_available"]
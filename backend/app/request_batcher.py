@@ -151,7 +151,7 @@ class RequestBatcher:
         cached_result = self._get_cached(cache_key)
         if cached_result is not None:
             self.stats.cache_hits += 1
-            logger.debug("Cache hit for query: %s", query)
+            logger.debug("Cache hit for query: %s", query, extra={"sample_key": "cache.hit"})
             return cached_result
 
         # Cancel obsolete requests for same session
@@ -165,7 +165,7 @@ class RequestBatcher:
             query=query,
             params={"type": query_type, **params},
             timestamp=time.time(),
-            future=asyncio.create_future(),
+            future=asyncio.get_running_loop().create_future(),
         )
 
         # Add to queue
@@ -278,7 +278,10 @@ class RequestBatcher:
                         request.future.set_result(None)
 
                 logger.info(
-                    "Batch processed: %d requests -> 1 API call (%.1fms)", len(requests), latency_ms
+                    "Batch processed: %d requests -> 1 API call (%.1fms)",
+                    len(requests),
+                    latency_ms,
+                    extra={"sample_key": "batch.processed"},
                 )
 
             except Exception as exc:
@@ -348,13 +351,8 @@ class RequestBatcher:
         logger.info("Request batcher cache cleared")
 
 
-# Global batcher instance
-_autocomplete_batcher = RequestBatcher(
-    batch_window_ms=150,  # 150ms window
-    max_batch_size=10,
-    cache_ttl_seconds=300,  # 5 minutes
-    enabled=True,
-)
+# Global batcher instance, created on first use
+_autocomplete_batcher: RequestBatcher | None = None
 
 
 async def batch_search_processor(requests: list[BatchRequest]) -> dict[str, Any]:
@@ -399,12 +397,18 @@ async def batch_search_processor(requests: list[BatchRequest]) -> dict[str, Any]
     return results
 
 
-# Register the search processor
-_autocomplete_batcher.register_processor("search", batch_search_processor)
-
-
 def get_autocomplete_batcher() -> RequestBatcher:
     """Get the global autocomplete batcher instance."""
+    global _autocomplete_batcher
+    if _autocomplete_batcher is None:
+        batcher = RequestBatcher(
+            batch_window_ms=150,  # 150ms window
+            max_batch_size=10,
+            cache_ttl_seconds=300,  # 5 minutes
+            enabled=True,
+        )
+        batcher.register_processor("search", batch_search_processor)
+        _autocomplete_batcher = batcher
     return _autocomplete_batcher
 
 
@@ -2,19 +2,32 @@
 Multi-stop route optimization using TSP algorithms.
 
 This module implements route optimization for visiting multiple locations
-efficiently using various algorithms including nearest neighbor and 2-opt.
+efficiently using various algorithms including Held-Karp, nearest neighbor
+and 2-opt.
 """
 
-import itertools
 import logging
 import math
-from dataclasses import dataclass
-from typing import Any
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Protocol
+from zoneinfo import ZoneInfo
 
+import numpy as np
+
+from . import tsp_solvers
 from .gomap import route_directions_by_type
+from .settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Route types whose A->B leg can be reused for B->A (no one-way streets on foot)
+SYMMETRIC_ROUTE_TYPES = {"pedestrian"}
+ITINERARY_TIMEZONE = "Asia/Baku"
+
 
 @dataclass
 class Location:
@@ -27,6 +40,7 @@ class Location:
     visit_duration_minutes: int = 30
     priority: int = 1  # Higher priority = visit earlier
     time_window: tuple[int, int] | None = None  # (open_hour, close_hour)
+    reservation_minute: int | None = None  # Booked table time, minutes after midnight
 
 
 @dataclass
@@ -42,26 +56,137 @@ class OptimizedRoute:
     optimization_method: str
     savings_km: float  # Distance saved vs naive order
     savings_percentage: float
+    solve_time_ms: float = 0.0
+    budget_exhausted: bool = False  # Solver stopped early and returned its best tour so far
+    schedule: list[dict[str, Any]] = field(default_factory=list)  # Per-stop timing (time windows)
+
+
+@dataclass
+class MatrixBuildStats:
+    """Timing and provenance of the last distance matrix build."""
+
+    cells_total: int = 0
+    cells_cached: int = 0
+    cells_fetched: int = 0
+    cells_mirrored: int = 0
+    cells_fallback: int = 0
+    deadline_hit: bool = False
+    provider: str = "gomap"
+    duration_ms: float = 0.0
+    cell_latencies_ms: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        latencies = sorted(self.cell_latencies_ms)
+        return {
+            "cells_total": self.cells_total,
+            "cells_cached": self.cells_cached,
+            "cells_fetched": self.cells_fetched,
+            "cells_mirrored": self.cells_mirrored,
+            "cells_fallback": self.cells_fallback,
+            "deadline_hit": self.deadline_hit,
+            "provider": self.provider,
+            "duration_ms": round(self.duration_ms, 1),
+            "max_cell_ms": round(latencies[-1], 1) if latencies else 0.0,
+        }
+
+
+class DistanceMatrixProvider(Protocol):
+    """
+    Fills a whole distance/duration matrix in one call (OSRM-style table service).
+
+    Returns ``(distances_km, durations_minutes)`` as square lists indexed like
+    ``locations``; individual cells may be ``None`` to request a per-cell
+    fallback. Returning ``None`` means the provider could not answer at all.
+    """
+
+    name: str
+
+    def matrix(
+        self, locations: list[Location], route_type: str
+    ) -> tuple[list[list[float | None]], list[list[int | None]]] | None: ...
+
+
+class HaversineMatrixProvider:
+    """Local stand-in for a table service using straight-line distances."""
+
+    name = "haversine"
+
+    def __init__(self, speed_kmh: float | None = None):
+        self.speed_kmh = speed_kmh or settings.FALLBACK_CITY_SPEED_KMH
+
+    def matrix(
+        self, locations: list[Location], route_type: str
+    ) -> tuple[list[list[float | None]], list[list[int | None]]]:
+        size = len(locations)
+        distances: list[list[float | None]] = [[0.0] * size for _ in range(size)]
+        durations: list[list[int | None]] = [[0] * size for _ in range(size)]
+        for i, a in enumerate(locations):
+            for j in range(i + 1, size):
+                b = locations[j]
+                km = _haversine_km(a.latitude, a.longitude, b.latitude, b.longitude)
+                minutes = int(round(km / self.speed_kmh * 60)) if self.speed_kmh > 0 else 0
+                distances[i][j] = distances[j][i] = km
+                durations[i][j] = durations[j][i] = minutes
+        return distances, durations
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate straight-line distance in km."""
+    R = 6371  # Earth radius in km
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    )
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
 
 
 class MultiStopOptimizer:
     """
     Optimize routes for visiting multiple locations.
 
-    Algorithms:
+    Algorithms (see ``tsp_solvers``):
+    - Held-Karp: Exact dynamic program for up to 13 stops
     - Nearest Neighbor: Fast greedy approach
-    - 2-Opt: Local optimization improvement
-    - Genetic Algorithm: For larger problems
+    - 2-Opt: Vectorized 2-opt / Or-opt local search
+    - Genetic Algorithm: Population search, available on request
+    - Time Windows: Earliest-finish itinerary honouring opening hours and reservations
     """
 
-    def __init__(self, route_type: str = "fastest"):
+    def __init__(
+        self,
+        route_type: str = "fastest",
+        *,
+        matrix_provider: DistanceMatrixProvider | None = None,
+        max_workers: int | None = None,
+        matrix_deadline_seconds: float | None = None,
+        symmetric: bool | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ):
         """
         Initialize route optimizer.
 
         Args:
             route_type: Type of routing (fastest, shortest, pedestrian)
+            matrix_provider: Optional table service that fills the whole matrix at once
+            max_workers: Concurrent per-pair routing calls while building the matrix
+            matrix_deadline_seconds: Cells still pending after this fall back to haversine
+            symmetric: Reuse A->B legs for B->A (defaults to True for pedestrian routes)
+            on_progress: Called with (cells_done, cells_total) while the matrix builds
         """
         self.route_type = route_type
+        self.matrix_provider = matrix_provider
+        self.max_workers = max(1, max_workers or settings.ROUTE_MATRIX_MAX_WORKERS)
+        self.matrix_deadline_seconds = (
+            matrix_deadline_seconds
+            if matrix_deadline_seconds is not None
+            else settings.ROUTE_MATRIX_DEADLINE_SECONDS
+        )
+        self.symmetric = route_type in SYMMETRIC_ROUTE_TYPES if symmetric is None else symmetric
+        self.on_progress = on_progress
+        self.last_matrix_stats = MatrixBuildStats()
         self._distance_cache: dict[tuple[str, str], float] = {}
         self._duration_cache: dict[tuple[str, str], int] = {}
 
@@ -72,6 +197,8 @@ class MultiStopOptimizer:
         end: Location | None = None,
         algorithm: str = "auto",
         return_to_start: bool = False,
+        time_budget_ms: int | None = None,
+        departure_minute: int | None = None,
     ) -> OptimizedRoute:
         """
         Optimize a multi-stop route.
@@ -80,23 +207,31 @@ class MultiStopOptimizer:
             start: Starting location
             destinations: Locations to visit
             end: Ending location (if different from start)
-            algorithm: Optimization algorithm (auto, nearest, 2opt, genetic)
+            algorithm: Optimization algorithm (auto, held_karp, brute_force, nearest, 2opt,
+                genetic, time_windows)
             return_to_start: Whether to return to start at end
+            time_budget_ms: Solver budget; the best tour found so far is returned when it
+                runs out (defaults to ROUTE_OPTIMIZER_TIME_BUDGET_MS, 0 disables)
+            departure_minute: Departure from start in minutes after midnight (time_windows
+                only, defaults to now in Baku)
 
         Returns:
             Optimized route with visit order
+
+        Raises:
+            ValueError: No destinations, or no order satisfies every time window
         """
         if not destinations:
             raise ValueError("At least one destination required")
 
         # Choose algorithm based on problem size
         if algorithm == "auto":
-            if len(destinations) <= 5:
-                algorithm = "brute_force"  # Exact solution for small problems
-            elif len(destinations) <= 15:
-                algorithm = "2opt"
+            if any(loc.time_window or loc.reservation_minute is not None for loc in destinations):
+                algorithm = "time_windows"
+            elif len(destinations) <= tsp_solvers.HELD_KARP_MAX_STOPS:
+                algorithm = "held_karp"  # Exact solution for small problems
             else:
-                algorithm = "genetic"
+                algorithm = "2opt"
 
         # Build distance matrix
         all_locations = [start] + destinations
@@ -105,217 +240,354 @@ class MultiStopOptimizer:
 
         self._build_distance_matrix(all_locations)
 
+        if time_budget_ms is None:
+            time_budget_ms = settings.ROUTE_OPTIMIZER_TIME_BUDGET_MS
+        deadline = tsp_solvers.Deadline(time_budget_ms / 1000 if time_budget_ms else None)
+        matrix = self._cost_matrix(start, destinations, end, return_to_start)
+        solve_started = time.perf_counter()
+
         # Optimize based on algorithm
-        if algorithm == "brute_force" and len(destinations) <= 8:
-            result = self._optimize_brute_force(start, destinations, end, return_to_start)
-        elif algorithm == "nearest":
-            result = self._optimize_nearest_neighbor(start, destinations, end, return_to_start)
-        elif algorithm == "2opt":
-            result = self._optimize_2opt(start, destinations, end, return_to_start)
+        if algorithm == "time_windows":
+            return self._optimize_time_windows(
+                start, destinations, end, return_to_start, deadline, departure_minute
+            )
+        if algorithm == "held_karp" and len(destinations) <= tsp_solvers.HELD_KARP_MAX_STOPS:
+            solved, method = tsp_solvers.held_karp(matrix, deadline), "held_karp"
+            if solved is None:
+                # Budget ran out mid-table: best effort from the heuristic instead
+                solved = tsp_solvers.nearest_neighbor(matrix)
+                solved.exhausted = True
+                method = "nearest_neighbor"
+        elif algorithm == "brute_force" and len(destinations) <= tsp_solvers.BRUTE_FORCE_MAX_STOPS:
+            solved, method = tsp_solvers.brute_force(matrix, deadline), "brute_force"
+        elif algorithm in ("2opt", "held_karp"):
+            initial = tsp_solvers.nearest_neighbor(matrix)
+            solved, method = tsp_solvers.local_search(matrix, initial.order, deadline), "2opt"
         elif algorithm == "genetic":
-            result = self._optimize_genetic(start, destinations, end, return_to_start)
+            solved, method = tsp_solvers.genetic(matrix, deadline=deadline), "genetic"
         else:
             # Default to nearest neighbor
-            result = self._optimize_nearest_neighbor(start, destinations, end, return_to_start)
-
-        # Calculate savings
-        naive_distance = self._calculate_naive_distance(start, destinations, end, return_to_start)
-        result.savings_km = naive_distance - result.total_distance_km
-        result.savings_percentage = (
-            (result.savings_km / naive_distance * 100) if naive_distance > 0 else 0
-        )
+            solved, method = tsp_solvers.nearest_neighbor(matrix), "nearest_neighbor"
 
+        ordered = [destinations[idx - 1] for idx in solved.order]
+        result = self._build_route_result(start, ordered, end, return_to_start, method)
+        result.solve_time_ms = (time.perf_counter() - solve_started) * 1000
+        result.budget_exhausted = solved.exhausted
+        self._apply_savings(result, start, destinations, end, return_to_start)
         return result
 
-    def _build_distance_matrix(self, locations: list[Location]) -> None:
-        """Build distance matrix between all locations."""
-        for i, loc1 in enumerate(locations):
-            for j, loc2 in enumerate(locations):
-                if i != j:
-                    key = (loc1.id, loc2.id)
-                    if key not in self._distance_cache:
-                        # Get route from GoMap
-                        try:
-                            route = route_directions_by_type(
-                                loc1.latitude,
-                                loc1.longitude,
-                                loc2.latitude,
-                                loc2.longitude,
-                                route_type=self.route_type,
-                            )
-                            if route:
-                                self._distance_cache[key] = route.distance_km or 0
-                                self._duration_cache[key] = (
-                                    round(route.duration_seconds / 60)
-                                    if route.duration_seconds
-                                    else 0
-                                )
-                            else:
-                                # Fallback to straight-line distance
-                                distance = self._haversine_distance(
-                                    loc1.latitude, loc1.longitude, loc2.latitude, loc2.longitude
-                                )
-                                self._distance_cache[key] = distance
-                                self._duration_cache[key] = int(distance * 2)  # Rough estimate
-                        except Exception as exc:
-                            logger.warning("Failed to get route: %s", exc)
-                            # Fallback to straight-line distance
-                            distance = self._haversine_distance(
-                                loc1.latitude, loc1.longitude, loc2.latitude, loc2.longitude
-                            )
-                            self._distance_cache[key] = distance
-                            self._duration_cache[key] = int(distance * 2)
-
-    def _optimize_brute_force(
+    def _optimize_time_windows(
         self,
         start: Location,
         destinations: list[Location],
         end: Location | None,
         return_to_start: bool,
+        deadline: tsp_solvers.Deadline,
+        departure_minute: int | None,
     ) -> OptimizedRoute:
-        """Find optimal route using brute force (exact solution)."""
-        best_order = None
-        best_distance = float("inf")
+        """Earliest-finish order that reaches every stop inside its window."""
+        if departure_minute is None:
+            now = datetime.now(ZoneInfo(ITINERARY_TIMEZONE))
+            departure_minute = now.hour * 60 + now.minute
+
+        solve_started = time.perf_counter()
+        durations = self._cost_matrix(
+            start, destinations, end, return_to_start, lookup=self._get_duration
+        )
+        nodes = [start, *destinations]
+        windows = [(0.0, math.inf)] + [self._arrival_window(loc) for loc in destinations]
+        windows.append((0.0, math.inf))  # terminal
+        earliest = np.array([w[0] for w in windows])
+        latest = np.array([w[1] for w in windows])
+        service = np.array([0.0] + [loc.visit_duration_minutes for loc in destinations] + [0.0])
+
+        solved = tsp_solvers.time_windows(
+            durations, service, earliest, latest, departure_minute, deadline
+        )
+        if solved is None:
+            raise ValueError("No visit order satisfies every stop's time window")
 
-        # Try all permutations
-        for perm in itertools.permutations(destinations):
-            distance = self._calculate_route_distance(start, list(perm), end, return_to_start)
-            if distance < best_distance:
-                best_distance = distance
-                best_order = list(perm)
+        ordered = [destinations[idx - 1] for idx in solved.order]
+        result = self._build_route_result(start, ordered, end, return_to_start, "time_windows")
+        result.solve_time_ms = (time.perf_counter() - solve_started) * 1000
+        result.budget_exhausted = solved.exhausted
 
-        return self._build_route_result(start, best_order, end, return_to_start, "brute_force")
+        arrivals, waits = tsp_solvers.time_window_schedule(
+            durations, service, earliest, solved.order, departure_minute
+        )
+        path = [0, *solved.order]
+        # Forward slack: how late a stop can run before this or any later window breaks
+        forward_slack = math.inf
+        slacks: list[float] = [math.inf] * len(path)
+        for pos in range(len(path) - 1, 0, -1):
+            own = latest[path[pos]] - arrivals[pos]
+            later_wait = waits[pos + 1] if pos + 1 < len(path) else 0.0
+            forward_slack = min(own, forward_slack + later_wait)
+            slacks[pos] = forward_slack
+
+        schedule = []
+        for pos in range(1, len(path)):
+            loc = nodes[path[pos]]
+            window_end = latest[path[pos]]
+            schedule.append(
+                {
+                    "location_id": loc.id,
+                    "name": loc.name,
+                    "arrival_minute": int(arrivals[pos]),
+                    "wait_minutes": int(waits[pos]),
+                    "departure_minute": int(arrivals[pos] + loc.visit_duration_minutes),
+                    "latest_arrival_minute": None if math.isinf(window_end) else int(window_end),
+                    "slack_minutes": (
+                        None if math.isinf(window_end) else int(window_end - arrivals[pos])
+                    ),
+                    "forward_slack_minutes": (
+                        None if math.isinf(slacks[pos]) else int(slacks[pos])
+                    ),
+                }
+            )
+        result.schedule = schedule
+        total_wait = int(waits[1:].sum())
+        result.total_duration_minutes += total_wait
+        self._apply_savings(result, start, destinations, end, return_to_start)
+        return result
 
-    def _optimize_nearest_neighbor(
+    def _arrival_window(self, loc: Location) -> tuple[float, float]:
+        """
+        Allowed arrival minutes for a stop.
+
+        Opening hours require the whole visit to fit before closing (a close hour
+        at or before the open hour means past midnight). A reservation narrows
+        the window to its start plus ROUTE_RESERVATION_GRACE_MINUTES.
+        """
+        earliest, latest = 0.0, math.inf
+        if loc.time_window:
+            open_hour, close_hour = loc.time_window
+            if close_hour <= open_hour:
+                close_hour += 24
+            earliest = open_hour * 60.0
+            latest = close_hour * 60.0 - loc.visit_duration_minutes
+        if loc.reservation_minute is not None:
+            earliest = max(earliest, float(loc.reservation_minute))
+            latest = min(latest, loc.reservation_minute + settings.ROUTE_RESERVATION_GRACE_MINUTES)
+        return earliest, latest
+
+    def _apply_savings(
         self,
+        result: OptimizedRoute,
         start: Location,
         destinations: list[Location],
         end: Location | None,
         return_to_start: bool,
-    ) -> OptimizedRoute:
-        """Optimize using nearest neighbor heuristic."""
-        unvisited = destinations.copy()
-        route = []
-        current = start
-
-        # Build route greedily
-        while unvisited:
-            # Find nearest unvisited location
-            nearest = min(unvisited, key=lambda loc: self._get_distance(current.id, loc.id))
-            route.append(nearest)
-            unvisited.remove(nearest)
-            current = nearest
-
-        return self._build_route_result(start, route, end, return_to_start, "nearest_neighbor")
+    ) -> None:
+        """Calculate savings against the naive (given) order."""
+        naive_distance = self._calculate_naive_distance(start, destinations, end, return_to_start)
+        result.savings_km = naive_distance - result.total_distance_km
+        result.savings_percentage = (
+            (result.savings_km / naive_distance * 100) if naive_distance > 0 else 0
+        )
 
-    def _optimize_2opt(
+    def _cost_matrix(
         self,
         start: Location,
         destinations: list[Location],
         end: Location | None,
         return_to_start: bool,
-    ) -> OptimizedRoute:
-        """Optimize using 2-opt local search."""
-        # Start with nearest neighbor solution
-        initial = self._optimize_nearest_neighbor(start, destinations, end, return_to_start)
-
-        route = initial.locations[1:-1] if end else initial.locations[1:]
-        improved = True
-
-        while improved:
-            improved = False
-            for i in range(len(route) - 1):
-                for j in range(i + 2, len(route)):
-                    # Try swapping edges
-                    new_route = route[: i + 1] + route[i + 1 : j + 1][::-1] + route[j + 1 :]
-
-                    old_distance = self._calculate_route_distance(
-                        start, route, end, return_to_start
-                    )
-                    new_distance = self._calculate_route_distance(
-                        start, new_route, end, return_to_start
-                    )
-
-                    if new_distance < old_distance:
-                        route = new_route
-                        improved = True
-                        break
-                if improved:
-                    break
+        lookup: Callable[[str, str], float] | None = None,
+    ) -> np.ndarray:
+        """
+        Integer-indexed distance matrix in the layout expected by ``tsp_solvers``.
+
+        Row/column 0 is the start, 1..n the destinations and n + 1 the terminal:
+        the start again, the fixed end, or a zero-cost sink for open routes.
+        Pass ``lookup=self._get_duration`` for travel minutes instead of km.
+        """
+        lookup = lookup or self._get_distance
+        nodes = [start, *destinations]
+        size = len(nodes)
+        matrix = np.zeros((size + 1, size + 1))
+        for i, loc1 in enumerate(nodes):
+            for j, loc2 in enumerate(nodes):
+                if i != j:
+                    matrix[i, j] = lookup(loc1.id, loc2.id)
+        terminal = start if return_to_start else end
+        if terminal is not None:
+            for i, loc in enumerate(nodes):
+                matrix[i, size] = lookup(loc.id, terminal.id)
+        return matrix
+
+    def _build_distance_matrix(self, locations: list[Location]) -> None:
+        """
+        Build distance matrix between all locations.
+
+        A configured matrix provider is tried first; remaining cells are routed
+        concurrently on a bounded pool and fall back to straight-line estimates
+        on failure or once the deadline passes.
+        """
+        started = time.perf_counter()
+        stats = MatrixBuildStats(provider="gomap")
+        self.last_matrix_stats = stats
+
+        pending: list[tuple[Location, Location]] = []
+        for i, loc1 in enumerate(locations):
+            for j, loc2 in enumerate(locations):
+                if i == j:
+                    continue
+                stats.cells_total += 1
+                if (loc1.id, loc2.id) in self._distance_cache:
+                    stats.cells_cached += 1
+                else:
+                    pending.append((loc1, loc2))
+
+        if pending and self.matrix_provider is not None:
+            pending = self._fill_from_provider(locations, pending, stats)
+
+        # Only route one direction of each pair when legs are interchangeable
+        to_fetch: list[tuple[Location, Location]] = []
+        mirrored: list[tuple[Location, Location]] = []
+        seen: set[frozenset[str]] = set()
+        for loc1, loc2 in pending:
+            pair = frozenset((loc1.id, loc2.id))
+            if self.symmetric and pair in seen:
+                mirrored.append((loc1, loc2))
+                continue
+            seen.add(pair)
+            to_fetch.append((loc1, loc2))
+
+        done = stats.cells_cached + (stats.cells_total - stats.cells_cached - len(pending))
+        self._report_progress(done, stats.cells_total)
+        if to_fetch:
+            self._fetch_cells(to_fetch, stats, done)
+
+        for loc1, loc2 in mirrored:
+            reverse = (loc2.id, loc1.id)
+            if reverse in self._distance_cache:
+                self._distance_cache[(loc1.id, loc2.id)] = self._distance_cache[reverse]
+                self._duration_cache[(loc1.id, loc2.id)] = self._duration_cache.get(reverse, 0)
+                stats.cells_mirrored += 1
+            else:
+                self._store_fallback(loc1, loc2)
+                stats.cells_fallback += 1
+        self._report_progress(stats.cells_total, stats.cells_total)
 
-        return self._build_route_result(start, route, end, return_to_start, "2opt")
+        stats.duration_ms = (time.perf_counter() - started) * 1000
+        logger.debug("Distance matrix built: %s", stats.as_dict())
 
-    def _optimize_genetic(
+    def _fill_from_provider(
         self,
-        start: Location,
-        destinations: list[Location],
-        end: Location | None,
-        return_to_start: bool,
-        population_size: int = 50,
-        generations: int = 100,
-    ) -> OptimizedRoute:
-        """Optimize using genetic algorithm for large problems."""
-        import random
-
-        def create_individual():
-            """Create random route."""
-            return random.sample(destinations, len(destinations))
-
-        def fitness(individual):
-            """Calculate fitness (negative distance)."""
-            distance = self._calculate_route_distance(start, individual, end, return_to_start)
-            return -distance  # Minimize distance
-
-        def crossover(parent1, parent2):
-            """Order crossover (OX)."""
-            size = len(parent1)
-            start_idx = random.randint(0, size - 2)
-            end_idx = random.randint(start_idx + 1, size)
-
-            child = [-1] * size
-            child[start_idx:end_idx] = parent1[start_idx:end_idx]
-
-            pointer = end_idx
-            for loc in parent2[end_idx:] + parent2[:end_idx]:
-                if loc not in child:
-                    child[pointer % size] = loc
-                    pointer += 1
-
-            return child
-
-        def mutate(individual, rate=0.01):
-            """Swap mutation."""
-            if random.random() < rate:
-                i, j = random.sample(range(len(individual)), 2)
-                individual[i], individual[j] = individual[j], individual[i]
-            return individual
-
-        # Initialize population
-        population = [create_individual() for _ in range(population_size)]
-
-        # Evolve
-        for _generation in range(generations):
-            # Evaluate fitness
-            fitness_scores = [(fitness(ind), ind) for ind in population]
-            fitness_scores.sort(reverse=True)
-
-            # Select best individuals
-            elite_size = population_size // 4
-            new_population = [ind for _, ind in fitness_scores[:elite_size]]
-
-            # Crossover and mutation
-            while len(new_population) < population_size:
-                parent1 = fitness_scores[random.randint(0, elite_size - 1)][1]
-                parent2 = fitness_scores[random.randint(0, elite_size - 1)][1]
-                child = crossover(parent1, parent2)
-                child = mutate(child, rate=0.1)
-                new_population.append(child)
-
-            population = new_population
-
-        # Return best solution
-        best = max(population, key=fitness)
-        return self._build_route_result(start, best, end, return_to_start, "genetic")
+        locations: list[Location],
+        pending: list[tuple[Location, Location]],
+        stats: MatrixBuildStats,
+    ) -> list[tuple[Location, Location]]:
+        """Fill cells from the matrix provider, returning those it left empty."""
+        provider = self.matrix_provider
+        try:
+            table = provider.matrix(locations, self.route_type)
+        except Exception as exc:
+            logger.warning("Matrix provider %s failed: %s", provider.name, exc)
+            table = None
+        if table is None:
+            return pending
+
+        distances, durations = table
+        index = {loc.id: idx for idx, loc in enumerate(locations)}
+        remaining: list[tuple[Location, Location]] = []
+        for loc1, loc2 in pending:
+            i, j = index[loc1.id], index[loc2.id]
+            distance = distances[i][j]
+            if distance is None:
+                remaining.append((loc1, loc2))
+                continue
+            duration = durations[i][j]
+            self._distance_cache[(loc1.id, loc2.id)] = float(distance)
+            self._duration_cache[(loc1.id, loc2.id)] = (
+                int(duration) if duration is not None else int(distance * 2)
+            )
+            stats.cells_fetched += 1
+        stats.provider = provider.name if not remaining else f"{provider.name}+gomap"
+        return remaining
+
+    def _fetch_cells(
+        self,
+        cells: list[tuple[Location, Location]],
+        stats: MatrixBuildStats,
+        done: int,
+    ) -> None:
+        """Route cells concurrently, falling back per cell on error or deadline."""
+        deadline = time.monotonic() + max(0.0, self.matrix_deadline_seconds)
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(cells)), thread_name_prefix="route-matrix"
+        )
+        futures: dict[Future, tuple[Location, Location]] = {
+            executor.submit(self._route_cell, loc1, loc2): (loc1, loc2) for loc1, loc2 in cells
+        }
+        outstanding = set(futures)
+        try:
+            while outstanding:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                finished, outstanding = wait(
+                    outstanding, timeout=remaining, return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    loc1, loc2 = futures[future]
+                    try:
+                        route, latency_ms = future.result()
+                    except Exception as exc:
+                        logger.warning("Failed to get route: %s", exc)
+                        route, latency_ms = None, 0.0
+                    if route:
+                        self._distance_cache[(loc1.id, loc2.id)] = route.distance_km or 0
+                        self._duration_cache[(loc1.id, loc2.id)] = (
+                            round(route.duration_seconds / 60) if route.duration_seconds else 0
+                        )
+                        stats.cells_fetched += 1
+                        stats.cell_latencies_ms.append(latency_ms)
+                    else:
+                        self._store_fallback(loc1, loc2)
+                        stats.cells_fallback += 1
+                    done += 1
+                    self._report_progress(done, stats.cells_total)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if outstanding:
+            stats.deadline_hit = True
+            logger.warning(
+                "Distance matrix deadline hit; %d cells use straight-line fallback",
+                len(outstanding),
+            )
+            for future in outstanding:
+                loc1, loc2 = futures[future]
+                self._store_fallback(loc1, loc2)
+                stats.cells_fallback += 1
+
+    def _route_cell(self, loc1: Location, loc2: Location) -> tuple[Any, float]:
+        started = time.perf_counter()
+        route = route_directions_by_type(
+            loc1.latitude,
+            loc1.longitude,
+            loc2.latitude,
+            loc2.longitude,
+            route_type=self.route_type,
+        )
+        return route, (time.perf_counter() - started) * 1000
+
+    def _store_fallback(self, loc1: Location, loc2: Location) -> None:
+        """Fallback to straight-line distance for a single cell."""
+        distance = self._haversine_distance(
+            loc1.latitude, loc1.longitude, loc2.latitude, loc2.longitude
+        )
+        self._distance_cache[(loc1.id, loc2.id)] = distance
+        self._duration_cache[(loc1.id, loc2.id)] = int(distance * 2)  # Rough estimate
+
+    def _report_progress(self, done: int, total: int) -> None:
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(done, total)
+        except Exception as exc:  # pragma: no cover - callback bugs must not break routing
+            logger.debug("Matrix progress callback failed: %s", exc)
 
     def _calculate_route_distance(
         self,
@@ -414,19 +686,14 @@ class MultiStopOptimizer:
 
     def _haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate straight-line distance in km."""
-        R = 6371  # Earth radius in km
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = (
-            math.sin(dlat / 2) ** 2
-            + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
-        )
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
+        return _haversine_km(lat1, lon1, lat2, lon2)
 
 
 __all__ = [
     "Location",
     "OptimizedRoute",
     "MultiStopOptimizer",
+    "MatrixBuildStats",
+    "DistanceMatrixProvider",
+    "HaversineMatrixProvider",
 ]
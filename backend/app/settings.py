@@ -21,6 +21,10 @@ class Settings(BaseSettings):
     # persistence directory (defaults to app/data)
     DATA_DIR: Path | None = None
 
+    # Load the restaurant catalog from restaurants.snapshot when it matches
+    # restaurants.json and the code; rewritten after compiling from JSON
+    CATALOG_SNAPSHOT_ENABLED: bool = True
+
     # CORS allow origins (comma-separated). Default empty (no cross-origin).
     CORS_ALLOW_ORIGINS: str = ""
 
@@ -43,11 +47,20 @@ class Settings(BaseSettings):
     AUTH0_DOMAIN: str | None = None
     AUTH0_AUDIENCE: str | None = None
     AUTH0_BYPASS: bool = False  # require explicit opt-in for bypass
+    AUTH0_JWKS_TTL_SECONDS: int = 900
+    AUTH0_JWKS_MAX_STALE_SECONDS: int = 86400  # serve old keys while refreshing in background
+    AUTH0_JWKS_MIN_REFRESH_SECONDS: int = 60  # throttle refetches for unknown key ids
+    AUTH0_CLAIMS_CACHE_SIZE: int = 2048
+    AUTH0_CLAIMS_CACHE_TTL_SECONDS: int = 300  # capped further by each token's exp
 
     # Rate limiting
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_REQUESTS: int = 300  # per window per client
     RATE_LIMIT_WINDOW_SECONDS: int = 60
+    # Tokens taken per request by path prefix ("/v1" is ignored); other routes cost 1
+    RATE_LIMIT_ROUTE_COSTS: str = "/concierge=5,/directions=3,/route=3"
+    RATE_LIMIT_MAX_LOCAL_BUCKETS: int = 10000  # per worker, when Redis is not configured
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = 5.0  # local fallback period after a Redis error
 
     # Trusted proxy configuration for X-Forwarded-For validation
     # Only trust X-Forwarded-For headers from these proxies (comma-separated IPs/CIDRs)
@@ -73,6 +86,26 @@ class Settings(BaseSettings):
     SENTRY_ENVIRONMENT: str = "development"
     SENTRY_RELEASE: str | None = None
     SENTRY_TRACES_SAMPLE_RATE: float = 0.2
+    # Per-stage timings (concierge, directions, availability) in a Server-Timing header.
+    # Stage histograms are always recorded; the header exposes internals, so it is opt-in.
+    SERVER_TIMING_ENABLED: bool = False
+    # On-demand stack sampling (/dev/profile); callers need a token with PROFILING_SCOPE
+    PROFILING_ENABLED: bool = False
+    PROFILING_SCOPE: str = "admin:profile"
+    PROFILING_MAX_SECONDS: float = 60.0
+    # Shared secret for the X-Profile request header; empty disables per-request traces
+    PROFILING_REQUEST_TOKEN: str | None = None
+    PROFILING_REQUEST_INTERVAL_MS: float = 1.0
+    # Health checks run concurrently, each bounded by the timeout. /health serves a
+    # snapshot refreshed in the background so probes never wait on upstreams.
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 3.0
+    HEALTH_REFRESH_INTERVAL_SECONDS: float = 15.0
+    HEALTH_SNAPSHOT_MAX_AGE_SECONDS: float = 30.0  # older snapshots are refreshed on read
+    # Logging: records queue up for a writer thread (dropped when the queue is full);
+    # events tagged with a sample_key are capped per key and window
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_LIMIT: int = 20
+    LOG_SAMPLE_WINDOW_SECONDS: float = 60.0
 
     # GoMap API Resilience & Performance Settings
     GOMAP_CIRCUIT_BREAKER_ENABLED: bool = True
@@ -82,10 +115,54 @@ class Settings(BaseSettings):
     GOMAP_RETRY_BACKOFF_SECONDS: float = 1.0
     GOMAP_CACHE_TTL_SECONDS: int = 900  # 15 minutes for route caching
     GOMAP_GEOCODE_CACHE_TTL_SECONDS: int = 1800  # 30 minutes for geocoding
+    # Route cache: origins snap to geohash cells (7 = ~150 m); a route from a
+    # neighbouring cell is reused with a correction when its origin is close enough
+    # and the new origin is not already past it along the route
+    ROUTE_CACHE_GEOHASH_PRECISION: int = 7
+    ROUTE_CACHE_NEIGHBOR_MAX_KM: float = 0.4
+
+    # Multi-stop route optimizer
+    ROUTE_MATRIX_MAX_WORKERS: int = 6  # Concurrent GoMap calls while building a distance matrix
+    ROUTE_MATRIX_DEADLINE_SECONDS: float = 8.0  # Cells still pending fall back to haversine
+    ROUTE_OPTIMIZER_TIME_BUDGET_MS: int = 2000  # Solver returns its best tour so far after this
+    ROUTE_RESERVATION_GRACE_MINUTES: int = 15  # How late a stop with a booked table may be reached
+
+    # One-to-many ETA matrix (/directions/matrix)
+    ETA_MATRIX_PROVIDER: Literal["osrm", "local"] = "osrm"  # "local" skips the network
+    ETA_MATRIX_MAX_DESTINATIONS: int = 100  # Nearest restaurants kept after haversine filtering
+
+    # Offline ETA model, used when routing providers are unavailable
+    ETA_MODEL_ENABLED: bool = True
+    ETA_MODEL_MIN_SAMPLES: int = 200  # Logged provider ETAs needed before a model is trained
+    ETA_MODEL_MAX_TRAINING_SAMPLES: int = 100_000  # Most recent samples used per training run
+    ETA_MODEL_LOG_BATCH_SIZE: int = 50
+    ETA_MODEL_RIDGE_ALPHA: float = 1.0
 
     # Traffic API Configuration
     GOMAP_TRAFFIC_ENABLED: bool = True
     GOMAP_TRAFFIC_UPDATE_INTERVAL_SECONDS: int = 300  # 5 minutes
+    # Traffic tile grid (decimal places, 2 = ~1.1 km). Also keys historical
+    # traffic patterns, so changing it starts those aggregates from scratch.
+    TRAFFIC_TILE_DECIMALS: int = 2
+
+    # Background traffic prefetch for restaurant cells
+    TRAFFIC_PREFETCH_ENABLED: bool = True
+    TRAFFIC_PREFETCH_REFRESH_FRACTION: float = 0.8  # Refresh cycle as a fraction of traffic TTL
+    TRAFFIC_PREFETCH_MIN_SPACING_SECONDS: float = 1.0  # Minimum gap between GoMap traffic calls
+    TRAFFIC_PREFETCH_HOT_CELLS: str = ""  # Extra origin cells, "lat,lon;lat,lon"
+
+    # Historical traffic pattern ingestion
+    TRAFFIC_HISTORY_ENABLED: bool = True  # Consult/feed traffic_patterns from the ETA pipeline
+    TRAFFIC_HISTORY_CONFIDENCE_THRESHOLD: float = 0.8  # Skip live traffic calls at or above
+    TRAFFIC_INGEST_BATCH_SIZE: int = 200  # Buffered observations per SQLite transaction
+    TRAFFIC_INGEST_FLUSH_INTERVAL_SECONDS: float = 5.0  # Timed flushes (0: only full batches)
+    TRAFFIC_PATTERN_WINDOW_SAMPLES: int = 100  # Effective sample window of running aggregates
+    TRAFFIC_PATTERN_REFRESH_SECONDS: float = 60.0  # Pick up patterns written by other workers
+    TRAFFIC_RAW_RETENTION_DAYS: int = 14  # Older raw observations are rolled up hourly
+    TRAFFIC_ROLLUP_RETENTION_DAYS: int = 365
+    TRAFFIC_PRUNE_BATCH_SIZE: int = 5000  # Rows rolled up and deleted per transaction
+    TRAFFIC_MAINTENANCE_INTERVAL_SECONDS: float = 21600.0  # Prune/ANALYZE cadence (0 disables)
+    TRAFFIC_VACUUM_FREE_RATIO: float = 0.2  # VACUUM once this share of pages is free
 
     # Fallback ETA Calculation Settings
     FALLBACK_CITY_SPEED_KMH: float = 28.0  # Realistic Baku city average speed
@@ -99,12 +176,18 @@ class Settings(BaseSettings):
     # Location Ping Throttling
     LOCATION_PING_MIN_DISTANCE_METERS: float = 100.0  # Minimum movement required
     LOCATION_PING_MIN_INTERVAL_SECONDS: int = 30  # Rate limiting per reservation
+    ARRIVAL_REROUTE_DEVIATION_METERS: float = 80.0  # Off-route distance that forces a new route
+    ARRIVAL_REROUTE_INTERVAL_SECONDS: int = 300  # Re-route at least this often for fresh traffic
+
+    # Autocomplete WebSocket
+    AUTOCOMPLETE_WS_DEBOUNCE_MS: int = 120  # Quiet period before the latest query goes upstream
+    AUTOCOMPLETE_WS_SEND_TIMEOUT_SECONDS: float = 5.0  # Close connections that stop reading
 
     # Arrival Intent Suggestions Configuration
     MAX_SUGGESTION_ROUTE_DETAILS: int = 3  # Number of suggestions to calculate detailed routes for
     MAX_SUGGESTION_DISTANCE_KM: float = 150.0  # Maximum distance for location suggestions
 
-    # Redis Configuration (Optional - for circuit breaker state persistence)
+    # Redis Configuration (Optional - circuit breaker state and shared rate limits)
     REDIS_URL: str | None = None  # e.g., "redis://localhost:6379/0"
     REDIS_ENABLED: bool = False
 
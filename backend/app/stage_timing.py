@@ -0,0 +1,100 @@
+"""
+Per-stage latency for hot endpoints.
+
+``stage_timer`` wraps one step of a request (e.g. the concierge embedding
+call) and records it in the ``request_stage_duration_seconds`` histogram.
+When ``SERVER_TIMING_ENABLED`` is set, the request pipeline also collects the
+stages of each request and returns them in a ``Server-Timing`` header, which
+browser dev tools and curl show without access to Prometheus.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import Scope
+
+from .metrics import request_stage_duration_seconds
+from .middleware import PipelineStage, add_pipeline_stage
+from .settings import settings
+
+# Stage timings of the current request, or None when no header will be sent.
+# The list is shared by reference, so stages run in worker threads
+# (asyncio.to_thread copies the context) still report into it.
+_request_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@lru_cache(maxsize=128)
+def _histogram(operation: str, stage: str):
+    return request_stage_duration_seconds.labels(operation=operation, stage=stage)
+
+
+@contextmanager
+def stage_timer(operation: str, stage: str) -> Iterator[None]:
+    """Time the enclosed block as ``stage`` of ``operation``, even if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _histogram(operation, stage).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((f"{operation}-{stage}", elapsed))
+
+
+def format_server_timing(timings: list[tuple[str, float]], total: float | None = None) -> str:
+    """Render timings as a Server-Timing value; repeated stages are summed."""
+    merged: dict[str, float] = {}
+    for name, elapsed in timings:
+        merged[name] = merged.get(name, 0.0) + elapsed
+    if total is not None:
+        merged["total"] = total
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in merged.items())
+
+
+class ServerTimingStage(PipelineStage):
+    """Collects stage timings per request and adds the ``Server-Timing`` header."""
+
+    async def on_request(self, scope: Scope, state: dict[str, Any]) -> None:
+        if settings.SERVER_TIMING_ENABLED:
+            timings: list[tuple[str, float]] = []
+            state["server_timing"] = (timings, _request_timings.set(timings), time.perf_counter())
+        return None
+
+    def on_response(
+        self, scope: Scope, state: dict[str, Any], headers: MutableHeaders, status_code: int
+    ) -> None:
+        collected = state.get("server_timing")
+        if collected is None:
+            return
+        timings, _token, started = collected
+        headers.append(
+            "Server-Timing", format_server_timing(timings, time.perf_counter() - started)
+        )
+
+    def on_complete(self, scope: Scope, state: dict[str, Any], status_code: int) -> None:
+        collected = state.get("server_timing")
+        if collected is not None:
+            _request_timings.reset(collected[1])
+
+
+def add_server_timing(app) -> ServerTimingStage:
+    """Register the Server-Timing stage on the app's request pipeline."""
+    return add_pipeline_stage(app, ServerTimingStage())
+
+
+__all__ = [
+    "ServerTimingStage",
+    "add_server_timing",
+    "format_server_timing",
+    "stage_timer",
+]
@@ -4,12 +4,13 @@ import json
 from datetime import datetime
 from pathlib import Path
 from shutil import copy2
-from threading import RLock
+from threading import Lock, RLock
 from typing import Any
 from uuid import uuid4
 
 from fastapi import HTTPException
 
+from .catalog import load_catalog
 from .contracts import ArrivalIntent, Reservation, ReservationCreate
 from .file_lock import FileLock
 from .settings import settings
@@ -60,10 +61,6 @@ def _bootstrap_file(filename: str, fallback: str | None = None) -> None:
         target.touch()
 
 
-_bootstrap_file("restaurants.json", "[]\n")
-_bootstrap_file("reservations.json", '{"reservations": []}\n')
-
-
 class Database:
     """
     Demo DB:
@@ -72,82 +69,16 @@ class Database:
     """
 
     def __init__(self) -> None:
-        seed_path = DATA_DIR / "restaurants.json"
-        try:
-            raw = seed_path.read_text(encoding="utf-8")
-        except FileNotFoundError:
-            seed_restaurants: list[dict[str, Any]] = []
-        else:
-            raw = raw.strip()
-            if not raw:
-                seed_restaurants = []
-            else:
-                try:
-                    seed_restaurants = json.loads(raw)
-                except json.JSONDecodeError as exc:
-                    raise RuntimeError(f"Invalid restaurant seed data: {seed_path}") from exc
-
-        normalised: list[dict[str, Any]] = []
-        for item in seed_restaurants:
-            if not isinstance(item, dict):
-                continue
-            entry = dict(item)
-            entry_id = entry.get("id") or uuid4()
-            entry["id"] = str(entry_id)
-            slug = entry.get("slug")
-            if slug:
-                entry["slug"] = str(slug)
-            elif entry.get("name"):
-                entry["slug"] = str(entry["name"]).lower().replace(" ", "-")
-            entry.setdefault("city", "Baku")
-            entry.setdefault("timezone", "Asia/Baku")
-            normalised.append(entry)
-
-        self.restaurants: dict[str, dict[str, Any]] = {r["id"]: r for r in normalised}
-        self._restaurants_by_slug: dict[str, dict[str, Any]] = {
-            str(r.get("slug")).lower(): r for r in normalised if r.get("slug")
-        }
-
-        self._restaurant_summaries: list[dict[str, Any]] = []
-        self._summary_index: list[tuple[dict[str, Any], str]] = []
-        self._tables_cache: dict[str, list[tuple[dict[str, Any], int]]] = {}
-        self._table_lookup_cache: dict[str, dict[str, dict[str, Any]]] = {}
-
-        for r in normalised:
-            rid = r["id"]
-            cover = r.get("cover_photo") or (r["photos"][0] if r.get("photos") else "")
-            summary = {
-                "id": rid,
-                "name": r["name"],
-                "slug": r.get("slug"),
-                "cuisine": r.get("cuisine", []),
-                "city": r.get("city"),
-                "timezone": r.get("timezone") or "Asia/Baku",
-                "cover_photo": cover,
-                "short_description": r.get("short_description"),
-                "price_level": r.get("price_level"),
-                "tags": r.get("tags", []),
-                "average_spend": r.get("average_spend"),
-            }
-            self._restaurant_summaries.append(summary)
-            search_text = " ".join(
-                [
-                    r.get("name", ""),
-                    r.get("city", ""),
-                    r.get("slug", ""),
-                    " ".join(r.get("cuisine", []) or []),
-                ]
-            ).lower()
-            self._summary_index.append((summary, search_text))
-
-            table_entries: list[tuple[dict[str, Any], int]] = []
-            for area in r.get("areas") or []:
-                for t in area.get("tables") or []:
-                    cap = int(t.get("capacity", 2) or 2)
-                    table_entries.append((t, cap))
-            table_entries.sort(key=lambda entry: entry[1])
-            self._tables_cache[rid] = table_entries
-            self._table_lookup_cache[rid] = {str(t.get("id")): t for t, _ in table_entries}
+        _bootstrap_file("restaurants.json", "[]\n")
+        _bootstrap_file("reservations.json", '{"reservations": []}\n')
+        # Parsed JSON plus derived indexes; read from restaurants.snapshot when current
+        self.catalog = load_catalog(DATA_DIR / "restaurants.json")
+        self.restaurants: dict[str, dict[str, Any]] = self.catalog.restaurants
+        self._restaurants_by_slug = self.catalog.restaurants_by_slug
+        self._restaurant_summaries = self.catalog.summaries
+        self._summary_index = self.catalog.summary_index
+        self._tables_cache = self.catalog.tables
+        self._table_lookup_cache = self.catalog.table_lookup
 
         self.reservations: dict[str, dict[str, Any]] = {}
         self._lock = RLock()
@@ -182,7 +113,14 @@ class Database:
             return self.restaurants[rid_str]
         return self._restaurants_by_slug.get(rid_str.lower())
 
+    def restaurant_count(self) -> int:
+        return len(self.restaurants)
+
     # -------- reservations --------
+    def reservation_count(self) -> int:
+        """Number of stored reservations (any status) without copying them."""
+        return len(self.reservations)
+
     def list_reservations(self, owner_id: str | None = None) -> list[dict[str, Any]]:
         with self._lock:
             if owner_id is None:
@@ -387,5 +325,34 @@ class Database:
         self.reservations = cleaned
 
 
+_database: Database | None = None
+_database_lock = Lock()
+
+
+def get_database() -> Database:
+    """Shared Database, loaded from disk on first use rather than at import."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = Database()
+    return _database
+
+
+class _LazyDatabase:
+    """Module-level ``DB`` handle; attribute access goes to ``get_database()``."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_database(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_database(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(get_database(), name)
+
+
 # Single instance
-DB = Database()
+DB = _LazyDatabase()
@@ -294,16 +294,16 @@ class TestRouteOptimization:
 
             start = Location("s", "Start", 40.40, 49.86)
 
-            # Small problem -> brute force
+            # Small problem -> exact Held-Karp
             small_dests = [
                 Location(str(i), f"D{i}", 40.4 + i * 0.01, 49.86 + i * 0.01) for i in range(4)
             ]
             result = route_optimizer.optimize_route(start, small_dests, algorithm="auto")
-            assert result.optimization_method == "brute_force"
+            assert result.optimization_method == "held_karp"
 
-            # Medium problem -> 2opt
+            # Larger problem -> 2opt
             medium_dests = [
-                Location(str(i), f"D{i}", 40.4 + i * 0.01, 49.86 + i * 0.01) for i in range(10)
+                Location(str(i), f"D{i}", 40.4 + i * 0.01, 49.86 + i * 0.01) for i in range(16)
             ]
             result = route_optimizer.optimize_route(start, medium_dests, algorithm="auto")
             assert result.optimization_method == "2opt"
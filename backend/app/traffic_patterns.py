@@ -5,19 +5,36 @@ This module implements machine learning-based traffic prediction using
 historical data patterns to provide more accurate ETAs.
 """
 
+import atexit
 import logging
 import math
 import sqlite3
-import statistics
+import threading
+import time
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+import numpy as np
+
+from .cache import traffic_tile_id
 from .settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Pooled severity of the stored row and the incoming pending readings
+_POOLED_SQL = (
+    "pooled_{}(sample_count, severity_avg, severity_std, "
+    "excluded.sample_count, excluded.severity_avg, excluded.severity_std)"
+)
+
+# Aggregates need this many readings before they count as a pattern
+MIN_PATTERN_SAMPLES = 5
+# ...and this many before predictions trust them over the general patterns
+MIN_PREDICTION_SAMPLES = 10
+
 
 @dataclass
 class TrafficPattern:
@@ -32,6 +49,191 @@ class TrafficPattern:
     last_updated: datetime
 
 
+def combine_moments(
+    a: tuple[int, float, float], b: tuple[int, float, float]
+) -> tuple[int, float, float]:
+    """Combine two (count, mean, M2) summaries as if their readings were pooled."""
+    count = a[0] + b[0]
+    if count == 0:
+        return 0, 0.0, 0.0
+    delta = b[1] - a[1]
+    mean = a[1] + delta * b[0] / count
+    return count, mean, a[2] + b[2] + delta * delta * a[0] * b[0] / count
+
+
+def _pooled(
+    n_a: int, mean_a: float, std_a: float, n_b: int, mean_b: float, std_b: float
+) -> tuple[int, float, float]:
+    """Pool two stored (count, mean, std) rows; backs the SQL merge functions."""
+    return combine_moments(
+        (n_a, mean_a, std_a * std_a * max(n_a - 1, 0)),
+        (n_b, mean_b, std_b * std_b * max(n_b - 1, 0)),
+    )
+
+
+def _pooled_mean(*row: float) -> float:
+    return _pooled(*row)[1]
+
+
+def _pooled_std(*row: float) -> float:
+    count, _mean, m2 = _pooled(*row)
+    return math.sqrt(m2 / (count - 1)) if count > 1 else 0.0
+
+
+@dataclass
+class RunningAggregate:
+    """
+    Welford running mean/variance of severity for one (grid, day, hour) cell.
+
+    Once ``count`` reaches the window size the update switches to an
+    exponentially weighted form with the same effective window, so patterns
+    keep adapting instead of freezing on old history.
+
+    Readings not yet written to SQLite are also kept apart as exact
+    ``pending_*`` moments. Flushes send only those, and the database merges
+    them into the stored row, so several workers can share one pattern table
+    without overwriting each other's samples.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    last_updated: datetime | None = None
+    pending_count: int = 0
+    pending_mean: float = 0.0
+    pending_m2: float = 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def dirty(self) -> bool:
+        return self.pending_count > 0
+
+    def add(self, value: float, window: int, timestamp: datetime) -> None:
+        delta = value - self.mean
+        if self.count < window:
+            self.count += 1
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            alpha = 1.0 / window
+            variance = self.m2 / (self.count - 1) if self.count > 1 else 0.0
+            self.mean += alpha * delta
+            variance = (1 - alpha) * (variance + alpha * delta * delta)
+            self.m2 = variance * (self.count - 1)
+        self.last_updated = timestamp
+
+        self.pending_count += 1
+        pending_delta = value - self.pending_mean
+        self.pending_mean += pending_delta / self.pending_count
+        self.pending_m2 += pending_delta * (value - self.pending_mean)
+
+    def take_pending(self) -> tuple[int, float, float]:
+        """Unflushed (count, mean, M2), leaving none pending."""
+        pending = (self.pending_count, self.pending_mean, self.pending_m2)
+        self.pending_count, self.pending_mean, self.pending_m2 = 0, 0.0, 0.0
+        return pending
+
+    def restore_pending(self, pending: tuple[int, float, float]) -> None:
+        """Put back moments from a flush that failed."""
+        current = (self.pending_count, self.pending_mean, self.pending_m2)
+        self.pending_count, self.pending_mean, self.pending_m2 = combine_moments(pending, current)
+
+    def rebase(
+        self,
+        mean: float,
+        std: float,
+        count: int,
+        last_updated: datetime | None,
+        window: int,
+    ) -> None:
+        """Adopt a stored row as history, keeping readings that have not reached it yet."""
+        stored = (count, mean, std * std * (count - 1) if count > 1 else 0.0)
+        pending = (self.pending_count, self.pending_mean, self.pending_m2)
+        total, self.mean, m2 = combine_moments(stored, pending)
+        # Same cap as the SQL merge: variance kept, weight limited to the window
+        self.count = min(total, window)
+        self.m2 = m2 / (total - 1) * (self.count - 1) if total > 1 else 0.0
+        if last_updated is not None and (
+            self.last_updated is None or last_updated > self.last_updated
+        ):
+            self.last_updated = last_updated
+
+    @classmethod
+    def from_pattern(
+        cls, mean: float, std: float, count: int, last_updated: datetime | None
+    ) -> "RunningAggregate":
+        m2 = std * std * (count - 1) if count > 1 else 0.0
+        return cls(count=count, mean=mean, m2=m2, last_updated=last_updated)
+
+
+class PatternTensor:
+    """
+    Dense (grid x day_of_week x hour) arrays of pattern statistics.
+
+    The read model behind ``predict_traffic``: lookups are array indexing with
+    no SQLite or dictionary of pattern objects involved. Rows are added on
+    demand and capacity doubles as new grid cells appear.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.grid_index: dict[str, int] = {}
+        self.mean = np.zeros((capacity, 7, 24))
+        self.std = np.zeros((capacity, 7, 24))
+        self.speed_factor = np.ones((capacity, 7, 24))
+        self.count = np.zeros((capacity, 7, 24), dtype=np.int32)
+
+    def _row(self, grid_id: str) -> int:
+        row = self.grid_index.get(grid_id)
+        if row is not None:
+            return row
+        row = len(self.grid_index)
+        if row >= self.mean.shape[0]:
+            grow = self.mean.shape[0]
+            self.mean = np.concatenate((self.mean, np.zeros((grow, 7, 24))))
+            self.std = np.concatenate((self.std, np.zeros((grow, 7, 24))))
+            self.speed_factor = np.concatenate((self.speed_factor, np.ones((grow, 7, 24))))
+            self.count = np.concatenate((self.count, np.zeros((grow, 7, 24), dtype=np.int32)))
+        self.grid_index[grid_id] = row
+        return row
+
+    def set(
+        self,
+        grid_id: str,
+        day_of_week: int,
+        hour: int,
+        mean: float,
+        std: float,
+        speed_factor: float,
+        count: int,
+    ) -> None:
+        row = self._row(grid_id)
+        self.mean[row, day_of_week, hour] = mean
+        self.std[row, day_of_week, hour] = std
+        self.speed_factor[row, day_of_week, hour] = speed_factor
+        self.count[row, day_of_week, hour] = count
+
+    def lookup(
+        self, grid_ids: Sequence[str], days: np.ndarray, hours: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized (mean, std, speed_factor, count); unknown grids report count 0."""
+        rows = np.fromiter((self.grid_index.get(g, -1) for g in grid_ids), dtype=np.intp)
+        known = rows >= 0
+        safe = np.where(known, rows, 0)
+        count = np.where(known, self.count[safe, days, hours], 0)
+        return (
+            self.mean[safe, days, hours],
+            self.std[safe, days, hours],
+            self.speed_factor[safe, days, hours],
+            count,
+        )
+
+    def __len__(self) -> int:
+        return len(self.grid_index)
+
+
 @dataclass
 class TrafficPrediction:
     """Predicted traffic conditions."""
@@ -61,15 +263,49 @@ class TrafficPatternTracker:
             db_path = Path(settings.DATA_DIR) / "traffic_patterns.db"
 
         self.db_path = db_path
+        self.batch_size = max(1, settings.TRAFFIC_INGEST_BATCH_SIZE)
+        self.flush_interval = settings.TRAFFIC_INGEST_FLUSH_INTERVAL_SECONDS
+        self.window = max(2, settings.TRAFFIC_PATTERN_WINDOW_SAMPLES)
+
+        # One long-lived WAL connection shared by the flusher and readers
+        self._db_lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Used by the flush upsert to pool pending readings into the stored row
+        self._conn.create_function("pooled_mean", 6, _pooled_mean, deterministic=True)
+        self._conn.create_function("pooled_std", 6, _pooled_std, deterministic=True)
+        self._conn.create_function(
+            "speed_factor_for", 1, self._calculate_speed_factor, deterministic=True
+        )
         self._init_database()
 
-        # Pattern cache
-        self._pattern_cache: dict[str, TrafficPattern] = {}
-        self._cache_expires = datetime.now()
+        # Buffered ingestion state, guarded by _lock. _flush_lock keeps one
+        # flush (or refresh) at a time, so a batch is never written twice.
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._observation_buffer: list[tuple] = []
+        self._anomaly_buffer: list[tuple] = []
+        self._buffer_started = time.monotonic()
+        self._aggregates: dict[tuple[str, int, int], RunningAggregate] = {}
+        self._tensor = PatternTensor()
+        self.refresh_interval = settings.TRAFFIC_PATTERN_REFRESH_SECONDS
+        # Highest update_seq loaded so far; None until the first full load
+        self._refresh_watermark: int | None = None
+        self._last_refresh = time.monotonic()
+        self.refresh_patterns()
+
+        self.maintenance_interval = settings.TRAFFIC_MAINTENANCE_INTERVAL_SECONDS
+        self._last_maintenance = time.monotonic()
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="traffic-flush", daemon=True)
+        self._flusher.start()
 
     def _init_database(self) -> None:
         """Initialize SQLite database for traffic data."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._db_lock, self._conn as conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS traffic_observations (
@@ -86,9 +322,7 @@ class TrafficPatternTracker:
                     minute INTEGER NOT NULL,
                     is_holiday BOOLEAN DEFAULT 0,
                     weather_condition TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_grid_time (grid_id, day_of_week, hour),
-                    INDEX idx_timestamp (timestamp)
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """
             )
@@ -105,10 +339,18 @@ class TrafficPatternTracker:
                     speed_factor REAL NOT NULL,
                     sample_count INTEGER NOT NULL,
                     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    update_seq INTEGER NOT NULL DEFAULT 0,
                     UNIQUE(grid_id, day_of_week, hour)
                 )
             """
             )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(traffic_patterns)")}
+            if "update_seq" not in columns:
+                # Databases from before the change counter; their rows all start at 0
+                conn.execute(
+                    "ALTER TABLE traffic_patterns "
+                    "ADD COLUMN update_seq INTEGER NOT NULL DEFAULT 0"
+                )
 
             conn.execute(
                 """
@@ -125,7 +367,117 @@ class TrafficPatternTracker:
             """
             )
 
-            conn.commit()
+            # Raw observations older than the retention window are folded into these
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS traffic_hourly_rollups (
+                    grid_id TEXT NOT NULL,
+                    bucket_start TEXT NOT NULL,
+                    day_of_week INTEGER NOT NULL,
+                    hour INTEGER NOT NULL,
+                    observation_count INTEGER NOT NULL,
+                    severity_sum REAL NOT NULL,
+                    severity_sq_sum REAL NOT NULL,
+                    speed_sum REAL NOT NULL DEFAULT 0,
+                    speed_count INTEGER NOT NULL DEFAULT 0,
+                    delay_sum REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (grid_id, bucket_start)
+                )
+            """
+            )
+
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_observations_grid_time
+                ON traffic_observations (grid_id, day_of_week, hour)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_observations_timestamp
+                ON traffic_observations (timestamp)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_patterns_update_seq
+                ON traffic_patterns (update_seq)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_anomalies_timestamp
+                ON traffic_anomalies (timestamp)
+            """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_rollups_bucket
+                ON traffic_hourly_rollups (bucket_start)
+            """
+            )
+
+    def refresh_patterns(self) -> int:
+        """
+        Load pattern rows changed since the last refresh into the tensor.
+
+        The first call loads everything. Later calls pick up rows written by
+        other processes sharing the database, found by their ``update_seq``:
+        every upsert stamps its rows with one more than the table's highest,
+        inside the writing transaction, so a row committed after this read
+        always sorts above it whatever its wall-clock time. Stored rows
+        already include everything flushed by any worker, so they replace the
+        local history; readings not flushed yet are layered on top.
+        """
+        with self._flush_lock, self._db_lock:
+            query = """
+                SELECT grid_id, day_of_week, hour, severity_avg, severity_std,
+                       speed_factor, sample_count, last_updated, update_seq
+                FROM traffic_patterns
+            """
+            params: tuple = ()
+            if self._refresh_watermark is not None:
+                query += " WHERE update_seq > ?"
+                params = (self._refresh_watermark,)
+            rows = self._conn.execute(query, params).fetchall()
+
+        applied = 0
+        with self._lock:
+            for (
+                grid_id,
+                day,
+                hour,
+                mean,
+                std,
+                speed_factor,
+                count,
+                last_updated,
+                _update_seq,
+            ) in rows:
+                key = (grid_id, day, hour)
+                updated_at = _parse_timestamp(last_updated)
+                aggregate = self._aggregates.get(key)
+                if aggregate is None:
+                    aggregate = RunningAggregate.from_pattern(mean, std, count, updated_at)
+                    self._aggregates[key] = aggregate
+                else:
+                    aggregate.rebase(mean, std, count, updated_at, self.window)
+                    speed_factor = self._calculate_speed_factor(aggregate.mean)
+                self._tensor.set(
+                    grid_id,
+                    day,
+                    hour,
+                    aggregate.mean,
+                    aggregate.std,
+                    speed_factor,
+                    aggregate.count,
+                )
+                applied += 1
+            self._refresh_watermark = max(
+                (row[-1] for row in rows), default=self._refresh_watermark or 0
+            )
+            self._last_refresh = time.monotonic()
+        return applied
 
     def record_observation(
         self,
@@ -140,6 +492,10 @@ class TrafficPatternTracker:
         """
         Record a traffic observation.
 
+        The reading is buffered and folded into its running aggregate in memory;
+        rows reach SQLite in batches written by the background flusher (see
+        ``flush``), so callers never wait on the database.
+
         Args:
             latitude: Location latitude
             longitude: Location longitude
@@ -160,36 +516,43 @@ class TrafficPatternTracker:
         hour = timestamp.hour
         minute = timestamp.minute
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                INSERT INTO traffic_observations
-                (timestamp, latitude, longitude, grid_id, severity,
-                 speed_kmh, delay_minutes, day_of_week, hour, minute,
-                 weather_condition)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    timestamp,
-                    latitude,
-                    longitude,
-                    grid_id,
-                    severity,
-                    speed_kmh,
-                    delay_minutes,
-                    day_of_week,
-                    hour,
-                    minute,
-                    weather,
-                ),
-            )
-            conn.commit()
+        row = (
+            timestamp,
+            latitude,
+            longitude,
+            grid_id,
+            severity,
+            speed_kmh,
+            delay_minutes,
+            day_of_week,
+            hour,
+            minute,
+            weather,
+        )
 
-        # Update patterns if enough data
-        self._update_patterns(grid_id, day_of_week, hour)
+        with self._lock:
+            # Compare against history before this reading joins it
+            self._check_anomaly(grid_id, severity, timestamp)
+            aggregate = self._aggregates.setdefault(
+                (grid_id, day_of_week, hour), RunningAggregate()
+            )
+            aggregate.add(severity, self.window, timestamp)
+            self._tensor.set(
+                grid_id,
+                day_of_week,
+                hour,
+                aggregate.mean,
+                aggregate.std,
+                self._calculate_speed_factor(aggregate.mean),
+                aggregate.count,
+            )
+            if not self._observation_buffer:
+                self._buffer_started = time.monotonic()
+            self._observation_buffer.append(row)
+            should_flush = len(self._observation_buffer) >= self.batch_size
 
-        # Check for anomalies
-        self._check_anomaly(grid_id, severity, timestamp)
+        if should_flush:
+            self._flush_requested.set()
 
         logger.debug(
             "Recorded traffic observation: grid=%s, severity=%d, time=%s",
@@ -227,10 +590,9 @@ class TrafficPatternTracker:
         day_of_week = target_time.weekday()
         hour = target_time.hour
 
-        # Try to get pattern from cache
         pattern = self._get_pattern(grid_id, day_of_week, hour)
 
-        if pattern and pattern.sample_count >= 10:
+        if pattern and pattern.sample_count >= MIN_PREDICTION_SAMPLES:
             # Good historical data available
             confidence = min(1.0, pattern.sample_count / 100.0)
 
@@ -255,133 +617,341 @@ class TrafficPatternTracker:
         # Fallback: Use general patterns
         return self._predict_from_general_patterns(day_of_week, hour)
 
-    def _get_pattern(self, grid_id: str, day_of_week: int, hour: int) -> TrafficPattern | None:
-        """Get traffic pattern from cache or database."""
-        cache_key = f"{grid_id}:{day_of_week}:{hour}"
-
-        # Check cache
-        if cache_key in self._pattern_cache:
-            if datetime.now() < self._cache_expires:
-                return self._pattern_cache[cache_key]
+    def predict_traffic_batch(
+        self,
+        points: Sequence[tuple[float, float]],
+        target_times: datetime | Sequence[datetime] | None = None,
+    ) -> list[TrafficPrediction]:
+        """
+        Predict traffic for many (latitude, longitude) points in one tensor lookup.
 
-        # Query database
-        with sqlite3.connect(self.db_path) as conn:
-            result = conn.execute(
-                """
-                SELECT severity_avg, severity_std, speed_factor,
-                       sample_count, last_updated
-                FROM traffic_patterns
-                WHERE grid_id = ? AND day_of_week = ? AND hour = ?
-            """,
-                (grid_id, day_of_week, hour),
-            ).fetchone()
-
-            if result:
-                pattern = TrafficPattern(
-                    day_of_week=day_of_week,
-                    hour=hour,
-                    severity_avg=result[0],
-                    severity_std=result[1],
-                    speed_factor=result[2],
-                    sample_count=result[3],
-                    last_updated=datetime.fromisoformat(result[4]),
+        ``target_times`` is a single time for every point or one per point.
+        Results match ``predict_traffic`` point by point.
+        """
+        if not points:
+            return []
+        if target_times is None or isinstance(target_times, datetime):
+            times = [target_times or datetime.now()] * len(points)
+        else:
+            times = list(target_times)
+            if len(times) != len(points):
+                raise ValueError("target_times must match points")
+
+        grid_ids = [self._get_grid_id(lat, lon) for lat, lon in points]
+        days = np.fromiter((t.weekday() for t in times), dtype=np.intp)
+        hours = np.fromiter((t.hour for t in times), dtype=np.intp)
+        mean, _std, speed_factor, count = self._tensor.lookup(grid_ids, days, hours)
+
+        rush = ((hours >= 7) & (hours <= 9)) | ((hours >= 17) & (hours <= 19))
+        night = hours <= 6
+        severity = mean * np.where(rush, 1.15, np.where(night, 0.8, 1.0))
+        confidence = np.minimum(1.0, count / 100.0)
+        historical = count >= MIN_PREDICTION_SAMPLES
+
+        predictions = []
+        for idx in range(len(points)):
+            day, hour = int(days[idx]), int(hours[idx])
+            if not historical[idx]:
+                predictions.append(self._predict_from_general_patterns(day, hour))
+                continue
+            predictions.append(
+                TrafficPrediction(
+                    expected_severity=float(severity[idx]),
+                    confidence=float(confidence[idx]),
+                    speed_factor=float(speed_factor[idx]),
+                    historical_samples=int(count[idx]),
+                    prediction_method="historical_pattern",
+                    message=self._get_traffic_message(float(severity[idx]), day, hour),
                 )
+            )
+        return predictions
 
-                # Cache for 10 minutes
-                self._pattern_cache[cache_key] = pattern
-                if datetime.now() >= self._cache_expires:
-                    self._cache_expires = datetime.now() + timedelta(minutes=10)
-
-                return pattern
-
-        return None
+    def _get_pattern(self, grid_id: str, day_of_week: int, hour: int) -> TrafficPattern | None:
+        """Get traffic pattern from the in-memory tensor."""
+        tensor = self._tensor
+        row = tensor.grid_index.get(grid_id)
+        if row is None:
+            return None
+        count = int(tensor.count[row, day_of_week, hour])
+        if count < MIN_PATTERN_SAMPLES:
+            return None
+        aggregate = self._aggregates.get((grid_id, day_of_week, hour))
+        return TrafficPattern(
+            day_of_week=day_of_week,
+            hour=hour,
+            severity_avg=float(tensor.mean[row, day_of_week, hour]),
+            severity_std=float(tensor.std[row, day_of_week, hour]),
+            speed_factor=float(tensor.speed_factor[row, day_of_week, hour]),
+            sample_count=count,
+            last_updated=(aggregate and aggregate.last_updated) or datetime.now(),
+        )
 
     def _update_patterns(self, grid_id: str, day_of_week: int, hour: int) -> None:
-        """Update traffic patterns based on recent observations."""
-        with sqlite3.connect(self.db_path) as conn:
-            # Get recent observations (last 8 weeks)
-            cutoff_date = datetime.now() - timedelta(weeks=8)
-
-            results = conn.execute(
-                """
-                SELECT severity, speed_kmh, delay_minutes
-                FROM traffic_observations
-                WHERE grid_id = ? AND day_of_week = ? AND hour = ?
-                AND timestamp > ?
-                ORDER BY timestamp DESC
-                LIMIT 100
-            """,
-                (grid_id, day_of_week, hour, cutoff_date),
-            ).fetchall()
-
-            if len(results) < 5:
-                return  # Not enough data
-
-            # Calculate statistics
-            severities = [r[0] for r in results]
-            severity_avg = statistics.mean(severities)
-            severity_std = statistics.stdev(severities) if len(severities) > 1 else 0
+        """Persist buffered observations and aggregates (kept for callers forcing an update)."""
+        self.flush()
 
-            # Calculate speed factor
-            speed_factor = self._calculate_speed_factor(severity_avg)
-
-            # Update or insert pattern
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO traffic_patterns
-                (grid_id, day_of_week, hour, severity_avg, severity_std,
-                 speed_factor, sample_count, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+    def flush(self) -> int:
+        """
+        Write buffered observations, anomalies and pending aggregate readings.
+
+        Everything goes out in one transaction using ``executemany``. Pending
+        readings are pooled into the stored pattern rows by the upsert itself,
+        so rows other workers flushed in the meantime are added to, not
+        replaced. Buffers are only released once the transaction commits; if
+        it fails, the batch stays queued for the next flush.
+        Returns the number of observations written.
+        """
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        written_at = datetime.now()
+        with self._lock:
+            observations = list(self._observation_buffer)
+            anomalies = list(self._anomaly_buffer)
+            pending = {
+                key: aggregate.take_pending()
+                for key, aggregate in self._aggregates.items()
+                if aggregate.dirty
+            }
+
+        if not (observations or anomalies or pending):
+            return 0
+
+        patterns = []
+        for (grid_id, day, hour), (count, mean, m2) in pending.items():
+            std = math.sqrt(m2 / (count - 1)) if count > 1 else 0.0
+            patterns.append(
                 (
                     grid_id,
-                    day_of_week,
+                    day,
                     hour,
-                    severity_avg,
-                    severity_std,
-                    speed_factor,
-                    len(results),
-                    datetime.now(),
-                ),
+                    mean,
+                    std,
+                    self._calculate_speed_factor(mean),
+                    count,
+                    written_at,
+                )
             )
-            conn.commit()
+
+        try:
+            with self._db_lock, self._conn as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO traffic_observations
+                    (timestamp, latitude, longitude, grid_id, severity,
+                     speed_kmh, delay_minutes, day_of_week, hour, minute,
+                     weather_condition)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    observations,
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO traffic_anomalies
+                    (timestamp, grid_id, expected_severity,
+                     actual_severity, deviation, description)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                    anomalies,
+                )
+                # SET expressions all read the row as it was before this upsert
+                conn.executemany(
+                    f"""
+                    INSERT INTO traffic_patterns
+                    (grid_id, day_of_week, hour, severity_avg, severity_std,
+                     speed_factor, sample_count, last_updated, update_seq)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?,
+                            (SELECT COALESCE(MAX(update_seq), 0) + 1 FROM traffic_patterns))
+                    ON CONFLICT(grid_id, day_of_week, hour) DO UPDATE SET
+                        severity_avg = {_POOLED_SQL.format("mean")},
+                        severity_std = {_POOLED_SQL.format("std")},
+                        speed_factor = speed_factor_for({_POOLED_SQL.format("mean")}),
+                        sample_count = MIN(sample_count + excluded.sample_count, {self.window}),
+                        last_updated = excluded.last_updated,
+                        update_seq = excluded.update_seq
+                """,
+                    patterns,
+                )
+        except Exception:
+            with self._lock:
+                for key, moments in pending.items():
+                    self._aggregates[key].restore_pending(moments)
+            raise
+
+        with self._lock:
+            del self._observation_buffer[: len(observations)]
+            del self._anomaly_buffer[: len(anomalies)]
+
+        logger.debug(
+            "Flushed %d traffic observations, %d anomalies, %d patterns",
+            len(observations),
+            len(anomalies),
+            len(patterns),
+        )
+        return len(observations)
+
+    def _flush_loop(self) -> None:
+        """Background flusher: full batches right away, quiet periods on a timer."""
+        timeout = self.flush_interval if self.flush_interval > 0 else None
+        while not self._stop.is_set():
+            self._flush_requested.wait(timeout)
+            self._flush_requested.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+                now = time.monotonic()
+                if self.refresh_interval > 0 and now - self._last_refresh >= self.refresh_interval:
+                    self.refresh_patterns()
+                if (
+                    self.maintenance_interval > 0
+                    and now - self._last_maintenance >= self.maintenance_interval
+                ):
+                    self.run_maintenance()
+            except Exception as exc:  # pragma: no cover - keep the flusher alive
+                logger.warning("Traffic observation flush failed: %s", exc)
+
+    def rollup_and_prune(self, now: datetime | None = None) -> dict[str, int]:
+        """
+        Fold raw observations past retention into hourly rollups and delete them.
+
+        Works in batches of TRAFFIC_PRUNE_BATCH_SIZE rows, each in its own short
+        transaction, so flushes interleave instead of waiting on one long delete.
+        """
+        now = now or datetime.now()
+        raw_cutoff = now - timedelta(days=settings.TRAFFIC_RAW_RETENTION_DAYS)
+        rollup_cutoff = now - timedelta(days=settings.TRAFFIC_ROLLUP_RETENTION_DAYS)
+        batch_size = max(1, settings.TRAFFIC_PRUNE_BATCH_SIZE)
+        result = {
+            "rolled_up": 0,
+            "batches": 0,
+            "rollups_pruned": 0,
+            "anomalies_pruned": 0,
+        }
+
+        while not self._stop.is_set():
+            with self._db_lock, self._conn as conn:
+                # The oldest rows by id form this batch; id <= max_id bounds it exactly
+                max_id = conn.execute(
+                    """
+                    SELECT MAX(id) FROM (
+                        SELECT id FROM traffic_observations
+                        WHERE timestamp < ?
+                        ORDER BY id
+                        LIMIT ?
+                    )
+                """,
+                    (raw_cutoff, batch_size),
+                ).fetchone()[0]
+                if max_id is None:
+                    break
+                conn.execute(
+                    """
+                    INSERT INTO traffic_hourly_rollups
+                    (grid_id, bucket_start, day_of_week, hour, observation_count,
+                     severity_sum, severity_sq_sum, speed_sum, speed_count, delay_sum)
+                    SELECT grid_id, strftime('%Y-%m-%d %H:00:00', timestamp), day_of_week, hour,
+                           COUNT(*), SUM(severity), SUM(severity * severity),
+                           COALESCE(SUM(speed_kmh), 0), COUNT(speed_kmh),
+                           COALESCE(SUM(delay_minutes), 0)
+                    FROM traffic_observations
+                    WHERE timestamp < ? AND id <= ?
+                    GROUP BY grid_id, strftime('%Y-%m-%d %H:00:00', timestamp)
+                    ON CONFLICT(grid_id, bucket_start) DO UPDATE SET
+                        observation_count = observation_count + excluded.observation_count,
+                        severity_sum = severity_sum + excluded.severity_sum,
+                        severity_sq_sum = severity_sq_sum + excluded.severity_sq_sum,
+                        speed_sum = speed_sum + excluded.speed_sum,
+                        speed_count = speed_count + excluded.speed_count,
+                        delay_sum = delay_sum + excluded.delay_sum
+                """,
+                    (raw_cutoff, max_id),
+                )
+                deleted = conn.execute(
+                    "DELETE FROM traffic_observations WHERE timestamp < ? AND id <= ?",
+                    (raw_cutoff, max_id),
+                ).rowcount
+            result["rolled_up"] += deleted
+            result["batches"] += 1
+
+        with self._db_lock, self._conn as conn:
+            result["rollups_pruned"] = conn.execute(
+                "DELETE FROM traffic_hourly_rollups WHERE bucket_start < ?",
+                (rollup_cutoff.strftime("%Y-%m-%d %H:00:00"),),
+            ).rowcount
+            result["anomalies_pruned"] = conn.execute(
+                "DELETE FROM traffic_anomalies WHERE timestamp < ?", (rollup_cutoff,)
+            ).rowcount
+        return result
+
+    def run_maintenance(self, now: datetime | None = None) -> dict[str, Any]:
+        """
+        Storage lifecycle pass, meant for the background thread or a cron job.
+
+        Rolls up and prunes old rows, refreshes planner statistics and VACUUMs
+        once enough of the file is free pages.
+        """
+        started = time.perf_counter()
+        result: dict[str, Any] = self.rollup_and_prune(now)
+        with self._db_lock:
+            self._conn.execute("ANALYZE")
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            free_ratio = free_pages / page_count if page_count else 0.0
+            vacuumed = free_ratio >= settings.TRAFFIC_VACUUM_FREE_RATIO
+            if vacuumed:
+                self._conn.execute("VACUUM")
+        self._last_maintenance = time.monotonic()
+        result.update(
+            {
+                "free_ratio": round(free_ratio, 3),
+                "vacuumed": vacuumed,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        )
+        logger.info("Traffic storage maintenance: %s", result)
+        return result
+
+    def close(self) -> None:
+        """Stop the background flusher, write pending data and close the connection."""
+        self._stop.set()
+        self._flush_requested.set()
+        self._flusher.join(timeout=max(self.flush_interval, 0) + 1)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
 
     def _check_anomaly(self, grid_id: str, severity: int, timestamp: datetime) -> None:
-        """Check if current observation is anomalous."""
-        pattern = self._get_pattern(grid_id, timestamp.weekday(), timestamp.hour)
+        """Check if current observation is anomalous (caller holds ``_lock``)."""
+        aggregate = self._aggregates.get((grid_id, timestamp.weekday(), timestamp.hour))
 
-        if not pattern or pattern.sample_count < 20:
+        if aggregate is None or aggregate.count < 20:
             return  # Not enough history
 
         # Calculate deviation
-        deviation = abs(severity - pattern.severity_avg)
-        threshold = 2 * pattern.severity_std if pattern.severity_std > 0 else 1.5
+        expected = aggregate.mean
+        severity_std = aggregate.std
+        deviation = abs(severity - expected)
+        threshold = 2 * severity_std if severity_std > 0 else 1.5
 
         if deviation > threshold:
             # Anomaly detected
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute(
-                    """
-                    INSERT INTO traffic_anomalies
-                    (timestamp, grid_id, expected_severity,
-                     actual_severity, deviation, description)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        timestamp,
-                        grid_id,
-                        pattern.severity_avg,
-                        severity,
-                        deviation,
-                        f"Unusual traffic: expected {pattern.severity_avg:.1f}, got {severity}",
-                    ),
+            self._anomaly_buffer.append(
+                (
+                    timestamp,
+                    grid_id,
+                    expected,
+                    severity,
+                    deviation,
+                    f"Unusual traffic: expected {expected:.1f}, got {severity}",
                 )
-                conn.commit()
+            )
 
             logger.info(
                 "Traffic anomaly detected at %s: expected %.1f, got %d",
                 grid_id,
-                pattern.severity_avg,
+                expected,
                 severity,
             )
 
@@ -420,10 +990,8 @@ class TrafficPatternTracker:
 
     def _get_grid_id(self, lat: float, lon: float) -> str:
         """Convert coordinates to grid ID for aggregation."""
-        # Use ~1km grid cells
-        grid_lat = round(lat, 2)  # ~1.1km resolution
-        grid_lon = round(lon, 2)
-        return f"{grid_lat:.2f},{grid_lon:.2f}"
+        # Same tiles as the live traffic cache (~1.1km at the default 2 decimals)
+        return traffic_tile_id(lat, lon)
 
     def _calculate_speed_factor(self, severity: float) -> float:
         """Calculate speed factor from severity."""
@@ -439,7 +1007,15 @@ class TrafficPatternTracker:
 
     def _get_traffic_message(self, severity: float, day_of_week: int, hour: int) -> str:
         """Generate human-readable traffic message."""
-        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        day_names = [
+            "Monday",
+            "Tuesday",
+            "Wednesday",
+            "Thursday",
+            "Friday",
+            "Saturday",
+            "Sunday",
+        ]
         day = day_names[day_of_week]
 
         if severity < 1.5:
@@ -456,8 +1032,10 @@ class TrafficPatternTracker:
 
     def get_statistics(self) -> dict[str, Any]:
         """Get traffic tracking statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            stats = {}
+        self.flush()
+        with self._db_lock:
+            conn = self._conn
+            stats: dict[str, Any] = {}
 
             # Total observations
             stats["total_observations"] = conn.execute(
@@ -474,10 +1052,16 @@ class TrafficPatternTracker:
                 "SELECT COUNT(*) FROM traffic_anomalies"
             ).fetchone()[0]
 
+            # Observations already folded into hourly rollups
+            stats["rolled_up_observations"] = conn.execute(
+                "SELECT COALESCE(SUM(observation_count), 0) FROM traffic_hourly_rollups"
+            ).fetchone()[0]
+
             # Recent activity
             recent_cutoff = datetime.now() - timedelta(days=7)
             stats["observations_last_week"] = conn.execute(
-                "SELECT COUNT(*) FROM traffic_observations WHERE timestamp > ?", (recent_cutoff,)
+                "SELECT COUNT(*) FROM traffic_observations WHERE timestamp > ?",
+                (recent_cutoff,),
             ).fetchone()[0]
 
             # Most congested times
@@ -505,6 +1089,15 @@ class TrafficPatternTracker:
         return stats
 
 
+def _parse_timestamp(value: Any) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
 # Global tracker instance
 _traffic_tracker: TrafficPatternTracker | None = None
 
@@ -514,6 +1107,7 @@ def get_traffic_tracker() -> TrafficPatternTracker:
     global _traffic_tracker
     if _traffic_tracker is None:
         _traffic_tracker = TrafficPatternTracker()
+        atexit.register(_traffic_tracker.close)
     return _traffic_tracker
 
 
@@ -534,9 +1128,6 @@ def predict_traffic_for_route(
     if departure_time is None:
         departure_time = datetime.now()
 
-    # Predict at origin
-    origin_pred = tracker.predict_traffic(origin_lat, origin_lon, departure_time)
-
     # Estimate arrival time (rough)
     distance_km = (
         math.sqrt((dest_lat - origin_lat) ** 2 + (dest_lon - origin_lon) ** 2) * 111
@@ -545,8 +1136,10 @@ def predict_traffic_for_route(
     travel_minutes = int((distance_km / 30) * 60)  # Assume 30 km/h average
     arrival_time = departure_time + timedelta(minutes=travel_minutes)
 
-    # Predict at destination for arrival time
-    dest_pred = tracker.predict_traffic(dest_lat, dest_lon, arrival_time)
+    # Origin at departure and destination at arrival in one lookup
+    origin_pred, dest_pred = tracker.predict_traffic_batch(
+        [(origin_lat, origin_lon), (dest_lat, dest_lon)], [departure_time, arrival_time]
+    )
 
     # Combine predictions
     avg_severity = (origin_pred.expected_severity + dest_pred.expected_severity) / 2
@@ -575,6 +1168,8 @@ def predict_traffic_for_route(
 __all__ = [
     "TrafficPatternTracker",
     "TrafficPattern",
+    "RunningAggregate",
+    "PatternTensor",
     "TrafficPrediction",
     "get_traffic_tracker",
     "predict_traffic_for_route",
@@ -0,0 +1,209 @@
+"""
+Background traffic prefetching for restaurant neighborhoods.
+
+Destinations are a fixed set of restaurants, so destination-side traffic can be
+fetched ahead of time instead of on the request path. The prefetcher walks every
+distinct traffic cache cell (restaurants plus configured hot origin cells) once
+per cycle, spacing calls out to stay under GoMap rate limits and pausing while
+the GoMap circuit breaker is open.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from .cache import traffic_cache_key
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .gomap import get_traffic_conditions, gomap_enabled
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_RADIUS_KM = 2.0  # Matches the radius compute_eta_with_traffic asks for
+
+
+@dataclass
+class PrefetchStats:
+    cycles: int = 0
+    refreshed: int = 0
+    failures: int = 0
+    circuit_pauses: int = 0
+    targets: int = 0
+    last_cycle_at: datetime | None = None
+    last_cycle_seconds: float | None = None
+
+
+def parse_hot_cells(raw: str | None) -> list[tuple[float, float]]:
+    """Parse ``"lat,lon;lat,lon"`` into coordinate pairs, skipping malformed entries."""
+    cells: list[tuple[float, float]] = []
+    for chunk in (raw or "").split(";"):
+        parts = [part.strip() for part in chunk.split(",")]
+        if len(parts) != 2:
+            continue
+        try:
+            cells.append((float(parts[0]), float(parts[1])))
+        except ValueError:
+            logger.warning("Ignoring malformed traffic prefetch cell %r", chunk)
+    return cells
+
+
+def restaurant_coordinates() -> list[tuple[float, float]]:
+    """Coordinates of every catalog restaurant that has them."""
+    from .storage import DB
+
+    coords = []
+    for record in DB.restaurants.values():
+        lat, lon = record.get("latitude"), record.get("longitude")
+        if lat is None or lon is None:
+            continue
+        try:
+            coords.append((float(lat), float(lon)))
+        except (TypeError, ValueError):
+            continue
+    return coords
+
+
+class TrafficPrefetcher:
+    """Keeps traffic cache entries for known destinations warm."""
+
+    def __init__(
+        self,
+        *,
+        fetch: Callable[..., Any] | None = None,
+        targets: Callable[[], Iterable[tuple[float, float]]] | None = None,
+        breaker: CircuitBreaker | None = None,
+        cycle_seconds: float | None = None,
+        min_spacing_seconds: float | None = None,
+    ):
+        self._fetch = fetch or (
+            lambda lat, lon: get_traffic_conditions(lat, lon, PREFETCH_RADIUS_KM, refresh=True)
+        )
+        self._targets = targets or self._default_targets
+        self._breaker = breaker
+        ttl = settings.GOMAP_TRAFFIC_UPDATE_INTERVAL_SECONDS
+        # Refresh before entries expire so readers never see a gap
+        self.cycle_seconds = (
+            cycle_seconds
+            if cycle_seconds is not None
+            else ttl * settings.TRAFFIC_PREFETCH_REFRESH_FRACTION
+        )
+        self.min_spacing_seconds = (
+            min_spacing_seconds
+            if min_spacing_seconds is not None
+            else settings.TRAFFIC_PREFETCH_MIN_SPACING_SECONDS
+        )
+        self.stats = PrefetchStats()
+        self._task: asyncio.Task | None = None
+        self._running = False
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker or get_circuit_breaker("gomap_api")
+
+    @staticmethod
+    def _default_targets() -> list[tuple[float, float]]:
+        return restaurant_coordinates() + parse_hot_cells(settings.TRAFFIC_PREFETCH_HOT_CELLS)
+
+    def cells(self) -> list[tuple[float, float]]:
+        """One representative coordinate per distinct traffic cache entry."""
+        seen: dict[str, tuple[float, float]] = {}
+        for lat, lon in self._targets():
+            seen.setdefault(traffic_cache_key(lat, lon, PREFETCH_RADIUS_KM), (lat, lon))
+        return list(seen.values())
+
+    async def run_cycle(self) -> int:
+        """Refresh every cell once, staggered across the cycle. Returns cells refreshed."""
+        started = time.monotonic()
+        cells = self.cells()
+        self.stats.targets = len(cells)
+        if not cells:
+            return 0
+        spacing = max(self.min_spacing_seconds, self.cycle_seconds / len(cells))
+        refreshed = 0
+        for index, (lat, lon) in enumerate(cells):
+            while self.breaker.is_open():
+                self.stats.circuit_pauses += 1
+                logger.info("Traffic prefetch paused: GoMap circuit is open")
+                await asyncio.sleep(max(spacing, 1.0))
+                if self._task is not None and not self._running:
+                    return refreshed
+            try:
+                result = await asyncio.to_thread(self._fetch, lat, lon)
+            except Exception as exc:
+                self.stats.failures += 1
+                logger.debug("Traffic prefetch failed for %.4f,%.4f: %s", lat, lon, exc)
+            else:
+                if result is not None:
+                    refreshed += 1
+                    self.stats.refreshed += 1
+            if index < len(cells) - 1:
+                await asyncio.sleep(spacing)
+        self.stats.cycles += 1
+        self.stats.last_cycle_at = datetime.now(UTC)
+        self.stats.last_cycle_seconds = round(time.monotonic() - started, 3)
+        return refreshed
+
+    async def _loop(self) -> None:
+        try:
+            while self._running:
+                cycle_started = time.monotonic()
+                try:
+                    await self.run_cycle()
+                except Exception:
+                    logger.exception("Unexpected traffic prefetch failure")
+                elapsed = time.monotonic() - cycle_started
+                await asyncio.sleep(max(self.min_spacing_seconds, self.cycle_seconds - elapsed))
+        except asyncio.CancelledError:
+            pass
+
+    async def startup(self) -> None:
+        if self._task:
+            return
+        if not (
+            settings.TRAFFIC_PREFETCH_ENABLED and settings.GOMAP_TRAFFIC_ENABLED and gomap_enabled()
+        ):
+            logger.info("Skipping traffic prefetch (disabled or GoMap not configured)")
+            return
+        self._running = True
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def shutdown(self) -> None:
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> dict[str, Any]:
+        stats = self.stats
+        return {
+            "running": self._running,
+            "targets": stats.targets,
+            "cycles": stats.cycles,
+            "refreshed": stats.refreshed,
+            "failures": stats.failures,
+            "circuit_pauses": stats.circuit_pauses,
+            "last_cycle_at": stats.last_cycle_at.isoformat() if stats.last_cycle_at else None,
+            "last_cycle_seconds": stats.last_cycle_seconds,
+        }
+
+
+traffic_prefetcher = TrafficPrefetcher()
+
+
+__all__ = [
+    "TrafficPrefetcher",
+    "PrefetchStats",
+    "parse_hot_cells",
+    "restaurant_coordinates",
+    "traffic_prefetcher",
+]
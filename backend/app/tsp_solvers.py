@@ -0,0 +1,426 @@
+"""
+NumPy-backed solvers for the fixed-endpoint TSP used by the route optimizer.
+
+All solvers work on an integer-indexed cost matrix laid out as::
+
+    0            start
+    1 .. n       destinations to visit
+    n + 1        terminal (start again, a fixed end, or a zero-cost sink)
+
+and return an ``order`` over ``1..n``. Costs may be asymmetric.
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# Held-Karp needs 2^n * n cells; 13 stops is ~100k states and well under 100ms
+HELD_KARP_MAX_STOPS = 13
+# Permutation enumeration is only kept for tiny problems
+BRUTE_FORCE_MAX_STOPS = 8
+
+
+@dataclass
+class SolveResult:
+    """Best tour found by a solver."""
+
+    order: list[int]
+    cost: float
+    exhausted: bool = False  # True when the time budget stopped the search early
+
+
+class Deadline:
+    """Monotonic deadline; ``None`` budget never expires."""
+
+    __slots__ = ("_expires_at",)
+
+    def __init__(self, budget_seconds: float | None):
+        self._expires_at = None if budget_seconds is None else time.monotonic() + budget_seconds
+
+    def expired(self) -> bool:
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+
+def tour_cost(matrix: np.ndarray, order: list[int] | np.ndarray) -> float:
+    """Cost of start -> order -> terminal."""
+    path = np.concatenate(([0], np.asarray(order, dtype=np.intp), [matrix.shape[0] - 1]))
+    return float(matrix[path[:-1], path[1:]].sum())
+
+
+def nearest_neighbor(matrix: np.ndarray) -> SolveResult:
+    """Greedy construction from the start node."""
+    n = matrix.shape[0] - 2
+    unvisited = np.ones(n + 2, dtype=bool)
+    unvisited[[0, n + 1]] = False
+    order: list[int] = []
+    current = 0
+    for _ in range(n):
+        row = np.where(unvisited, matrix[current], np.inf)
+        current = int(row.argmin())
+        order.append(current)
+        unvisited[current] = False
+    return SolveResult(order=order, cost=tour_cost(matrix, order))
+
+
+def brute_force(matrix: np.ndarray, deadline: Deadline | None = None) -> SolveResult:
+    """Enumerate every permutation in vectorized chunks (exact, n <= 8)."""
+    n = matrix.shape[0] - 2
+    if n > BRUTE_FORCE_MAX_STOPS:
+        raise ValueError(f"brute force supports at most {BRUTE_FORCE_MAX_STOPS} stops")
+
+    best_order: np.ndarray | None = None
+    best_cost = np.inf
+    exhausted = False
+    perms = itertools.permutations(range(1, n + 1))
+    while True:
+        chunk = np.fromiter(
+            itertools.chain.from_iterable(itertools.islice(perms, 4096)), dtype=np.intp
+        )
+        if chunk.size == 0:
+            break
+        chunk = chunk.reshape(-1, n)
+        costs = (
+            matrix[0, chunk[:, 0]]
+            + matrix[chunk[:, :-1], chunk[:, 1:]].sum(axis=1)
+            + matrix[chunk[:, -1], n + 1]
+        )
+        idx = int(costs.argmin())
+        if costs[idx] < best_cost:
+            best_cost = float(costs[idx])
+            best_order = chunk[idx]
+        if deadline is not None and deadline.expired():
+            exhausted = True
+            break
+    return SolveResult(order=[int(i) for i in best_order], cost=best_cost, exhausted=exhausted)
+
+
+def held_karp(matrix: np.ndarray, deadline: Deadline | None = None) -> SolveResult | None:
+    """
+    Exact dynamic program over visited subsets.
+
+    Layers are processed by subset size so each step is a handful of array
+    operations. Returns ``None`` if the deadline expires before the table is
+    complete; callers fall back to a heuristic.
+    """
+    n = matrix.shape[0] - 2
+    if n > HELD_KARP_MAX_STOPS:
+        raise ValueError(f"Held-Karp supports at most {HELD_KARP_MAX_STOPS} stops")
+
+    dest = matrix[1 : n + 1, 1 : n + 1]
+    full = (1 << n) - 1
+    dp = np.full((1 << n, n), np.inf)
+    parent = np.full((1 << n, n), -1, dtype=np.int8)
+    singles = 1 << np.arange(n)
+    dp[singles, np.arange(n)] = matrix[0, 1 : n + 1]
+
+    masks = np.arange(1 << n)
+    popcount = np.zeros(1 << n, dtype=np.int8)
+    for bit in range(n):
+        popcount += (masks >> bit) & 1
+
+    for size in range(2, n + 1):
+        layer = masks[popcount == size]
+        for j in range(n):
+            sel = layer[(layer >> j) & 1 == 1]
+            prev = sel ^ (1 << j)
+            candidates = dp[prev] + dest[:, j]
+            best = candidates.argmin(axis=1)
+            dp[sel, j] = candidates[np.arange(len(sel)), best]
+            parent[sel, j] = best
+        if deadline is not None and deadline.expired():
+            return None
+
+    final = dp[full] + matrix[1 : n + 1, n + 1]
+    last = int(final.argmin())
+    order: list[int] = []
+    mask = full
+    while last >= 0:
+        order.append(last + 1)
+        prev = int(parent[mask, last])
+        mask ^= 1 << last
+        last = prev
+    order.reverse()
+    return SolveResult(order=order, cost=float(final.min()))
+
+
+def time_window_schedule(
+    durations: np.ndarray,
+    service: np.ndarray,
+    earliest: np.ndarray,
+    order: list[int],
+    departure: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Arrival and wait minutes along start -> order -> terminal (waiting allowed)."""
+    path = [0, *order, durations.shape[0] - 1]
+    arrivals = np.zeros(len(path))
+    waits = np.zeros(len(path))
+    arrivals[0] = departure
+    clock = departure
+    for pos in range(1, len(path)):
+        prev, node = path[pos - 1], path[pos]
+        reach = clock + service[prev] + durations[prev, node]
+        arrivals[pos] = max(reach, earliest[node])
+        waits[pos] = arrivals[pos] - reach
+        clock = arrivals[pos]
+    return arrivals, waits
+
+
+def _greedy_time_windows(
+    durations: np.ndarray,
+    service: np.ndarray,
+    earliest: np.ndarray,
+    latest: np.ndarray,
+    departure: float,
+) -> SolveResult | None:
+    """Earliest-deadline-first construction; ``None`` when it paints itself into a corner."""
+    n = durations.shape[0] - 2
+    unvisited = set(range(1, n + 1))
+    order: list[int] = []
+    current, finish = 0, departure + service[0]
+    while unvisited:
+        candidates = np.fromiter(unvisited, dtype=np.intp)
+        arrival = np.maximum(earliest[candidates], finish + durations[current, candidates])
+        feasible = arrival <= latest[candidates]
+        if not feasible.any():
+            return None
+        candidates, arrival = candidates[feasible], arrival[feasible]
+        pick = int(np.lexsort((arrival, latest[candidates]))[0])
+        current = int(candidates[pick])
+        finish = arrival[pick] + service[current]
+        order.append(current)
+        unvisited.discard(current)
+    return SolveResult(order=order, cost=float(finish + durations[current, n + 1]))
+
+
+def time_windows(
+    durations: np.ndarray,
+    service: np.ndarray,
+    earliest: np.ndarray,
+    latest: np.ndarray,
+    departure: float,
+    deadline: Deadline | None = None,
+) -> SolveResult | None:
+    """
+    Earliest-finish tour that reaches every stop inside ``[earliest, latest]``.
+
+    Up to ``HELD_KARP_MAX_STOPS`` this is the Held-Karp recursion over finish
+    times: arriving earlier never hurts when waiting is allowed, so the best
+    label per (subset, last stop) dominates. Partial tours that miss a window
+    become ``inf`` and are never extended. Larger problems, or an expired
+    budget, use an earliest-deadline-first construction. ``cost`` is the finish
+    time at the terminal; ``None`` means no feasible tour was found.
+    """
+    n = durations.shape[0] - 2
+    if n > HELD_KARP_MAX_STOPS:
+        return _greedy_time_windows(durations, service, earliest, latest, departure)
+
+    dest = durations[1 : n + 1, 1 : n + 1]
+    dest_service = service[1 : n + 1]
+    dest_earliest, dest_latest = earliest[1 : n + 1], latest[1 : n + 1]
+    full = (1 << n) - 1
+    finish = np.full((1 << n, n), np.inf)
+    parent = np.full((1 << n, n), -1, dtype=np.int8)
+
+    arrival = np.maximum(dest_earliest, departure + service[0] + durations[0, 1 : n + 1])
+    singles = 1 << np.arange(n)
+    finish[singles, np.arange(n)] = np.where(arrival <= dest_latest, arrival + dest_service, np.inf)
+
+    masks = np.arange(1 << n)
+    popcount = np.zeros(1 << n, dtype=np.int8)
+    for bit in range(n):
+        popcount += (masks >> bit) & 1
+
+    for size in range(2, n + 1):
+        layer = masks[popcount == size]
+        for j in range(n):
+            sel = layer[(layer >> j) & 1 == 1]
+            candidates = finish[sel ^ (1 << j)] + dest[:, j]
+            best = candidates.argmin(axis=1)
+            reach = candidates[np.arange(len(sel)), best]
+            arrival = np.maximum(dest_earliest[j], reach)
+            finish[sel, j] = np.where(arrival <= dest_latest[j], arrival + dest_service[j], np.inf)
+            parent[sel, j] = best
+        if not np.isfinite(finish[layer]).any():
+            return None  # every partial tour of this size already misses a window
+        if deadline is not None and deadline.expired():
+            fallback = _greedy_time_windows(durations, service, earliest, latest, departure)
+            if fallback is not None:
+                fallback.exhausted = True
+            return fallback
+
+    final = finish[full] + durations[1 : n + 1, n + 1]
+    if not np.isfinite(final).any():
+        return None
+    last = int(final.argmin())
+    order: list[int] = []
+    mask = full
+    while last >= 0:
+        order.append(last + 1)
+        prev = int(parent[mask, last])
+        mask ^= 1 << last
+        last = prev
+    order.reverse()
+    return SolveResult(order=order, cost=float(final.min()))
+
+
+def _best_two_opt(matrix: np.ndarray, path: np.ndarray) -> tuple[float, int, int]:
+    """Best segment reversal path[i+1..j] as (delta, i, j)."""
+    fwd = matrix[path[:-1], path[1:]]
+    rev = matrix[path[1:], path[:-1]]
+    fwd_cum = np.concatenate(([0.0], np.cumsum(fwd)))
+    rev_cum = np.concatenate(([0.0], np.cumsum(rev)))
+
+    last = len(path) - 1
+    i = np.arange(0, last - 1)[:, None]
+    j = np.arange(1, last)[None, :]
+    valid = j > i + 1
+    a, b = path[i], path[i + 1]
+    c, e = path[j], path[j + 1]
+    # Interior edges flip direction; recompute them via prefix sums for asymmetric costs
+    interior = (rev_cum[j] - rev_cum[i + 1]) - (fwd_cum[j] - fwd_cum[i + 1])
+    delta = matrix[a, c] + matrix[b, e] - matrix[a, b] - matrix[c, e] + interior
+    delta = np.where(valid, delta, np.inf)
+    flat = int(delta.argmin())
+    bi, bj = np.unravel_index(flat, delta.shape)
+    return float(delta[bi, bj]), int(bi), int(bj + 1)
+
+
+def _best_or_opt(
+    matrix: np.ndarray, path: np.ndarray, max_segment: int = 3
+) -> tuple[float, int, int, int]:
+    """Best relocation of a 1..3 node segment as (delta, start, length, insert_after)."""
+    best = (np.inf, 0, 0, 0)
+    last = len(path) - 1
+    for length in range(1, max_segment + 1):
+        starts = np.arange(1, last - length + 1)
+        if starts.size == 0:
+            break
+        seg_first, seg_last = path[starts], path[starts + length - 1]
+        before, after = path[starts - 1], path[starts + length]
+        removal = matrix[before, seg_first] + matrix[seg_last, after] - matrix[before, after]
+
+        edges = np.arange(0, last)
+        u, v = path[edges], path[edges + 1]
+        insertion = (
+            matrix[u[None, :], seg_first[:, None]]
+            + matrix[seg_last[:, None], v[None, :]]
+            - matrix[u, v][None, :]
+        )
+        s = starts[:, None]
+        # Edges touching or inside the segment are not valid insertion points
+        touching = (edges[None, :] >= s - 1) & (edges[None, :] <= s + length - 1)
+        delta = np.where(touching, np.inf, insertion - removal[:, None])
+        flat = int(delta.argmin())
+        si, ei = np.unravel_index(flat, delta.shape)
+        if delta[si, ei] < best[0]:
+            best = (float(delta[si, ei]), int(starts[si]), length, int(edges[ei]))
+    return best
+
+
+def local_search(
+    matrix: np.ndarray,
+    order: list[int],
+    deadline: Deadline | None = None,
+    use_or_opt: bool = True,
+    tolerance: float = 1e-9,
+) -> SolveResult:
+    """Steepest-descent 2-opt (plus Or-opt) with fully vectorized move evaluation."""
+    n = matrix.shape[0] - 2
+    path = np.concatenate(([0], np.asarray(order, dtype=np.intp), [n + 1]))
+    exhausted = False
+    while len(path) > 3:
+        if deadline is not None and deadline.expired():
+            exhausted = True
+            break
+        delta, i, j = _best_two_opt(matrix, path)
+        if delta < -tolerance:
+            path[i + 1 : j + 1] = path[i + 1 : j + 1][::-1]
+            continue
+        if not use_or_opt:
+            break
+        delta, start, length, after = _best_or_opt(matrix, path)
+        if delta >= -tolerance:
+            break
+        segment = path[start : start + length].copy()
+        rest = np.concatenate((path[:start], path[start + length :]))
+        insert_at = after + 1 if after < start else after + 1 - length
+        path = np.concatenate((rest[:insert_at], segment, rest[insert_at:]))
+
+    order = [int(node) for node in path[1:-1]]
+    return SolveResult(order=order, cost=tour_cost(matrix, order), exhausted=exhausted)
+
+
+def genetic(
+    matrix: np.ndarray,
+    population_size: int = 50,
+    generations: int = 100,
+    deadline: Deadline | None = None,
+    rng: random.Random | None = None,
+) -> SolveResult:
+    """Order-crossover genetic search with vectorized population fitness."""
+    rng = rng or random.Random()
+    n = matrix.shape[0] - 2
+    genes = list(range(1, n + 1))
+    population = np.array([rng.sample(genes, n) for _ in range(population_size)], dtype=np.intp)
+    elite_size = max(2, population_size // 4)
+
+    def fitness(pop: np.ndarray) -> np.ndarray:
+        return (
+            matrix[0, pop[:, 0]]
+            + matrix[pop[:, :-1], pop[:, 1:]].sum(axis=1)
+            + matrix[pop[:, -1], n + 1]
+        )
+
+    def crossover(parent1: np.ndarray, parent2: np.ndarray) -> np.ndarray:
+        if n < 2:
+            return parent1.copy()
+        start_idx = rng.randint(0, n - 2)
+        end_idx = rng.randint(start_idx + 1, n)
+        child = np.full(n, -1, dtype=np.intp)
+        child[start_idx:end_idx] = parent1[start_idx:end_idx]
+        taken = set(child[start_idx:end_idx].tolist())
+        fill = [g for g in np.concatenate((parent2[end_idx:], parent2[:end_idx])) if g not in taken]
+        positions = [(end_idx + k) % n for k in range(len(fill))]
+        child[positions] = fill
+        return child
+
+    exhausted = False
+    for _generation in range(generations):
+        ranked = population[np.argsort(fitness(population))]
+        elite = ranked[:elite_size]
+        children = []
+        while len(children) < population_size - elite_size:
+            child = crossover(elite[rng.randrange(elite_size)], elite[rng.randrange(elite_size)])
+            if n > 1 and rng.random() < 0.1:
+                a, b = rng.sample(range(n), 2)
+                child[a], child[b] = child[b], child[a]
+            children.append(child)
+        population = np.vstack([elite, *children]) if children else elite
+        if deadline is not None and deadline.expired():
+            exhausted = True
+            break
+
+    scores = fitness(population)
+    best = population[int(scores.argmin())]
+    return SolveResult(order=[int(g) for g in best], cost=float(scores.min()), exhausted=exhausted)
+
+
+__all__ = [
+    "BRUTE_FORCE_MAX_STOPS",
+    "HELD_KARP_MAX_STOPS",
+    "Deadline",
+    "SolveResult",
+    "brute_force",
+    "genetic",
+    "held_karp",
+    "local_search",
+    "nearest_neighbor",
+    "time_window_schedule",
+    "time_windows",
+    "tour_cost",
+]
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import math
 import time
@@ -10,10 +9,21 @@ from uuid import uuid4
 from fastapi import Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Scope
+
+from .middleware import PipelineStage, add_pipeline_stage
+from .rate_limit import (
+    BucketResult,
+    LocalBucketStore,
+    RedisBucketStore,
+    parse_route_costs,
+    route_cost,
+)
 from .settings import settings
 
+logger = logging.getLogger(__name__)
+
 # Context variable for request ID (accessible throughout the request lifecycle)
 request_id_ctx: ContextVar[str] = ContextVar("request_id", default="")
 
@@ -33,30 +43,29 @@ def add_cors(app):
     )
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
-        response = await call_next(request)
-        headers = {
-            "X-Frame-Options": "DENY",
-            "X-Content-Type-Options": "nosniff",
-            "X-XSS-Protection": "1; mode=block",
-            "Referrer-Policy": "no-referrer",
-            "Permissions-Policy": "camera=(), microphone=(), geolocation=()",
-        }
-        if request.url.scheme in {"https", "wss"}:
-            headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains"
-        for key, value in headers.items():
-            response.headers.setdefault(key, value)
-        return response
+class SecurityHeadersStage(PipelineStage):
+    HEADERS = (
+        ("X-Frame-Options", "DENY"),
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Referrer-Policy", "no-referrer"),
+        ("Permissions-Policy", "camera=(), microphone=(), geolocation=()"),
+    )
+
+    def on_response(self, scope: Scope, state, headers: MutableHeaders, status_code: int) -> None:
+        for key, value in self.HEADERS:
+            headers.setdefault(key, value)
+        if scope.get("scheme") in {"https", "wss"}:
+            headers.setdefault("Strict-Transport-Security", "max-age=63072000; includeSubDomains")
 
 
 def add_security_headers(app):
-    app.add_middleware(SecurityHeadersMiddleware)
+    add_pipeline_stage(app, SecurityHeadersStage())
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
+class RequestIDStage(PipelineStage):
     """
-    Middleware to add request ID tracing for distributed debugging.
+    Request ID tracing for distributed debugging.
 
     Features:
     - Generates UUID for each request or uses existing X-Request-ID header
@@ -65,25 +74,20 @@ class RequestIDMiddleware(BaseHTTPMiddleware):
     - Integrates with logging for structured logs
     """
 
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
+    async def on_request(self, scope: Scope, state):
         # Get or generate request ID
-        request_id = request.headers.get("X-Request-ID")
-        if not request_id:
-            request_id = str(uuid4())
+        request_id = Headers(scope=scope).get("x-request-id") or str(uuid4())
 
         # Set in context variable for access throughout request
         request_id_ctx.set(request_id)
 
-        # Add to request state for easy access in route handlers
-        request.state.request_id = request_id
-
-        # Process request
-        response = await call_next(request)
+        # Exposed to route handlers as request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        state["request_id"] = request_id
+        return None
 
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request_id
-
-        return response
+    def on_response(self, scope: Scope, state, headers: MutableHeaders, status_code: int) -> None:
+        headers["X-Request-ID"] = state["request_id"]
 
 
 class RequestIDLogFilter(logging.Filter):
@@ -104,8 +108,8 @@ class RequestIDLogFilter(logging.Filter):
 
 
 def add_request_id_tracing(app):
-    """Add request ID middleware and configure logging."""
-    app.add_middleware(RequestIDMiddleware)
+    """Add request ID tracing and configure logging."""
+    add_pipeline_stage(app, RequestIDStage())
 
     # Add filter to root logger
     logging.getLogger().addFilter(RequestIDLogFilter())
@@ -116,22 +120,26 @@ def get_request_id() -> str:
     return request_id_ctx.get("")
 
 
-class RateLimiter:
-    def __init__(self, shards: int = 32) -> None:
-        self._buckets: dict[str, dict[str, float]] = {}
-        self._locks = [asyncio.Lock() for _ in range(max(1, shards))]
+class RateLimiter(PipelineStage):
+    def __init__(self, redis_store: RedisBucketStore | None = None) -> None:
+        self._local = LocalBucketStore(settings.RATE_LIMIT_MAX_LOCAL_BUCKETS)
+        self._redis = redis_store
+        self._redis_resolved = redis_store is not None
+        self._redis_retry_at = 0.0
+        self._route_costs_raw: str | None = None
+        self._route_costs: list[tuple[str, int]] = []
 
-    async def dispatch(self, request: Request, call_next):
+    async def on_request(self, scope: Scope, state):
         limit = settings.RATE_LIMIT_REQUESTS
         window = settings.RATE_LIMIT_WINDOW_SECONDS
         if not settings.RATE_LIMIT_ENABLED or limit <= 0 or window <= 0:
-            return await call_next(request)
+            return None
 
-        identifier = self._identifier_for(request)
-        now = time.monotonic()
-        allowed, remaining, reset_in = await self._consume(identifier, limit, window, now)
-        if not allowed:
-            retry_after = max(1, math.ceil(reset_in))
+        identifier = self._identifier_for(Request(scope))
+        cost = min(limit, route_cost(scope["path"], self._costs()))
+        result = await self._consume(identifier, limit, limit / window, cost)
+        if not result.allowed:
+            retry_after = max(1, math.ceil(result.reset_in))
             headers = {
                 "Retry-After": str(retry_after),
                 "X-RateLimit-Limit": str(limit),
@@ -143,41 +151,56 @@ class RateLimiter:
                 content={"detail": "Too many requests"},
                 headers=headers,
             )
-
-        response = await call_next(request)
-        response.headers.setdefault("X-RateLimit-Limit", str(limit))
-        response.headers["X-RateLimit-Remaining"] = str(max(0, remaining))
-        response.headers["X-RateLimit-Reset"] = str(max(0, math.ceil(reset_in)))
-        return response
-
-    async def _consume(self, identifier: str, limit: int, window: int, now: float):
-        refill_rate = limit / window
-        lock = self._locks[hash(identifier) % len(self._locks)]
-        async with lock:
-            bucket = self._buckets.get(identifier)
-            if not bucket:
-                self._buckets[identifier] = {"tokens": float(limit - 1), "last": now}
-                return True, limit - 1, 0
-
-            tokens = bucket["tokens"]
-            elapsed = max(0.0, now - bucket["last"])
-            tokens = min(float(limit), tokens + elapsed * refill_rate)
-            bucket["last"] = now
-
-            if tokens >= 1:
-                tokens -= 1
-                bucket["tokens"] = tokens
-                # Estimate time until bucket fully refilled
-                reset_in = (limit - tokens) / refill_rate if tokens < limit else 0
-                return True, int(tokens), reset_in
-
-            bucket["tokens"] = tokens
-            deficit = 1 - tokens
-            reset_in = deficit / refill_rate if refill_rate else window
-            return False, 0, reset_in
+        state["rate_limit"] = (limit, result)
+        return None
+
+    def on_response(self, scope: Scope, state, headers: MutableHeaders, status_code: int) -> None:
+        if "rate_limit" not in state:
+            return
+        limit, result = state["rate_limit"]
+        headers.setdefault("X-RateLimit-Limit", str(limit))
+        headers["X-RateLimit-Remaining"] = str(max(0, result.remaining))
+        headers["X-RateLimit-Reset"] = str(max(0, math.ceil(result.reset_in)))
+
+    def _costs(self) -> list[tuple[str, int]]:
+        raw = settings.RATE_LIMIT_ROUTE_COSTS
+        if raw != self._route_costs_raw:
+            self._route_costs = parse_route_costs(raw)
+            self._route_costs_raw = raw
+        return self._route_costs
+
+    def _redis_store(self) -> RedisBucketStore | None:
+        if not self._redis_resolved:
+            from .redis_client import get_async_redis_client
+
+            client = get_async_redis_client()
+            self._redis = RedisBucketStore(client) if client is not None else None
+            self._redis_resolved = True
+        return self._redis
+
+    async def _consume(
+        self, identifier: str, limit: int, rate: float, cost: int = 1
+    ) -> BucketResult:
+        store = self._redis_store()
+        if store is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                return await store.consume(identifier, limit, rate, cost)
+            except Exception as exc:
+                # Per-worker limits beat no limits while Redis is unreachable
+                self._redis_retry_at = time.monotonic() + settings.RATE_LIMIT_REDIS_RETRY_SECONDS
+                logger.warning("Redis rate limiting unavailable, using local buckets: %s", exc)
+        return self._local.consume(identifier, limit, rate, cost)
 
     def reset(self) -> None:
-        self._buckets.clear()
+        self._local.reset()
+
+    def get_stats(self) -> dict[str, object]:
+        using_redis = self._redis is not None and time.monotonic() >= self._redis_retry_at
+        return {
+            "backend": "redis" if using_redis else "local",
+            "local_buckets": len(self._local),
+            "local_evictions": self._local.evictions,
+        }
 
     def _identifier_for(self, request: Request) -> str:
         """
@@ -293,7 +316,4 @@ class RateLimiter:
 def add_rate_limiting(app):
     limiter = RateLimiter()
     app.state.rate_limiter = limiter
-
-    @app.middleware("http")
-    async def _rate_limit(request: Request, call_next):  # type: ignore[override]
-        return await limiter.dispatch(request, call_next)
+    add_pipeline_stage(app, limiter)
@@ -2,16 +2,17 @@
 
 from __future__ import annotations
 
-import re
-from collections.abc import Callable
+from typing import Any
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import Scope
 
+from .middleware import PipelineStage, add_pipeline_stage
 
-class APIVersionMiddleware(BaseHTTPMiddleware):
+
+class APIVersionStage(PipelineStage):
     """
-    Middleware to add API versioning headers and deprecation warnings.
+    Pipeline stage adding API versioning headers and deprecation warnings.
 
     Features:
     - Adds X-API-Version header to all responses
@@ -29,20 +30,17 @@ class APIVersionMiddleware(BaseHTTPMiddleware):
         "/",  # Root redirect
     }
 
-    # Static file patterns (should not have deprecation warnings)
-    STATIC_PATTERNS = [
-        r"^/assets/.*",
-        r"^/static/.*",
-        r"^/favicon\.ico$",
-    ]
+    # Static file prefixes (should not have deprecation warnings)
+    STATIC_PREFIXES = ("/assets/", "/static/")
 
-    def __init__(self, app, current_version: str = "1.0", latest_version: str = "1.0"):
-        super().__init__(app)
+    def __init__(self, current_version: str = "1.0", latest_version: str = "1.0"):
         self.current_version = current_version
         self.latest_version = latest_version
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        path = request.url.path
+    def on_response(
+        self, scope: Scope, state: dict[str, Any], headers: MutableHeaders, status_code: int
+    ) -> None:
+        path = scope["path"]
 
         # Determine if this is a versioned endpoint
         is_versioned = path.startswith("/v1/") or path.startswith("/v2/")
@@ -56,36 +54,31 @@ class APIVersionMiddleware(BaseHTTPMiddleware):
             # Unversioned endpoint - treat as v1 for backward compatibility
             api_version = self.current_version
 
-        # Process request
-        response = await call_next(request)
-
         # Add version headers
-        response.headers["X-API-Version"] = api_version
-        response.headers["X-API-Latest-Version"] = self.latest_version
+        headers["X-API-Version"] = api_version
+        headers["X-API-Latest-Version"] = self.latest_version
 
         # Add deprecation warning for unversioned endpoints
         if not is_versioned and not self._is_exempt(path):
-            response.headers["Deprecation"] = "true"
-            response.headers["Sunset"] = "2026-12-31"  # Sunset date for unversioned API
-            response.headers["Link"] = f'</v1{path}>; rel="successor-version"'
-            response.headers["Warning"] = (
+            headers["Deprecation"] = "true"
+            headers["Sunset"] = "2026-12-31"  # Sunset date for unversioned API
+            headers["Link"] = f'</v1{path}>; rel="successor-version"'
+            headers["Warning"] = (
                 '299 - "Unversioned API endpoints are deprecated. Use /v1/* instead."'
             )
 
-        return response
-
     def _is_exempt(self, path: str) -> bool:
         """Check if path is exempt from deprecation warnings."""
         # Check exact matches
         if path in self.EXEMPT_PATHS:
             return True
 
-        # Check pattern matches
-        for pattern in self.STATIC_PATTERNS:
-            if re.match(pattern, path):
-                return True
+        # Static files
+        return path.startswith(self.STATIC_PREFIXES) or path == "/favicon.ico"
+
 
-        return False
+def add_api_versioning(app, current_version: str = "1.0", latest_version: str = "1.0"):
+    add_pipeline_stage(app, APIVersionStage(current_version, latest_version))
 
 
-__all__ = ["APIVersionMiddleware"]
+__all__ = ["APIVersionStage", "add_api_versioning"]
@@ -18,6 +18,8 @@ test_data_dir = ROOT / "artifacts" / "test-data"
 test_data_dir.mkdir(parents=True, exist_ok=True)
 os.environ["DATA_DIR"] = str(test_data_dir)
 
+from backend.app import eta_model  # noqa: E402
+from backend.app.eta_model import EtaSampleLog  # noqa: E402
 from backend.app.main import app  # noqa: E402
 from backend.app.settings import settings  # noqa: E402
 from backend.app.storage import DB  # noqa: E402
@@ -49,3 +51,20 @@ def clean_reservations() -> None:
     _purge_reservations()
     yield
     _purge_reservations()
+
+
+@pytest.fixture(autouse=True)
+def isolated_eta_learning(tmp_path, monkeypatch):
+    """ETA learning is off unless a test opts in, and then writes under tmp_path."""
+    monkeypatch.setattr(settings, "ETA_MODEL_ENABLED", False)
+    monkeypatch.setattr(settings, "TRAFFIC_HISTORY_ENABLED", False)
+    monkeypatch.setattr(eta_model, "_sample_log", None)
+    monkeypatch.setattr(eta_model, "_model", None)
+    monkeypatch.setattr(eta_model, "_model_loaded", False)
+    monkeypatch.setattr(eta_model, "model_path", lambda: tmp_path / "eta_model.npz")
+    monkeypatch.setattr(
+        eta_model, "EtaSampleLog", lambda: EtaSampleLog(tmp_path / "eta_samples.db")
+    )
+    yield
+    if eta_model._sample_log is not None:
+        eta_model._sample_log.close()
@@ -0,0 +1,68 @@
+"""Tests for route-projected arrival ETAs."""
+
+from __future__ import annotations
+
+import pytest
+from backend.app import arrival_tracking
+from backend.app.arrival_tracking import ArrivalRouteTracker, RouteSnapshot
+from backend.app.maps import EtaComputation
+
+# An L-shaped route: ~1.1 km north, then ~0.85 km east
+ROUTE = [(40.37, 49.83), (40.38, 49.83), (40.38, 49.84)]
+
+
+def _eta(geometry=ROUTE) -> EtaComputation:
+    return EtaComputation(
+        eta_minutes=8,
+        eta_seconds=480,
+        route_distance_km=2.0,
+        traffic_condition="moderate",
+        provider="gomap",
+        route_geometry=geometry,
+    )
+
+
+class TestRouteSnapshot:
+    def test_projects_onto_nearest_segment(self):
+        snapshot = RouteSnapshot.from_eta(_eta())
+        corner = snapshot.project(40.38, 49.83)
+        # 20 m west of the first leg, halfway along it
+        beside = snapshot.project(40.375, 49.82976)
+
+        assert corner.offset_m == pytest.approx(0, abs=1)
+        assert corner.along_m == pytest.approx(1112, rel=0.01)
+        assert beside.offset_m == pytest.approx(20, abs=2)
+        assert beside.along_m == pytest.approx(556, rel=0.01)
+
+    def test_estimate_scales_remaining_route(self):
+        snapshot = RouteSnapshot.from_eta(_eta())
+        estimate = snapshot.estimate(snapshot.project(40.38, 49.835))
+
+        assert 0.2 < estimate.route_distance_km / 2.0 < 0.25
+        assert estimate.eta_seconds == pytest.approx(480 * estimate.route_distance_km / 2.0, abs=5)
+        assert estimate.traffic_condition == "moderate"
+        assert estimate.route_geometry is None
+
+    def test_requires_geometry(self):
+        assert RouteSnapshot.from_eta(_eta(geometry=None)) is None
+        assert RouteSnapshot.from_eta(_eta(geometry=[(40.37, 49.83)])) is None
+
+
+class TestArrivalRouteTracker:
+    def test_reroutes_after_deviation(self, monkeypatch):
+        monkeypatch.setattr(arrival_tracking.settings, "ARRIVAL_REROUTE_DEVIATION_METERS", 50.0)
+        tracker = ArrivalRouteTracker()
+        assert tracker.estimate("r1", 40.375, 49.83) is None
+
+        tracker.remember("r1", _eta())
+
+        assert tracker.estimate("r1", 40.375, 49.8301) is not None
+        assert tracker.estimate("r1", 40.375, 49.835) is None
+        assert tracker.get_stats()["local_estimates"] == 1
+
+    def test_snapshot_expires_after_refresh_interval(self, monkeypatch):
+        monkeypatch.setattr(arrival_tracking.settings, "ARRIVAL_REROUTE_INTERVAL_SECONDS", 0)
+        tracker = ArrivalRouteTracker()
+        tracker.remember("r1", _eta())
+
+        assert tracker.estimate("r1", 40.375, 49.83) is None
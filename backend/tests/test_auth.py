@@ -1,9 +1,17 @@
 from __future__ import annotations
 
+import threading
+import time
+
 import pytest
+from backend.app import auth
 from backend.app.main import app
 from backend.app.settings import settings
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+from jose import jwk, jwt
 
 client = TestClient(app)
 
@@ -27,3 +35,117 @@ def test_session_requires_token_when_not_bypassed():
     settings.AUTH0_BYPASS = False
     resp = client.get("/auth/session")
     assert resp.status_code == 401
+
+
+def _signing_key(kid: str) -> tuple[bytes, dict]:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, algorithm="RS256").to_dict()
+    public_jwk["kid"] = kid
+    return private_pem, public_jwk
+
+
+KEY_A = _signing_key("key-a")
+KEY_B = _signing_key("key-b")
+
+
+def _token(key: tuple[bytes, dict], sub: str = "user-1", scope: str = "demo") -> str:
+    now = int(time.time())
+    claims = {
+        "sub": sub,
+        "scope": scope,
+        "aud": "https://api.bakureserve.test",
+        "iss": "https://tenant.auth0.test/",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, key[0], algorithm="RS256", headers={"kid": key[1]["kid"]})
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    monkeypatch.setattr(auth.settings, "AUTH0_DOMAIN", "tenant.auth0.test")
+    monkeypatch.setattr(auth.settings, "AUTH0_AUDIENCE", "https://api.bakureserve.test")
+    instance = auth.Auth0Verifier()
+    instance.jwks = {"keys": [KEY_A[1]]}
+    instance.fetches = 0
+
+    def fake_fetch():
+        instance.fetches += 1
+        return instance.jwks
+
+    monkeypatch.setattr(instance, "_fetch_jwks", fake_fetch)
+    return instance
+
+
+def test_repeat_tokens_skip_signature_check(verifier, monkeypatch):
+    decodes = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decodes.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    token = _token(KEY_A)
+
+    first = verifier.verify(token)
+    second = verifier.verify(token)
+
+    assert first == second
+    assert first["sub"] == "user-1"
+    assert len(decodes) == 1
+    assert verifier.fetches == 1
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify(token, required_scopes=["admin"])
+    assert exc.value.status_code == 403
+
+
+def test_stale_keys_served_while_refreshing(verifier, monkeypatch):
+    verifier.verify(_token(KEY_A))
+    verifier._jwks_expiry = time.time() - 1
+    release = threading.Event()
+    original_fetch = verifier._fetch_jwks
+
+    def slow_fetch():
+        release.wait(5)
+        return original_fetch()
+
+    monkeypatch.setattr(verifier, "_fetch_jwks", slow_fetch)
+
+    claims = verifier.verify(_token(KEY_A, sub="user-2"))
+
+    assert claims["sub"] == "user-2"
+    refresh = verifier._refresh_thread
+    assert refresh is not None and refresh.is_alive()
+    release.set()
+    refresh.join(5)
+    assert verifier.fetches == 2
+    assert verifier._jwks_expiry > time.time()
+
+
+def test_rotated_keys_refetched_and_revoked_claims_dropped(verifier):
+    cached_token = _token(KEY_A)
+    verifier.verify(cached_token)
+    verifier.jwks = {"keys": [KEY_B[1]]}
+    verifier._jwks_fetched_at -= auth.settings.AUTH0_JWKS_MIN_REFRESH_SECONDS
+
+    assert verifier.verify(_token(KEY_B))["sub"] == "user-1"
+    assert verifier.fetches == 2
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify(cached_token)
+    assert exc.value.status_code == 401
+
+
+def test_unknown_key_refetch_is_throttled(verifier):
+    verifier.verify(_token(KEY_A))
+    with pytest.raises(HTTPException):
+        verifier.verify(_token(KEY_B))
+    assert verifier.fetches == 1
@@ -0,0 +1,120 @@
+"""Tests for the autocomplete WebSocket debouncing and delta frames."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from backend.app import autocomplete_endpoint
+from backend.app.autocomplete_endpoint import build_results_delta
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+
+class RecordingBatcher:
+    """Stand-in for the request batcher that records upstream queries."""
+
+    def __init__(self, responses: dict[str, list[dict]] | None = None, delay: float = 0.0):
+        self.responses = responses or {}
+        self.delay = delay
+        self.calls: list[str] = []
+
+    async def submit(self, query: str, query_type: str = "search", **params):
+        self.calls.append(query)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.responses.get(query, [{"name": query}])
+
+
+@pytest.fixture
+def ws_app(monkeypatch):
+    batcher = RecordingBatcher()
+    monkeypatch.setattr(autocomplete_endpoint, "get_autocomplete_batcher", lambda: batcher)
+    monkeypatch.setattr(autocomplete_endpoint.settings, "AUTOCOMPLETE_WS_DEBOUNCE_MS", 150)
+    app = FastAPI()
+    app.include_router(autocomplete_endpoint.router)
+    return app, batcher
+
+
+class TestResultsDelta:
+    def test_reuses_rows_from_previous_frame(self):
+        previous = [{"name": "Firuze"}, {"name": "Sumakh"}]
+        current = [{"name": "Sumakh"}, {"name": "Chinar"}]
+        assert build_results_delta(previous, current) == [1, {"name": "Chinar"}]
+
+    def test_no_overlap_returns_none(self):
+        assert build_results_delta([{"name": "A"}], [{"name": "B"}]) is None
+        assert build_results_delta(None, [{"name": "B"}]) is None
+
+
+class TestAutocompleteWebSocket:
+    def test_superseded_queries_never_reach_upstream(self, ws_app):
+        app, batcher = ws_app
+        with TestClient(app).websocket_connect("/api/v1/search/autocomplete/ws") as ws:
+            for query in ("f", "fi", "fir"):
+                ws.send_json({"query": query})
+            frame = ws.receive_json()
+
+        assert frame["query"] == "fir"
+        assert frame["seq"] == 1
+        assert batcher.calls == ["fir"]
+
+    def test_delta_frames_when_opted_in(self, ws_app):
+        app, batcher = ws_app
+        shared = {"name": "Firuze", "address": "Rasul Rza 5"}
+        batcher.responses = {
+            "fi": [shared, {"name": "Fisincan"}],
+            "fir": [shared],
+        }
+        with TestClient(app).websocket_connect("/api/v1/search/autocomplete/ws?delta=1") as ws:
+            ws.send_json({"query": "fi"})
+            first = ws.receive_json()
+            ws.send_json({"query": "fir"})
+            second = ws.receive_json()
+
+        assert first["results"] == batcher.responses["fi"]
+        assert second["type"] == "delta"
+        assert second["base_seq"] == first["seq"]
+        assert second["patch"] == [0]
+
+    def test_empty_query_skips_batcher(self, ws_app):
+        app, batcher = ws_app
+        with TestClient(app).websocket_connect("/api/v1/search/autocomplete/ws") as ws:
+            ws.send_json({"query": "   "})
+            frame = ws.receive_json()
+
+        assert frame["results"] == []
+        assert batcher.calls == []
+
+    def test_upstream_failure_sends_error_frame(self, ws_app):
+        app, batcher = ws_app
+
+        async def failing_submit(query, query_type="search", **params):
+            batcher.calls.append(query)
+            if query == "boom":
+                raise RuntimeError("processor failed")
+            return [{"name": query}]
+
+        batcher.submit = failing_submit
+        with TestClient(app).websocket_connect("/api/v1/search/autocomplete/ws") as ws:
+            ws.send_json({"query": "boom"})
+            failed = ws.receive_json()
+            ws.send_json({"query": "firuze"})
+            recovered = ws.receive_json()
+
+        assert failed["results"] == [] and failed["error"]
+        assert recovered["results"] == [{"name": "firuze"}]
+
+    def test_worker_crash_closes_socket(self, ws_app, monkeypatch):
+        app, _batcher = ws_app
+
+        async def crash(self, data):
+            raise RuntimeError("worker bug")
+
+        monkeypatch.setattr(autocomplete_endpoint.AutocompleteSession, "_resolve", crash)
+        with TestClient(app).websocket_connect("/api/v1/search/autocomplete/ws") as ws:
+            ws.send_json({"query": "firuze"})
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+
+        assert closed.value.code == 1011
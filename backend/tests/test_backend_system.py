@@ -6,9 +6,11 @@ from uuid import uuid4
 
 import pytest
 from backend.app.api.routes import reservations as reservations_routes
+from backend.app.arrival_tracking import arrival_routes
 from backend.app.availability import availability_for_day
 from backend.app.contracts import ReservationCreate
 from backend.app.gomap import GoMapRoute
+from backend.app.maps import EtaComputation
 from backend.app.serializers import absolute_media_list, absolute_media_url
 from backend.app.settings import settings
 from backend.app.storage import DB
@@ -269,6 +271,64 @@ def test_arrival_location_suggestions_use_last_location(client: TestClient, monk
     assert suggestions, "Expected at least one suggestion"
 
 
+def test_arrival_pings_follow_route_without_rerouting(client: TestClient, monkeypatch) -> None:
+    day = _iso_today()
+    slot = _viable_slot(client, day)
+    created = client.post(
+        "/reservations",
+        json={
+            "restaurant_id": RID,
+            "party_size": 2,
+            "start": slot["start"],
+            "end": slot["end"],
+            "guest_name": "Route Follower",
+            "table_id": slot["available_table_ids"][0],
+        },
+    )
+    assert created.status_code == 201
+    resid = created.json()["id"]
+    restaurant = DB.get_restaurant(RID)
+    dest = (float(restaurant["latitude"]), float(restaurant["longitude"]))
+    start = (dest[0] - 0.03, dest[1] - 0.03)
+    upstream_calls: list[tuple[float, float]] = []
+
+    def fake_eta(origin_lat, origin_lon, dest_lat, dest_lon):
+        upstream_calls.append((origin_lat, origin_lon))
+        return EtaComputation(
+            eta_minutes=10,
+            eta_seconds=600,
+            route_distance_km=4.2,
+            provider="gomap",
+            route_geometry=[(origin_lat, origin_lon), (dest_lat, dest_lon)],
+        )
+
+    arrival_routes.clear()
+    monkeypatch.setattr(reservations_routes, "compute_eta_with_traffic", fake_eta)
+    monkeypatch.setattr(settings, "LOCATION_PING_MIN_INTERVAL_SECONDS", 0)
+
+    etas = []
+    for step in range(0, 10, 2):
+        frac = step / 10
+        ping = {
+            "latitude": start[0] + (dest[0] - start[0]) * frac,
+            "longitude": start[1] + (dest[1] - start[1]) * frac,
+        }
+        resp = client.post(f"/reservations/{resid}/arrival_intent/location", json=ping)
+        assert resp.status_code == 200
+        etas.append(resp.json()["arrival_intent"]["predicted_eta_seconds"])
+
+    assert len(upstream_calls) == 1
+    assert etas == sorted(etas, reverse=True)
+    assert etas[-1] == pytest.approx(600 * 0.2, abs=2)
+
+    # Leaving the route by ~1 km asks the provider again
+    detour = {"latitude": dest[0] - 0.005, "longitude": dest[1] + 0.01}
+    resp = client.post(f"/reservations/{resid}/arrival_intent/location", json=detour)
+    assert resp.status_code == 200
+    assert len(upstream_calls) == 2
+    arrival_routes.clear()
+
+
 def test_reservations_are_scoped_per_owner(client: TestClient, monkeypatch) -> None:
     from backend.app import auth
 
@@ -1,7 +1,9 @@
 """Test caching implementation."""
 
 import time
+from dataclasses import dataclass
 
+from backend.app import geohash
 from backend.app.cache import (
     CacheEntry,
     TTLCache,
@@ -9,10 +11,12 @@ from backend.app.cache import (
     cache_route,
     cache_traffic,
     clear_all_caches,
+    get_all_cache_stats,
     get_cached_geocode,
     get_cached_route,
     get_cached_traffic,
     make_cache_key,
+    traffic_tile_id,
 )
 
 
@@ -247,6 +251,16 @@ class TestCacheHelpers:
         cached = get_cached_traffic(40.1, 49.2, 3.0)
         assert cached is None
 
+    def test_traffic_cache_snaps_to_tiles(self):
+        """Nearby points and radii in the same class should share one traffic entry."""
+        clear_all_caches()
+
+        cache_traffic(40.4093, 49.8671, 2.0, {"severity": 3})
+
+        assert get_cached_traffic(40.4121, 49.8689, 1.5) == {"severity": 3}
+        assert get_cached_traffic(40.4151, 49.8671, 2.0) is None
+        assert traffic_tile_id(40.4093, 49.8671) == "40.41,49.87"
+
     def test_clear_all_caches(self):
         """Clear all caches should remove all cached data."""
         # Add data to different caches
@@ -266,3 +280,65 @@ class TestCacheHelpers:
         assert get_cached_route(40.1, 49.2, 40.3, 49.4) is None
         assert get_cached_geocode("test") is None
         assert get_cached_traffic(40.1, 49.2, 2.0) is None
+
+
+class TestSnappedRouteCache:
+    """Test geohash-snapped route caching."""
+
+    def test_geohash_encoding_and_neighbors(self):
+        """Geohash cells should match the reference encoding and tile their surroundings."""
+        assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+        cell = geohash.encode(40.4093, 49.8671, 7)
+        around = geohash.neighbors(cell)
+        assert len(set(around)) == 8
+        assert cell not in around
+
+    def test_nearby_origin_reuses_route_with_correction(self):
+        """A route from a neighbouring cell should be adjusted for the extra leg."""
+        clear_all_caches()
+        route = RouteStub(distance_km=5.0, duration_seconds=600, geometry=[(40.4, 49.85)])
+        cache_route(40.4000, 49.8500, 40.4300, 49.8800, route)
+
+        farther = get_cached_route(40.3985, 49.8485, 40.4300, 49.8800)
+
+        assert farther.distance_km > 5.0
+        assert farther.duration_seconds > 600
+        assert farther.geometry[0] == (40.3985, 49.8485)
+        # Already past the cached origin: the shifted route would backtrack
+        assert get_cached_route(40.4015, 49.8515, 40.4300, 49.8800) is None
+        assert get_cached_route(40.4000, 49.8500, 40.4300, 49.8800) is route
+        # Origins beyond the neighbour limit and other destinations still miss
+        assert get_cached_route(40.4100, 49.8500, 40.4300, 49.8800) is None
+        assert get_cached_route(40.4000, 49.8500, 40.4301, 49.8800) is None
+
+    def test_neighbor_hit_follows_the_route_heading(self):
+        """The first leg of the geometry, not the bearing to the destination, decides."""
+        clear_all_caches()
+        # Leaves west before turning towards the destination in the north-east
+        geometry = [(40.4000, 49.8500), (40.4000, 49.8450), (40.4300, 49.8800)]
+        route = RouteStub(distance_km=5.0, duration_seconds=600, geometry=geometry)
+        cache_route(40.4000, 49.8500, 40.4300, 49.8800, route)
+
+        behind = get_cached_route(40.4000, 49.8510, 40.4300, 49.8800)
+        assert behind is not None
+        assert behind.geometry[0] == (40.4000, 49.8510)
+        assert get_cached_route(40.4000, 49.8490, 40.4300, 49.8800) is None
+
+    def test_neighbor_probe_counts_as_one_lookup(self):
+        """Probing neighbouring cells should record a single miss."""
+        clear_all_caches()
+        before = get_all_cache_stats()["routes"]
+
+        get_cached_route(40.4, 49.85, 40.43, 49.88)
+
+        after = get_all_cache_stats()["routes"]
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] == before["hits"]
+
+
+@dataclass
+class RouteStub:
+    distance_km: float
+    duration_seconds: int
+    geometry: list[tuple[float, float]] | None = None
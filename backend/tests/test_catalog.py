@@ -0,0 +1,137 @@
+"""Tests for compiling the restaurant catalog and its binary snapshot."""
+
+from __future__ import annotations
+
+import json
+import pickle
+
+import pytest
+from backend.app import catalog as catalog_module
+from backend.app import concierge_service, storage
+from backend.app.catalog import (
+    compile_catalog,
+    content_hash,
+    load_catalog,
+    read_snapshot,
+    snapshot_path,
+    write_snapshot,
+)
+from backend.app.settings import settings
+
+SEED = [
+    {
+        "id": "r1",
+        "name": "Sahil Bar",
+        "cuisine": ["Azerbaijani", "Seafood"],
+        "tags": ["waterfront", "live_music"],
+        "price_level": "AZN 3/4",
+        "areas": [
+            {
+                "id": "a1",
+                "tables": [{"id": "t2", "capacity": 6}, {"id": "t1", "capacity": 2}],
+            }
+        ],
+    },
+    {"name": "Chayki Tea House", "cuisine": ["Tea"], "photos": ["/assets/tea.jpg"]},
+]
+
+
+@pytest.fixture
+def seed_path(tmp_path):
+    path = tmp_path / "restaurants.json"
+    path.write_text(json.dumps(SEED), encoding="utf-8")
+    return path
+
+
+class TestCatalogSnapshot:
+    def test_round_trip_matches_json_build(self, seed_path):
+        compiled = compile_catalog(seed_path.read_bytes())
+        write_snapshot(compiled, snapshot_path(seed_path))
+
+        loaded = read_snapshot(snapshot_path(seed_path), content_hash(seed_path.read_bytes()))
+
+        assert loaded == compiled
+        assert [t["id"] for t, _ in loaded.tables["r1"]] == ["t1", "t2"]
+        assert loaded.features["r1"].price_bucket == compiled.features["r1"].price_bucket
+        # Indexes keep pointing at the same records, as when built from JSON
+        assert loaded.restaurants_by_slug["sahil-bar"] is loaded.restaurants["r1"]
+        table = loaded.restaurants["r1"]["areas"][0]["tables"][0]
+        assert loaded.table_lookup["r1"]["t2"] is table
+        assert loaded.summary_index[0][0] is loaded.summaries[0]
+
+    def test_changed_json_falls_back_to_compiling(self, seed_path):
+        write_snapshot(compile_catalog(seed_path.read_bytes()), snapshot_path(seed_path))
+        seed_path.write_text(json.dumps(SEED[:1]), encoding="utf-8")
+
+        assert read_snapshot(snapshot_path(seed_path), content_hash(seed_path.read_bytes())) is None
+        assert list(load_catalog(seed_path).restaurants) == ["r1"]
+
+    def test_changed_deriving_code_falls_back_to_compiling(self, seed_path, monkeypatch):
+        write_snapshot(compile_catalog(seed_path.read_bytes()), snapshot_path(seed_path))
+        source_hash = content_hash(seed_path.read_bytes())
+        assert read_snapshot(snapshot_path(seed_path), source_hash) is not None
+
+        # E.g. a new tag vocabulary in concierge_tags without a SNAPSHOT_VERSION bump
+        monkeypatch.setattr(catalog_module, "code_fingerprint", lambda: "edited")
+        assert read_snapshot(snapshot_path(seed_path), source_hash) is None
+
+    def test_compiling_from_json_writes_the_snapshot(self, seed_path):
+        source_hash = content_hash(seed_path.read_bytes())
+        assert read_snapshot(snapshot_path(seed_path), source_hash) is None
+
+        compiled = load_catalog(seed_path)
+
+        assert read_snapshot(snapshot_path(seed_path), source_hash) == compiled
+
+    def test_unreadable_or_foreign_snapshots_are_ignored(self, seed_path):
+        source_hash = content_hash(seed_path.read_bytes())
+        target = snapshot_path(seed_path)
+
+        target.write_bytes(b"not a pickle")
+        assert read_snapshot(target, source_hash) is None
+
+        # Snapshots may only hold builtins; anything importing code is refused
+        header = {
+            "version": catalog_module.SNAPSHOT_VERSION,
+            "source_hash": source_hash,
+            "code_hash": catalog_module.code_fingerprint(),
+        }
+        target.write_bytes(pickle.dumps(header) + pickle.dumps(seed_path))
+        assert read_snapshot(target, source_hash) is None
+
+    def test_database_loads_from_snapshot(self, seed_path, monkeypatch):
+        write_snapshot(compile_catalog(seed_path.read_bytes()), snapshot_path(seed_path))
+        monkeypatch.setattr(storage, "DATA_DIR", seed_path.parent)
+        monkeypatch.setattr(storage, "RES_PATH", seed_path.parent / "reservations.json")
+
+        def no_compile(*args, **kwargs):
+            raise AssertionError("catalog compiled despite a current snapshot")
+
+        monkeypatch.setattr(catalog_module, "compile_catalog", no_compile)
+        db = storage.Database()
+
+        assert db.get_restaurant("chayki-tea-house")["city"] == "Baku"
+        assert [r["id"] for r in db.list_restaurants("seafood")] == ["r1"]
+        assert [t["id"] for t in db.eligible_tables("r1", 4)] == ["t2"]
+
+        monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_ENABLED", False)
+        with pytest.raises(AssertionError):
+            storage.Database()
+
+    def test_concierge_derives_records_changed_after_compiling(self, seed_path, monkeypatch):
+        monkeypatch.setattr(storage, "DATA_DIR", seed_path.parent)
+        monkeypatch.setattr(storage, "RES_PATH", seed_path.parent / "reservations.json")
+        db = storage.Database()
+        monkeypatch.setattr(storage, "_database", db)
+        chayki = db.get_restaurant("chayki-tea-house")["id"]
+        # Replaced and added records share the dict the catalog was compiled into
+        db.restaurants["r1"] = {**db.restaurants["r1"], "name": "Sahil Terrace"}
+        db.restaurants["r3"] = {"id": "r3", "name": "Firuze", "city": "Baku"}
+
+        service = concierge_service.ConciergeService()
+
+        assert service._list_items["r1"].name == "Sahil Terrace"
+        assert service._features["r1"].name == "Sahil Terrace"
+        assert service._list_items["r3"].name == "Firuze"
+        assert service._features["r3"].name == "Firuze"
+        assert service._features[chayki] is db.catalog.features[chayki]
@@ -0,0 +1,118 @@
+"""Tests for one-to-many ETA computation."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from backend.app import maps, osrm
+from backend.app.cache import cache_osrm_route, clear_all_caches
+from backend.app.osrm import OsrmRoute, OsrmTableCell
+from backend.app.storage import DB
+
+ORIGIN = (40.4093, 49.8671)
+
+
+class FakeTableResponse:
+    def __init__(self, destinations: int):
+        self.destinations = destinations
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self):
+        durations = [60.0 * (i + 1) for i in range(self.destinations)]
+        durations[0] = None  # First destination unreachable
+        return {
+            "code": "Ok",
+            "durations": [durations],
+            "distances": [[1000.0 * (i + 1) for i in range(self.destinations)]],
+        }
+
+
+class TestOsrmTable:
+    def test_parses_rows_and_chunks_large_requests(self, monkeypatch):
+        requests = []
+
+        def fake_get(url, params, timeout):
+            requests.append(params)
+            return FakeTableResponse(len(params["destinations"].split(";")))
+
+        monkeypatch.setattr(osrm.httpx, "get", fake_get)
+        destinations = [(40.40 + i * 0.001, 49.85) for i in range(150)]
+
+        cells = osrm.table(*ORIGIN, destinations)
+
+        assert len(requests) == 2
+        assert len(cells) == 150
+        assert cells[0] is None and cells[99] is None
+        assert cells[1] == OsrmTableCell(distance_km=2.0, duration_seconds=120)
+
+    def test_local_table_tracks_straight_line_distance(self):
+        near, far = osrm.local_table(*ORIGIN, [(40.41, 49.87), (40.45, 49.95)])
+
+        assert near.duration_seconds < far.duration_seconds
+        assert far.distance_km == pytest.approx(8.3 * osrm.LOCAL_TABLE_CIRCUITY, rel=0.05)
+
+
+class TestComputeEtaMatrix:
+    def test_cached_routes_skip_the_table(self, monkeypatch):
+        clear_all_caches()
+        monkeypatch.setattr(maps.settings, "ETA_MATRIX_PROVIDER", "osrm")
+        calls = []
+
+        def fake_table(lat, lon, destinations):
+            calls.append(list(destinations))
+            return [OsrmTableCell(distance_km=3.0, duration_seconds=400) for _ in destinations]
+
+        monkeypatch.setattr(maps, "osrm_table", fake_table)
+        cache_osrm_route(*ORIGIN, 40.38, 49.89, OsrmRoute(4.5, 500, geometry=[ORIGIN]))
+        destinations = [("a", 40.38, 49.89), ("b", 40.42, 49.84), ("c", 40.39, 49.80)]
+
+        first = maps.compute_eta_matrix(*ORIGIN, destinations)
+        second = maps.compute_eta_matrix(*ORIGIN, destinations)
+
+        assert calls == [[(40.42, 49.84), (40.39, 49.80)]]
+        assert first["a"].eta_seconds == 500
+        assert first["b"].eta_minutes == 7
+        assert second == first
+        # Table rows have no geometry, so full route lookups still go upstream
+        monkeypatch.setattr(osrm.httpx, "get", lambda *a, **k: SimpleNamespace())
+        assert osrm.route(*ORIGIN, 40.42, 49.84) is None
+        clear_all_caches()
+
+
+def test_matrix_endpoint_orders_by_eta(client, monkeypatch):
+    monkeypatch.setattr(maps.settings, "ETA_MATRIX_PROVIDER", "local")
+    clear_all_caches()
+
+    resp = client.get(
+        "/directions/matrix",
+        params={"origin": f"{ORIGIN[0]},{ORIGIN[1]}", "max_distance_km": 5, "limit": 5},
+    )
+
+    assert resp.status_code == 200
+    body = resp.json()
+    results = body["results"]
+    assert 0 < len(results) <= 5
+    assert [r["eta_seconds"] for r in results] == sorted(r["eta_seconds"] for r in results)
+    assert all(r["straight_line_km"] <= 5 and r["provider"] == "local" for r in results)
+    in_range = sum(
+        1
+        for record in DB.restaurants.values()
+        if maps._haversine(*ORIGIN, float(record["latitude"]), float(record["longitude"])) <= 5
+    )
+    assert body["considered"] == in_range
+
+
+def test_matrix_endpoint_accepts_restaurant_ids(client, monkeypatch):
+    monkeypatch.setattr(maps.settings, "ETA_MATRIX_PROVIDER", "local")
+    ids = list(DB.restaurants)[:3]
+
+    resp = client.get(
+        "/directions/matrix",
+        params={"origin": "40.4093,49.8671", "restaurant_id": ids, "max_distance_km": 100},
+    )
+
+    assert resp.status_code == 200
+    assert sorted(r["restaurant_id"] for r in resp.json()["results"]) == sorted(ids)
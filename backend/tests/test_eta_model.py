@@ -0,0 +1,162 @@
+"""Tests for the offline ETA model."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+from backend.app import eta_model, gomap, maps, osrm
+from backend.app.cache import cache_osrm_route, clear_all_caches
+from backend.app.eta_model import EtaModel, EtaSampleLog, fit_eta_model
+
+RUSH_HOUR = datetime(2026, 3, 2, 8, 30)  # Monday
+NIGHT = datetime(2026, 3, 2, 23, 30)
+
+
+def _synthetic_trips(count: int = 3000, seed: int = 3) -> np.ndarray:
+    """Baku-sized trips: 1.4x road circuity, 18 km/h at rush hour, 35 km/h otherwise."""
+    rng = np.random.default_rng(seed)
+    o_lat = rng.uniform(40.35, 40.45, count)
+    o_lon = rng.uniform(49.78, 49.95, count)
+    d_lat = rng.uniform(40.35, 40.45, count)
+    d_lon = rng.uniform(49.78, 49.95, count)
+    dow = rng.integers(0, 7, count)
+    hour = rng.integers(0, 24, count)
+    straight = eta_model._haversine_km(o_lat, o_lon, d_lat, d_lon)
+    road = straight * 1.4 + 0.3
+    rush = (dow < 5) & ((hour == 8) | (hour == 9) | (hour == 18))
+    speed = np.where(rush, 18.0, 35.0)
+    seconds = road / speed * 3600 * rng.normal(1.0, 0.05, count) + 60
+    return np.column_stack((o_lat, o_lon, d_lat, d_lon, dow, hour, road, seconds))
+
+
+class TestFit:
+    def test_learns_distance_and_time_of_day(self):
+        model = fit_eta_model(_synthetic_trips())
+        trip = (40.37, 49.80, 40.42, 49.90)
+        road = eta_model._haversine_km(*trip) * 1.4 + 0.3
+
+        rush_km, rush_seconds = model.predict(*trip, when=RUSH_HOUR)
+        _, night_seconds = model.predict(*trip, when=NIGHT)
+
+        assert rush_km == pytest.approx(road, rel=0.1)
+        assert rush_seconds == pytest.approx(road / 18 * 3600 + 60, rel=0.15)
+        assert night_seconds == pytest.approx(road / 35 * 3600 + 60, rel=0.15)
+
+    def test_beats_constant_speed_fallback(self):
+        train, holdout = _synthetic_trips(seed=3), _synthetic_trips(500, seed=9)
+        model = fit_eta_model(train)
+        predicted = np.array(
+            [
+                model.predict(*row[:4], when=datetime(2026, 3, 2 + int(row[4]), int(row[5])))[1]
+                for row in holdout
+            ]
+        )
+        straight = eta_model._haversine_km(*holdout[:, :4].T)
+        constant_speed = straight / maps.settings.FALLBACK_CITY_SPEED_KMH * 3600
+
+        model_error = np.mean(np.abs(predicted - holdout[:, 7]))
+        baseline_error = np.mean(np.abs(constant_speed - holdout[:, 7]))
+        assert model_error < baseline_error / 2
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        model = fit_eta_model(_synthetic_trips(500))
+        path = tmp_path / "eta_model.npz"
+        model.save(path)
+
+        loaded = EtaModel.load(path)
+
+        assert loaded.samples == 500
+        assert loaded.predict(40.37, 49.8, 40.4, 49.9, RUSH_HOUR) == model.predict(
+            40.37, 49.8, 40.4, 49.9, RUSH_HOUR
+        )
+        assert EtaModel.load(tmp_path / "missing.npz") is None
+
+
+class TestLifecycle:
+    @pytest.fixture
+    def isolated(self, tmp_path, monkeypatch):
+        log = EtaSampleLog(tmp_path / "eta_samples.db")
+        monkeypatch.setattr(eta_model, "_sample_log", log)
+        monkeypatch.setattr(eta_model.settings, "ETA_MODEL_ENABLED", True)
+        monkeypatch.setattr(eta_model.settings, "ETA_MODEL_MIN_SAMPLES", 100)
+        yield log
+        log.close()
+
+    def test_trains_from_logged_samples_and_persists(self, isolated):
+        for row in _synthetic_trips(150):
+            eta_model.record_eta_sample(*row[:4], row[6], int(row[7]), "osrm")
+
+        assert eta_model.startup_eta_model() is not None
+        assert (eta_model.model_path()).exists()
+        eta_model._model_loaded = False
+        assert eta_model.get_eta_model().samples == 150
+
+    def test_too_few_samples_keeps_fallback(self, isolated):
+        eta_model.record_eta_sample(40.37, 49.8, 40.4, 49.9, 4.0, 600, "osrm")
+
+        assert eta_model.train_eta_model() is None
+        fallback = maps.build_fallback_eta(3.0, 7, origin=(40.37, 49.8), destination=(40.4, 49.9))
+        assert fallback.eta_minutes == 7
+
+    def test_fallback_uses_model(self, isolated, monkeypatch):
+        monkeypatch.setattr(eta_model, "_model", fit_eta_model(_synthetic_trips(500)))
+        monkeypatch.setattr(eta_model, "_model_loaded", True)
+
+        fallback = maps.build_fallback_eta(3.0, 7, origin=(40.37, 49.8), destination=(40.42, 49.9))
+
+        assert fallback.provider == "fallback"
+        assert fallback.calibration_note == "offline ETA model"
+        assert fallback.route_distance_km > 3.0
+
+    def test_only_fresh_provider_routes_are_logged(self, isolated, monkeypatch):
+        calls = []
+
+        def fake_post(endpoint, payload, **kwargs):
+            calls.append(payload)
+            return {"success": True, "distance": 4.0, "time": 10}
+
+        monkeypatch.setattr(gomap, "gomap_enabled", lambda: True)
+        monkeypatch.setattr(gomap, "_post", fake_post)
+        monkeypatch.setattr(maps, "osrm_route", lambda *args, **kwargs: None)
+        monkeypatch.setattr(maps.settings, "GOMAP_TRAFFIC_ENABLED", False)
+        clear_all_caches()
+
+        maps.compute_eta_with_traffic(40.37, 49.8, 40.4, 49.9)
+        maps.compute_eta_with_traffic(40.37, 49.8, 40.4, 49.9)
+        # Just behind the cached origin, so served by shifting the cached route
+        maps.compute_eta_with_traffic(40.3695, 49.7995, 40.4, 49.9)
+
+        assert len(calls) == 1
+        assert isolated.load_samples().shape[0] == 1
+        clear_all_caches()
+
+    def test_routes_refetched_over_table_entries_are_logged(self, isolated, monkeypatch):
+        class Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                coordinates = [[49.8, 40.37], [49.9, 40.4]]
+                route = {
+                    "distance": 4000,
+                    "duration": 600,
+                    "geometry": {"coordinates": coordinates},
+                }
+                return {"code": "Ok", "routes": [route]}
+
+        monkeypatch.setattr(osrm.httpx, "get", lambda *args, **kwargs: Response())
+        monkeypatch.setattr(maps, "gomap_route", lambda *args, **kwargs: None)
+        monkeypatch.setattr(maps.settings, "GOMAP_TRAFFIC_ENABLED", False)
+        clear_all_caches()
+        # Matrix rows share the route cache but have no geometry
+        cache_osrm_route(40.37, 49.8, 40.4, 49.9, osrm.OsrmRoute(4.5, 500, notice="table"))
+
+        maps.compute_eta_with_traffic(40.37, 49.8, 40.4, 49.9)
+        maps.compute_eta_with_traffic(40.37, 49.8, 40.4, 49.9)
+
+        samples = isolated.load_samples()
+        assert samples.shape[0] == 1
+        assert samples[0, 7] == 600
+        clear_all_caches()
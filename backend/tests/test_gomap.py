@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from backend.app import cache as gomap_cache
 from backend.app import gomap
 
 
@@ -31,3 +32,45 @@ def test_route_directions_returns_none_on_failure(monkeypatch):
     )
 
     assert gomap.route_directions(0, 0, 0, 0) is None
+
+
+def test_traffic_lookups_share_tile_reading(monkeypatch):
+    gomap_cache.clear_all_caches()
+    monkeypatch.setattr(gomap, "gomap_enabled", lambda: True)
+    calls = []
+
+    def fake_post(endpoint, payload, **kwargs):
+        calls.append(payload)
+        return {"success": True, "traffic": {"severity": 2}}
+
+    monkeypatch.setattr(gomap, "_post", fake_post)
+
+    first = gomap.get_traffic_conditions(40.4093, 49.8671, 1.5)
+    second = gomap.get_traffic_conditions(40.4121, 49.8689, 2.0)
+
+    assert first is second
+    assert calls == [{"lat": "40.410000", "lon": "49.870000", "radius": "2000"}]
+    gomap_cache.clear_all_caches()
+
+
+def test_arrival_pings_only_reuse_routes_they_have_not_passed(monkeypatch):
+    gomap_cache.clear_all_caches()
+    monkeypatch.setattr(gomap, "gomap_enabled", lambda: True)
+    calls = []
+
+    def fake_post(endpoint, payload, **kwargs):
+        calls.append(payload)
+        return {"success": True, "distance": 3.0, "time": 9}
+
+    monkeypatch.setattr(gomap, "_post", fake_post)
+
+    first = gomap.route_directions(40.3700, 49.8300, 40.3909, 49.8510)
+    # ~40 m further from the restaurant: the cached route still applies
+    behind = gomap.route_directions(40.3697, 49.8297, 40.3909, 49.8510)
+    assert len(calls) == 1
+    assert behind.distance_km > first.distance_km
+
+    # ~40 m along the way: the cached route would lead back to its start
+    gomap.route_directions(40.3703, 49.8303, 40.3909, 49.8510)
+    assert len(calls) == 2
+    gomap_cache.clear_all_caches()
@@ -0,0 +1,170 @@
+"""Tests for queue-based logging, lazy fields and per-key sampling."""
+
+from __future__ import annotations
+
+import io
+import logging
+import queue
+import time
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from backend.app import metrics
+from backend.app.logging_config import (
+    BoundedQueueHandler,
+    SamplingFilter,
+    lazy,
+    start_log_queue,
+    stop_log_queue,
+)
+from backend.app.settings import settings
+from prometheus_client import REGISTRY
+
+
+class SlowStream(io.StringIO):
+    def write(self, text):
+        time.sleep(0.01)
+        return super().write(text)
+
+
+def _record(msg, *args, sample_key=None):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    if sample_key:
+        record.sample_key = sample_key
+    return record
+
+
+@pytest.fixture
+def queued_root():
+    root = logging.getLogger()
+    level = root.level
+    # The app may already have installed its own queue at import time
+    installed = any(isinstance(handler, BoundedQueueHandler) for handler in root.handlers)
+    stop_log_queue()
+    stream = SlowStream()
+    yield start_log_queue(stream, logging.INFO), stream
+    stop_log_queue()
+    if installed:
+        start_log_queue()
+    root.setLevel(level)
+
+
+class TestLogQueue:
+    def test_writes_happen_off_the_calling_thread(self, queued_root):
+        _handler, stream = queued_root
+        log = logging.getLogger("backend.tests.queue")
+
+        started = time.perf_counter()
+        for index in range(20):
+            log.info("event %d", index)
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.1  # 20 writes would take 0.2s inline
+        stop_log_queue()
+        lines = stream.getvalue().splitlines()
+        assert [line for line in lines if line.startswith("event")][-1] == "event 19"
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+        for index in range(5):
+            handler.handle(_record("event %d", index))
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_exceptions_are_rendered_before_queueing(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        log = logging.getLogger("backend.tests.exceptions")
+        log.addHandler(handler)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("failed")
+        finally:
+            log.removeHandler(handler)
+
+        record = handler.queue.get_nowait()
+        assert record.exc_info is None
+        assert "ValueError: boom" in record.exc_text
+
+    def test_arguments_are_formatted_at_the_call(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        payload = {"status": "pending"}
+        handler.handle(_record("payload %s", payload))
+        handler.handle(_record("payload %r (%d) %s", payload, 3, lazy(lambda: "built")))
+        payload["status"] = "confirmed"
+
+        eager, deferred = handler.queue.get_nowait(), handler.queue.get_nowait()
+        assert (eager.msg, eager.args) == ("payload {'status': 'pending'}", None)
+        assert deferred.getMessage() == "payload {'status': 'pending'} (3) built"
+
+    def test_numbers_keep_numeric_formats_next_to_lazy_fields(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        args = (np.int64(3), np.float32(0.25), Decimal("2.5"), lazy(lambda: "built"))
+        handler.handle(_record("n=%d p=%.2f d=%.1f %s", *args))
+
+        assert handler.queue.get_nowait().getMessage() == "n=3 p=0.25 d=2.5 built"
+
+    def test_dropped_records_are_reported_once_there_is_room(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+        for index in range(4):
+            handler.handle(_record("event %d", index))
+        handler.queue.get_nowait()
+        handler.queue.get_nowait()
+
+        handler.handle(_record("event %d", 4))
+
+        warning, record = handler.queue.get_nowait(), handler.queue.get_nowait()
+        assert warning.levelno == logging.WARNING
+        assert warning.getMessage() == "Log queue full: dropped 2 records"
+        assert record.getMessage() == "event 4"
+        assert handler.dropped == 2
+
+    def test_dropped_records_are_exported(self, queued_root):
+        handler, _stream = queued_root
+        metrics.track_log_queue_metrics(0)
+        before = REGISTRY.get_sample_value("log_records_dropped_total")
+
+        handler.dropped = 3
+        metrics.get_metrics()
+
+        assert REGISTRY.get_sample_value("log_records_dropped_total") == before + 3
+
+
+class TestLazyFields:
+    def test_only_built_when_emitted(self):
+        calls = []
+
+        def expensive():
+            calls.append(1)
+            return "payload"
+
+        log = logging.getLogger("backend.tests.lazy")
+        log.setLevel(logging.INFO)
+        log.debug("dump: %s", lazy(expensive))
+        assert calls == []
+
+        field = lazy(expensive)
+        assert _record("dump: %s", field).getMessage() == "dump: payload"
+        assert str(field) == "payload"
+        assert calls == [1]
+
+
+class TestSamplingFilter:
+    def test_caps_records_per_key_and_window(self, monkeypatch):
+        monkeypatch.setattr(settings, "LOG_SAMPLE_LIMIT", 2)
+        monkeypatch.setattr(settings, "LOG_SAMPLE_WINDOW_SECONDS", 60.0)
+        sampler = SamplingFilter()
+
+        passed = [sampler.filter(_record("hit %s", i, sample_key="cache.hit")) for i in range(5)]
+        assert passed == [True, True, False, False, False]
+        assert sampler.filter(_record("unkeyed"))
+        assert sampler.filter(_record("other", sample_key="batch.processed"))
+        assert sampler.suppressed() == {"cache.hit": 3, "batch.processed": 0}
+
+        # Next window reports what the last one dropped
+        sampler._windows["cache.hit"][0] -= 61
+        record = _record("hit %s", "k", sample_key="cache.hit")
+        assert sampler.filter(record)
+        assert record.getMessage() == "hit k (3 similar suppressed)"
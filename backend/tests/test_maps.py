@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from types import SimpleNamespace
+
 from backend.app import maps
 
 
@@ -28,3 +30,84 @@ def test_compute_eta_with_gomap(monkeypatch):
 def test_compute_eta_with_gomap_none(monkeypatch):
     monkeypatch.setattr(maps, "gomap_route", lambda *args, **kwargs: None)
     assert maps.compute_eta_with_traffic(0, 0, 0, 0) is None
+
+
+class _Route:
+    distance_km = 5.0
+    duration_seconds = 600
+    notice = None
+
+
+class _Traffic:
+    def __init__(self, severity: int):
+        self.severity = severity
+        self.speed_kmh = 18.0
+        self.delay_minutes = 4
+
+
+class _FakeTracker:
+    def __init__(self, severity: float, confidence: float, method: str = "historical_pattern"):
+        self.prediction = SimpleNamespace(
+            expected_severity=severity, confidence=confidence, prediction_method=method
+        )
+        self.recorded: list[tuple[float, float, int]] = []
+
+    def predict_traffic_batch(self, points, target_times):
+        return [self.prediction for _ in points]
+
+    def record_observation(self, latitude, longitude, severity, **kwargs):
+        self.recorded.append((latitude, longitude, severity))
+
+
+def _traffic_env(monkeypatch, tracker, live_severity: int | None):
+    calls: list[tuple[float, float]] = []
+
+    def fake_traffic(lat, lon, radius_km=2.0):
+        calls.append((lat, lon))
+        return _Traffic(live_severity) if live_severity else None
+
+    monkeypatch.setattr(maps, "gomap_route", lambda *args, **kwargs: _Route())
+    monkeypatch.setattr(maps, "osrm_route", lambda *args, **kwargs: None)
+    monkeypatch.setattr(maps, "gomap_traffic", fake_traffic)
+    monkeypatch.setattr(maps, "get_traffic_tracker", lambda: tracker)
+    monkeypatch.setattr(maps.settings, "GOMAP_TRAFFIC_ENABLED", True)
+    monkeypatch.setattr(maps.settings, "TRAFFIC_HISTORY_ENABLED", True)
+    monkeypatch.setattr(maps.settings, "TRAFFIC_HISTORY_CONFIDENCE_THRESHOLD", 0.8)
+    monkeypatch.setattr(maps.settings, "ETA_BUFFER_MINUTES", 0)
+    monkeypatch.setattr(maps.settings, "ETA_HEAVY_BUFFER_MINUTES", 0)
+    return calls
+
+
+def test_confident_history_skips_live_traffic(monkeypatch):
+    tracker = _FakeTracker(severity=3.2, confidence=0.9)
+    calls = _traffic_env(monkeypatch, tracker, live_severity=1)
+
+    eta = maps.compute_eta_with_traffic(40.40, 49.85, 40.37, 49.83)
+
+    assert calls == []
+    assert eta.traffic_source == "historical"
+    assert eta.traffic_condition == "heavy"
+    assert eta.eta_minutes > eta.typical_eta_minutes
+
+
+def test_weak_history_is_blended_with_live_readings(monkeypatch):
+    tracker = _FakeTracker(severity=1.0, confidence=0.3)
+    calls = _traffic_env(monkeypatch, tracker, live_severity=4)
+
+    eta = maps.compute_eta_with_traffic(40.40, 49.85, 40.37, 49.83)
+
+    assert len(calls) == 2
+    assert eta.traffic_source == "blended"
+    # 0.3 * 1.0 + 0.7 * 4 = 3.1 -> heavy
+    assert eta.traffic_condition == "heavy"
+    assert [severity for *_coords, severity in tracker.recorded] == [4, 4]
+
+
+def test_live_only_without_historical_pattern(monkeypatch):
+    tracker = _FakeTracker(severity=2.0, confidence=0.3, method="general_pattern")
+    _traffic_env(monkeypatch, tracker, live_severity=2)
+
+    eta = maps.compute_eta_with_traffic(40.40, 49.85, 40.37, 49.83)
+
+    assert eta.traffic_source == "live"
+    assert eta.traffic_condition == "moderate"
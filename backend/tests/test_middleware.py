@@ -0,0 +1,185 @@
+"""Tests for the pure-ASGI request pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from backend.app.metrics import add_prometheus_metrics, http_requests_total
+from backend.app.middleware import PipelineStage, RequestPipeline, add_pipeline_stage
+from backend.app.settings import settings
+from backend.app.utils import (
+    add_rate_limiting,
+    add_request_id_tracing,
+    add_security_headers,
+    get_request_id,
+)
+from backend.app.versioning import add_api_versioning
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+
+class BlockingStage(PipelineStage):
+    async def on_request(self, scope, state):
+        if scope["path"] == "/blocked":
+            return PlainTextResponse("blocked", status_code=403)
+        return None
+
+
+class RecordingStage(PipelineStage):
+    def __init__(self, name: str, events: list[str]):
+        self.name = name
+        self.events = events
+
+    async def on_request(self, scope, state):
+        self.events.append(f"{self.name}:request")
+        return None
+
+    def on_complete(self, scope, state, status_code):
+        self.events.append(f"{self.name}:complete:{status_code}")
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    add_prometheus_metrics(app)
+    add_api_versioning(app)
+    add_request_id_tracing(app)
+    add_security_headers(app)
+    add_rate_limiting(app)
+
+    @app.get("/echo")
+    def echo(request: Request):
+        return {"state": request.state.request_id, "context": get_request_id()}
+
+    return app
+
+
+class TestRequestPipeline:
+    def test_single_middleware_layer(self):
+        app = _app()
+        assert [middleware.cls for middleware in app.user_middleware] == [RequestPipeline]
+        assert len(app.state.pipeline_stages) == 5
+
+    def test_all_stage_headers_and_request_id(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        client = TestClient(_app())
+
+        response = client.get("/echo", headers={"X-Request-ID": "req-123"})
+
+        assert response.json() == {"state": "req-123", "context": "req-123"}
+        assert response.headers["X-Request-ID"] == "req-123"
+        assert response.headers["X-Frame-Options"] == "DENY"
+        assert response.headers["X-API-Version"] == "1.0"
+        assert response.headers["Deprecation"] == "true"
+        assert "X-RateLimit-Remaining" in response.headers
+        assert "Deprecation" not in client.get("/v1/echo").headers
+
+    def test_rate_limited_response_keeps_earlier_headers(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(settings, "RATE_LIMIT_REQUESTS", 1)
+        client = TestClient(_app())
+        counter = http_requests_total.labels(method="GET", endpoint="/echo", status="429")
+        before = counter._value.get()
+
+        client.get("/echo")
+        response = client.get("/echo")
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+        assert response.headers["X-Request-ID"]
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert response.headers["X-API-Version"] == "1.0"
+        assert counter._value.get() == before + 1
+
+    def test_short_circuit_and_errors_complete_active_stages(self):
+        events: list[str] = []
+        app = FastAPI()
+        add_pipeline_stage(app, RecordingStage("outer", events))
+        add_pipeline_stage(app, BlockingStage())
+        add_pipeline_stage(app, RecordingStage("inner", events))
+
+        @app.get("/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        client = TestClient(app, raise_server_exceptions=False)
+        assert client.get("/blocked").status_code == 403
+        assert events == ["outer:request", "outer:complete:403"]
+
+        events.clear()
+        assert client.get("/boom").status_code == 500
+        assert events == [
+            "outer:request",
+            "inner:request",
+            "inner:complete:500",
+            "outer:complete:500",
+        ]
+
+    def test_streaming_chunks_are_not_buffered(self):
+        app = FastAPI()
+        add_security_headers(app)
+        add_request_id_tracing(app)
+        sent: list[dict] = []
+        first_chunk_sent = asyncio.Event()
+
+        async def chunks():
+            yield b"first"
+            # Only continues once the first chunk reached the server
+            await asyncio.wait_for(first_chunk_sent.wait(), timeout=2)
+            yield b"second"
+
+        @app.get("/stream")
+        def stream():
+            return StreamingResponse(chunks(), media_type="text/plain")
+
+        async def run():
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/stream",
+                "raw_path": b"/stream",
+                "root_path": "",
+                "query_string": b"",
+                "headers": [],
+                "client": ("127.0.0.1", 1234),
+                "server": ("testserver", 80),
+            }
+
+            async def receive():
+                await asyncio.sleep(10)
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+                if message.get("body") == b"first":
+                    first_chunk_sent.set()
+
+            await app(scope, receive, send)
+
+        asyncio.run(run())
+
+        bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+        assert bodies[:2] == [b"first", b"second"]
+        headers = dict(sent[0]["headers"])
+        assert headers[b"x-frame-options"] == b"DENY"
+        assert b"x-request-id" in headers
+
+    def test_non_http_scopes_pass_through(self):
+        calls: list[str] = []
+
+        async def inner(scope, receive, send):
+            calls.append(scope["type"])
+
+        pipeline = RequestPipeline(inner, stages=[RecordingStage("stage", calls)])
+        asyncio.run(pipeline({"type": "lifespan"}, None, None))
+        assert calls == ["lifespan"]
+
+
+@pytest.mark.parametrize("path", ["/health", "/assets/a.png", "/favicon.ico"])
+def test_exempt_paths_have_no_deprecation(path):
+    client = TestClient(_app(), raise_server_exceptions=False)
+    assert "Deprecation" not in client.get(path).headers
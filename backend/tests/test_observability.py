@@ -2,13 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
-from backend.app.health import health_checker
+from backend.app.health import HealthChecker, health_checker
 from backend.app.main import app
-from backend.app.metrics import normalize_endpoint
+from backend.app.metrics import normalize_endpoint, route_template
 from backend.app.settings import settings
+from backend.app.stage_timing import format_server_timing
 from backend.app.utils import get_request_id, request_id_ctx
+from fastapi import APIRouter, FastAPI, Request
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
 
 
 @pytest.fixture
@@ -85,6 +96,173 @@ class TestPrometheusMetrics:
         assert 'endpoint="/metrics"' not in content
 
 
+class TestRouteTemplateLabels:
+    """Test endpoint labels come from the matched route."""
+
+    @staticmethod
+    def _count(endpoint: str, status: str = "200") -> float:
+        value = REGISTRY.get_sample_value(
+            "http_requests_total", {"method": "GET", "endpoint": endpoint, "status": status}
+        )
+        return value or 0.0
+
+    def test_path_parameters_collapse_to_template(self, client):
+        """Requests for different ids share the route template label"""
+        rid = client.get("/restaurants").json()[0]["id"]
+        before = self._count("/restaurants/{rid}")
+        before_v1 = self._count("/v1/restaurants/{rid}")
+
+        client.get(f"/restaurants/{rid}")
+        client.get(f"/v1/restaurants/{rid}")
+
+        assert self._count("/restaurants/{rid}") == before + 1
+        assert self._count("/v1/restaurants/{rid}") == before_v1 + 1
+        assert self._count(f"/restaurants/{rid}") == 0
+
+    def test_include_prefix_is_part_of_the_label(self):
+        """The matched route lacks the include_router prefix; the label restores it"""
+        router = APIRouter()
+        scopes = []
+
+        @router.get("/items/{item_id}")
+        def item(item_id: int, request: Request):
+            scopes.append(request.scope)
+            return {}
+
+        local = FastAPI()
+        local.include_router(router)
+        local.include_router(router, prefix="/v1")
+        TestClient(local).get("/items/7")
+        TestClient(local).get("/v1/items/7")
+
+        assert [scope["route"].path for scope in scopes] == ["/items/{item_id}"] * 2
+        assert [route_template(scope) for scope in scopes] == [
+            "/items/{item_id}",
+            "/v1/items/{item_id}",
+        ]
+
+    def test_unknown_paths_share_one_label(self, client):
+        """Unrouted paths do not create new label values"""
+        before = self._count("unmatched", "404")
+
+        client.get("/wp-admin/setup.php")
+        client.get("/.env")
+
+        assert self._count("unmatched", "404") == before + 2
+        assert self._count("/.env", "404") == 0
+
+    def test_label_children_cached_per_route(self):
+        """The middleware resolves label children once per method and route"""
+        stage = next(stage for stage in app.state.pipeline_stages if hasattr(stage, "_endpoints"))
+        local = TestClient(app)
+        rid = local.get("/restaurants").json()[0]["id"]
+        local.get(f"/restaurants/{rid}")
+        cached = stage._endpoints[("GET", "/restaurants/{rid}")]
+
+        local.get(f"/restaurants/{rid}")
+
+        assert stage._endpoints[("GET", "/restaurants/{rid}")] is cached
+        assert "200" in cached.totals
+
+
+MULTIPROCESS_WORKER = """
+import sys
+from backend.app import metrics
+
+counter = metrics.http_requests_total.labels(method="GET", endpoint="/health", status="200")
+counter.inc(int(sys.argv[1]))
+metrics.http_requests_in_progress.labels(method="GET").inc()
+"""
+
+MULTIPROCESS_SCRAPE = """
+from backend.app import metrics
+
+print(metrics.get_metrics().body.decode())
+"""
+
+
+class TestMultiprocessMetrics:
+    """Test /metrics aggregates samples written by separate worker processes."""
+
+    def test_scrape_sums_all_workers(self, tmp_path):
+        repo_root = Path(__file__).resolve().parents[2]
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+
+        def run(script, *args):
+            return subprocess.run(
+                [sys.executable, "-c", script, *args],
+                cwd=repo_root,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=60,
+            ).stdout
+
+        run(MULTIPROCESS_WORKER, "2")
+        run(MULTIPROCESS_WORKER, "3")
+        output = run(MULTIPROCESS_SCRAPE)
+
+        assert 'http_requests_total{endpoint="/health",method="GET",status="200"} 5.0' in output
+        assert "baku_reserve_info" in output
+
+
+class TestServerTiming:
+    """Test per-stage histograms and the Server-Timing response header."""
+
+    RID = "fc34a984-0b39-4f0a-afa2-5b677c61f044"
+
+    def _stage_count(self, operation, stage):
+        labels = {"operation": operation, "stage": stage}
+        return REGISTRY.get_sample_value("request_stage_duration_seconds_count", labels) or 0
+
+    def test_header_lists_availability_stages(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+        before = self._stage_count("availability", "grid_build")
+
+        response = client.get(
+            f"/restaurants/{self.RID}/availability",
+            params={"date": "2030-01-01", "party_size": 2},
+        )
+
+        assert response.status_code == 200
+        names = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+        assert names == ["availability-index_lookup", "availability-grid_build", "total"]
+        assert self._stage_count("availability", "grid_build") == before + 1
+
+    def test_stages_in_worker_threads_reach_the_header(self, client, monkeypatch):
+        from backend.app import maps
+
+        route = SimpleNamespace(distance_km=5.0, duration_seconds=600, notice=None, geometry=None)
+        monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+        monkeypatch.setattr(maps, "gomap_route", lambda *args: route)
+        monkeypatch.setattr(maps, "osrm_route", lambda *args: None)
+        monkeypatch.setattr(maps, "_historical_traffic", lambda *args: None)
+        monkeypatch.setattr(maps.settings, "GOMAP_TRAFFIC_ENABLED", False)
+
+        response = client.get(
+            "/directions", params={"origin": "40.4,49.8", "destination": "40.41,49.86"}
+        )
+
+        assert response.status_code == 200
+        timing = response.headers["Server-Timing"]
+        for stage in ("directions-gomap", "directions-osrm", "directions-traffic"):
+            assert f"{stage};dur=" in timing
+
+    def test_header_is_opt_in(self, client):
+        before = self._stage_count("availability", "index_lookup")
+        response = client.get(
+            f"/restaurants/{self.RID}/availability",
+            params={"date": "2030-01-01", "party_size": 2},
+        )
+        assert "Server-Timing" not in response.headers
+        assert self._stage_count("availability", "index_lookup") == before + 1
+
+    def test_repeated_stages_are_summed(self):
+        value = format_server_timing([("a-x", 0.001), ("a-y", 0.002), ("a-x", 0.0005)], 0.01)
+        assert value == "a-x;dur=1.5, a-y;dur=2.0, total;dur=10.0"
+
+
 # ==============================================================================
 # HEALTH CHECK TESTS
 # ==============================================================================
@@ -198,6 +376,78 @@ class TestEnhancedHealthCheck:
         assert abs(time2 - time1) < 1.0
 
 
+class TestHealthSnapshot:
+    """Test concurrent, time-bounded checks served from a snapshot."""
+
+    def test_checks_run_concurrently_with_timeouts(self, monkeypatch):
+        checker = HealthChecker()
+        calls: list[str] = []
+
+        def slow(name, delay):
+            async def check():
+                calls.append(name)
+                await asyncio.sleep(delay)
+                return {"status": "ok"}
+
+            return check
+
+        monkeypatch.setattr(settings, "GOMAP_GUID", "guid")
+        monkeypatch.setattr(settings, "SENTRY_DSN", "https://key@sentry.example/1")
+        monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.3)
+        monkeypatch.setattr(checker, "_check_gomap", slow("gomap", 0.2))
+        monkeypatch.setattr(checker, "_check_sentry", slow("sentry", 0.2))
+        monkeypatch.setattr(checker, "_check_database", slow("database", 5.0))
+
+        started = time.perf_counter()
+        result = asyncio.run(checker.check_all())
+        elapsed = time.perf_counter() - started
+
+        assert sorted(calls) == ["database", "gomap", "sentry"]
+        assert elapsed < 1.0
+        assert result["checks"]["gomap"] == {"status": "ok"}
+        assert result["checks"]["database"]["error_type"] == "TimeoutError"
+        assert result["checks"]["auth0"] == {"status": "bypassed"}
+        assert result["status"] == "degraded"
+
+    def test_probes_are_served_from_snapshot(self, monkeypatch):
+        checker = HealthChecker()
+        runs = []
+
+        async def check_all():
+            runs.append(time.monotonic())
+            return {"status": "healthy", "run": len(runs)}
+
+        monkeypatch.setattr(checker, "check_all", check_all)
+
+        async def probe():
+            first = await asyncio.gather(*(checker.get_snapshot() for _ in range(5)))
+            cached = await checker.get_snapshot()
+            checker._snapshot_at -= settings.HEALTH_SNAPSHOT_MAX_AGE_SECONDS + 1
+            stale = await checker.get_snapshot()
+            await checker._refresh_task
+            return first, cached, stale, await checker.get_snapshot()
+
+        first, cached, stale, refreshed = asyncio.run(probe())
+
+        assert [snapshot["run"] for snapshot in first] == [1] * 5
+        assert cached["run"] == 1
+        assert stale["run"] == 1  # Stale snapshot returned while the refresh runs
+        assert refreshed["run"] == 2
+        assert len(runs) == 2
+
+    def test_database_check_does_not_copy_reservations(self, monkeypatch):
+        from backend.app.storage import DB
+
+        def copy_everything(*args, **kwargs):
+            raise AssertionError("health check should not list reservations")
+
+        monkeypatch.setattr(DB, "list_reservations", copy_everything)
+        result = asyncio.run(HealthChecker()._check_database())
+
+        assert result["status"] == "ok"
+        assert result["reservation_count"] == len(DB.reservations)
+
+
 # ==============================================================================
 # REQUEST ID TRACING TESTS
 # ==============================================================================
@@ -3,7 +3,12 @@ Performance and load tests for the backend.
 Tests response times, throughput, and resource usage.
 """
 
+import os
+import subprocess
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import pytest
 from backend.app.main import app
@@ -119,6 +124,89 @@ class TestMemoryUsage:
         assert all(r.status_code == 200 for r in responses)
 
 
+class TestRateLimiterThroughput:
+    """Test rate limiter bucket throughput and memory bounds"""
+
+    def test_local_buckets_many_clients(self, benchmark):
+        """Token checks stay cheap and bounded with many distinct clients"""
+        from backend.app.rate_limit import LocalBucketStore
+
+        store = LocalBucketStore(max_buckets=5000)
+        keys = [f"10.0.{i // 256}.{i % 256}" for i in range(20000)]
+
+        def consume_all():
+            for key in keys:
+                store.consume(key, capacity=300, rate=5.0)
+
+        benchmark(consume_all)
+        assert len(store) <= 5000
+        # ~5us per check, whatever the machine does with the whole batch
+        assert benchmark.stats.stats.mean / len(keys) < 5e-6
+
+
+COLD_IMPORT = """
+import sys, time
+started = time.perf_counter()
+import backend.app.main
+elapsed = time.perf_counter() - started
+from backend.app import concierge_service, request_batcher, storage
+print(elapsed)
+print(storage._database is None, concierge_service._service is None,
+      request_batcher._autocomplete_batcher is None, "sentry_sdk" in sys.modules)
+"""
+
+# About twice a typical ~1s cold import. Profile with tools/profile_imports.py
+IMPORT_BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET_SECONDS", "2.0"))
+
+
+class TestColdStart:
+    """Test importing the app stays fast and defers heavy subsystems"""
+
+    def test_import_within_budget_and_lazy(self, tmp_path):
+        """Fresh interpreter imports backend.app.main within budget without side effects"""
+        repo_root = Path(__file__).resolve().parents[2]
+        env = {**os.environ, "DATA_DIR": str(tmp_path), "SENTRY_DSN": ""}
+        runs = []
+        for _ in range(2):  # Best of two, to ride out a noisy neighbour
+            output = subprocess.run(
+                [sys.executable, "-c", COLD_IMPORT],
+                cwd=repo_root,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=60,
+            ).stdout.split()
+            runs.append(float(output[0]))
+            # Database, concierge and batcher are built on first use; Sentry is not imported
+            assert output[1:] == ["True", "True", "True", "False"]
+
+        assert min(runs) < IMPORT_BUDGET_SECONDS
+        assert not (tmp_path / "reservations.json").exists()
+
+    def test_concurrent_first_use_builds_one_concierge(self, monkeypatch):
+        """Requests racing to first use share one concierge and its feature tables"""
+        from backend.app import concierge_service
+
+        built = []
+
+        def slow_service():
+            time.sleep(0.05)
+            built.append(object())
+            return built[-1]
+
+        monkeypatch.setattr(concierge_service, "_service", None)
+        monkeypatch.setattr(concierge_service, "ConciergeService", slow_service)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            services = list(pool.map(lambda _: concierge_service.get_concierge_service(), range(8)))
+
+        assert len(built) == 1
+        assert all(service is built[0] for service in services)
+        # Without a DSN the concierge makes no Sentry calls (and never imports the SDK)
+        monkeypatch.setattr(concierge_service.settings, "SENTRY_DSN", None)
+        assert concierge_service._sentry() is None
+
+
 class TestDatabasePerformance:
     """Test database query performance"""
 
@@ -0,0 +1,90 @@
+"""Tests for route geometry simplification and encoding."""
+
+from __future__ import annotations
+
+import json
+import math
+
+import numpy as np
+import pytest
+from backend.app import polyline
+from backend.app.api.routes import restaurants as restaurant_routes
+from backend.app.arrival_tracking import RouteSnapshot
+from backend.app.cache import clear_all_caches
+from backend.app.maps import EtaComputation, format_route_geometry
+
+
+def _dense_route(points: int = 2000) -> list[tuple[float, float]]:
+    """A gently curving street with GPS-style jitter, one point every ~5 m."""
+    rng = np.random.default_rng(1)
+    t = np.linspace(0, 1, points)
+    lat = 40.37 + 0.06 * t + 0.004 * np.sin(t * 6 * math.pi) + rng.normal(0, 2e-6, points)
+    lon = 49.83 + 0.05 * t + rng.normal(0, 2e-6, points)
+    return [(round(a, 6), round(b, 6)) for a, b in zip(lat, lon, strict=True)]
+
+
+class TestEncoding:
+    def test_matches_reference_polyline(self):
+        points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+        assert polyline.encode(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        assert polyline.decode("_p~iF~ps|U_ulLnnqC_mqNvxq`@") == points
+
+    def test_round_trip_at_precision_six(self):
+        points = _dense_route(50)
+        decoded = polyline.decode(polyline.encode(points, 6), 6)
+
+        assert decoded == pytest.approx(points, abs=1e-6)
+
+
+class TestSimplify:
+    def test_keeps_endpoints_and_error_bound(self):
+        points = _dense_route()
+        simplified = polyline.simplify(points, 5.0)
+
+        assert simplified[0] == points[0] and simplified[-1] == points[-1]
+        assert len(simplified) < len(points) / 10
+        # Every original point stays within tolerance of the simplified line
+        snapshot = RouteSnapshot(EtaComputation(1, 60), simplified)
+        worst = max(snapshot.project(lat, lon).offset_m for lat, lon in points[::7])
+        assert worst <= 5.0 + 0.5
+
+    def test_zoom_tolerance_halves_per_level(self):
+        assert polyline.tolerance_for_zoom(15) == pytest.approx(polyline.tolerance_for_zoom(14) / 2)
+
+
+class TestResponses:
+    def test_compact_geometry_shrinks_payload(self):
+        clear_all_caches()
+        points = _dense_route()
+
+        compact = format_route_geometry(points, "polyline", zoom=16)
+
+        assert isinstance(compact, str)
+        assert len(compact) < 0.15 * len(json.dumps(points))
+        assert format_route_geometry(points, "polyline", zoom=16) is compact
+        # Equal points in a new list, e.g. a shifted copy of a cached route, hit too
+        assert format_route_geometry(list(points), "polyline", zoom=16) is compact
+        assert format_route_geometry(points[1:], "polyline", zoom=16) is not compact
+        assert format_route_geometry(points) is points
+
+    def test_directions_returns_encoded_polyline(self, client, monkeypatch):
+        points = _dense_route(200)
+        eta = EtaComputation(eta_minutes=9, eta_seconds=540, route_geometry=points)
+        monkeypatch.setattr(restaurant_routes, "compute_eta_with_traffic", lambda *a: eta)
+
+        resp = client.get(
+            "/directions",
+            params={
+                "origin": "40.37,49.83",
+                "destination": "40.43,49.88",
+                "geometry_format": "polyline6",
+                "simplify_m": 3,
+            },
+        )
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["route_geometry_format"] == "polyline6"
+        decoded = polyline.decode(body["route_geometry"], 6)
+        assert decoded[0] == pytest.approx(points[0]) and len(decoded) < len(points)
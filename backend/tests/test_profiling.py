@@ -0,0 +1,82 @@
+"""Tests for the on-demand stack sampler and profiling endpoints."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from backend.app.auth import require_auth
+from backend.app.main import app
+from backend.app.profiling import ProfilerBusy, StackSampler
+from backend.app.settings import settings
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+@pytest.fixture
+def profiling_admin(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setitem(
+        app.dependency_overrides, require_auth, lambda: {"sub": "ops", "scope": "admin:profile"}
+    )
+
+
+class TestStackSampler:
+    def test_collapsed_stacks_name_busy_function(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=_spin, args=(stop,), name="spinner")
+        worker.start()
+        try:
+            with StackSampler(interval=0.001) as sampler:
+                time.sleep(0.1)
+        finally:
+            stop.set()
+            worker.join()
+
+        assert sampler.samples > 0
+        lines = sampler.collapsed().splitlines()
+        spinning = [line for line in lines if line.startswith("spinner;")]
+        assert spinning
+        stack, count = spinning[0].rsplit(" ", 1)
+        assert stack.endswith("backend/tests/test_profiling.py:_spin")
+        assert int(count) > 0
+        # Parked threads are left out unless asked for
+        assert not any(line.split(" ")[0].endswith("Event.wait") for line in lines)
+
+    def test_one_sampler_per_worker(self):
+        with StackSampler():
+            with pytest.raises(ProfilerBusy):
+                StackSampler().start()
+        with StackSampler():
+            pass
+
+
+class TestProfileEndpoints:
+    def test_disabled_by_default(self, client):
+        assert client.get("/dev/profile", params={"seconds": 0.01}).status_code == 404
+
+    def test_requires_profile_scope(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+        assert client.get("/dev/profile", params={"seconds": 0.01}).status_code == 403
+
+    def test_worker_profile(self, client, profiling_admin):
+        response = client.get("/dev/profile", params={"seconds": 0.05, "interval_ms": 1})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["X-Profile-Samples"]) > 0
+
+    def test_request_header_profile(self, client, profiling_admin, monkeypatch):
+        monkeypatch.setattr(settings, "PROFILING_REQUEST_TOKEN", "s3cret")
+
+        assert "X-Profile-Id" not in client.get("/health", headers={"X-Profile": "nope"}).headers
+        response = client.get("/health", headers={"X-Profile": "s3cret"})
+        profile_id = response.headers["X-Profile-Id"]
+
+        trace = client.get(f"/dev/profile/requests/{profile_id}")
+        assert trace.status_code == 200
+        assert client.get("/dev/profile/requests/unknown").status_code == 404
@@ -0,0 +1,185 @@
+"""Tests for token-bucket rate limiting storage and route cost classes."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from backend.app.rate_limit import (
+    LocalBucketStore,
+    RedisBucketStore,
+    parse_route_costs,
+    route_cost,
+    take_tokens,
+)
+from backend.app.settings import settings
+from backend.app.utils import RateLimiter, add_rate_limiting
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+class FakeRedis:
+    """Stand-in for redis.asyncio that runs the bucket script in Python."""
+
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.ttls: dict[str, int] = {}
+        self.now = 1_000.0
+        self.calls = 0
+        self.fail = False
+
+    def register_script(self, source: str):
+        assert "redis.call('TIME')" in source
+
+        async def run(keys, args):
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis down")
+            key = keys[0]
+            capacity, rate, cost = (float(value) for value in args)
+            bucket = self.hashes.get(key)
+            if bucket is None:
+                tokens, ts = capacity, self.now
+            else:
+                tokens, ts = float(bucket["tokens"]), float(bucket["ts"])
+            allowed, tokens = take_tokens(tokens, self.now - ts, capacity, rate, cost)
+            self.hashes[key] = {"tokens": str(tokens), "ts": str(self.now)}
+            self.ttls[key] = int((capacity - tokens) / rate * 1000) + 1000
+            return [int(allowed), str(tokens)]
+
+        return run
+
+
+class TestLocalBucketStore:
+    def test_idle_buckets_are_dropped(self):
+        store = LocalBucketStore()
+        for index in range(100):
+            store.consume(f"client-{index}", capacity=10, rate=1.0, now=0.0)
+        assert len(store) == 100
+
+        store.consume("client-0", capacity=10, rate=1.0, now=5.0)
+        assert len(store) == 100  # Nobody has been idle for a full refill yet
+
+        store.consume("late", capacity=10, rate=1.0, now=10.5)
+        assert len(store) == 2  # client-0 (t=5) and the new bucket survive
+        assert store.evictions == 99
+
+    def test_max_buckets_evicts_least_recent(self):
+        store = LocalBucketStore(max_buckets=3)
+        for key in ("a", "b", "c"):
+            store.consume(key, capacity=5, rate=0.1, now=0.0)
+        store.consume("a", capacity=5, rate=0.1, now=1.0)
+        store.consume("d", capacity=5, rate=0.1, now=2.0)
+
+        assert len(store) == 3
+        # "b" was evicted, so it starts from a full bucket again
+        assert store.consume("b", capacity=5, rate=0.1, now=3.0).remaining == 4
+
+    def test_refill_and_deny(self):
+        store = LocalBucketStore()
+        assert store.consume("ip", capacity=2, rate=1.0, cost=2, now=0.0).allowed
+        denied = store.consume("ip", capacity=2, rate=1.0, now=0.5)
+        assert not denied.allowed
+        assert denied.reset_in == pytest.approx(0.5)
+        assert store.consume("ip", capacity=2, rate=1.0, now=1.0).allowed
+
+
+class TestRouteCosts:
+    def test_parse_and_match(self):
+        costs = parse_route_costs("/concierge=5, /directions/=3,bad,/x=abc,/route=0")
+        assert costs == [("/directions", 3), ("/concierge", 5)]
+        assert route_cost("/concierge/recommendations", costs) == 5
+        assert route_cost("/v1/directions/matrix", costs) == 3
+        assert route_cost("/directionsfoo", costs) == 1
+        assert route_cost("/restaurants", costs) == 1
+
+    def test_heavy_route_takes_more_tokens(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(settings, "RATE_LIMIT_REQUESTS", 10)
+        monkeypatch.setattr(settings, "RATE_LIMIT_WINDOW_SECONDS", 60)
+        monkeypatch.setattr(settings, "RATE_LIMIT_ROUTE_COSTS", "/concierge=4")
+        app = FastAPI()
+        add_rate_limiting(app)
+
+        @app.get("/concierge/recommendations")
+        def recommend():
+            return {"ok": True}
+
+        @app.get("/restaurants")
+        def restaurants():
+            return {"ok": True}
+
+        client = TestClient(app)
+        assert client.get("/restaurants").headers["X-RateLimit-Remaining"] == "9"
+        assert client.get("/concierge/recommendations").headers["X-RateLimit-Remaining"] == "5"
+        assert client.get("/concierge/recommendations").status_code == 200
+        assert client.get("/concierge/recommendations").status_code == 429
+        assert client.get("/restaurants").status_code == 200
+
+
+class TestRedisBuckets:
+    def test_limit_is_shared_across_workers(self):
+        redis = FakeRedis()
+        workers = [RateLimiter(RedisBucketStore(redis)), RateLimiter(RedisBucketStore(redis))]
+
+        async def run():
+            results = []
+            for index in range(4):
+                limiter = workers[index % 2]
+                results.append(await limiter._consume("1.2.3.4", 3, 3 / 60))
+            return results
+
+        results = asyncio.run(run())
+
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert redis.calls == 4
+        assert set(redis.hashes) == {"ratelimit:1.2.3.4"}
+        assert redis.ttls["ratelimit:1.2.3.4"] == 61_000
+        assert results[-1].reset_in == pytest.approx(20.0)
+
+    def test_falls_back_to_local_buckets_when_redis_fails(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_REDIS_RETRY_SECONDS", 60.0)
+        redis = FakeRedis()
+        redis.fail = True
+        limiter = RateLimiter(RedisBucketStore(redis))
+
+        async def run():
+            first = await limiter._consume("ip", 2, 1.0)
+            second = await limiter._consume("ip", 2, 1.0)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first.allowed and second.allowed
+        assert redis.calls == 1  # Redis is not retried inside the back-off window
+        assert limiter.get_stats()["backend"] == "local"
+        assert limiter.get_stats()["local_buckets"] == 1
+
+
+@pytest.mark.skipif(not os.getenv("TEST_REDIS_URL"), reason="TEST_REDIS_URL not set")
+class TestRedisBucketScript:
+    """Runs TOKEN_BUCKET_LUA on a real server, e.g. TEST_REDIS_URL=redis://localhost:6379/15."""
+
+    def test_script_refills_and_denies(self):
+        import redis.asyncio as aioredis
+
+        async def run():
+            client = aioredis.from_url(os.environ["TEST_REDIS_URL"], decode_responses=True)
+            store = RedisBucketStore(client, prefix=f"ratelimit-test:{uuid.uuid4().hex}:")
+            try:
+                results = [await store.consume("ip", capacity=3, rate=0.05) for _ in range(4)]
+                ttl = await client.pttl(store.prefix + "ip")
+                await client.delete(store.prefix + "ip")
+            finally:
+                await client.aclose()
+            return results, ttl
+
+        results, ttl = asyncio.run(run())
+
+        assert [result.allowed for result in results] == [True, True, True, False]
+        assert [result.remaining for result in results[:3]] == [2, 1, 0]
+        assert results[-1].reset_in == pytest.approx(20.0, abs=0.5)
+        # Expires once the bucket would have refilled, plus a second of slack
+        assert 60_000 < ttl <= 61_000
@@ -0,0 +1,254 @@
+"""Tests for multi-stop route optimization."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from backend.app import route_optimizer, tsp_solvers
+from backend.app.route_optimizer import HaversineMatrixProvider, Location, MultiStopOptimizer
+
+
+def _locations(count: int) -> list[Location]:
+    return [
+        Location(
+            id=f"L{i}",
+            name=f"Stop {i}",
+            latitude=round(40.37 + i * 0.01, 4),
+            longitude=round(49.83 + i * 0.01, 4),
+        )
+        for i in range(count)
+    ]
+
+
+class RecordingRouter:
+    """Stand-in for GoMap per-pair routing that tracks concurrency."""
+
+    def __init__(self, delay: float = 0.0, fail_for: set[tuple[float, float]] | None = None):
+        self.delay = delay
+        self.fail_for = fail_for or set()
+        self.calls: list[tuple[float, float, float, float]] = []
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, lat1, lon1, lat2, lon2, route_type="fastest"):
+        with self._lock:
+            self.calls.append((lat1, lon1, lat2, lon2))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if (lat1, lat2) in self.fail_for:
+                raise RuntimeError("upstream error")
+            return SimpleNamespace(distance_km=1.5, duration_seconds=300)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def router(monkeypatch):
+    stub = RecordingRouter(delay=0.02)
+    monkeypatch.setattr(route_optimizer, "route_directions_by_type", stub)
+    return stub
+
+
+class TestDistanceMatrix:
+    def test_cells_fetched_concurrently_within_worker_bound(self, router):
+        optimizer = MultiStopOptimizer(max_workers=4)
+        optimizer._build_distance_matrix(_locations(4))
+
+        stats = optimizer.last_matrix_stats
+        assert stats.cells_total == 12
+        assert stats.cells_fetched == 12
+        assert 1 < router.peak <= 4
+        assert optimizer._get_duration("L0", "L1") == 5
+
+    def test_pedestrian_routes_reuse_symmetric_pairs(self, router):
+        optimizer = MultiStopOptimizer(route_type="pedestrian")
+        optimizer._build_distance_matrix(_locations(4))
+
+        assert len(router.calls) == 6
+        assert optimizer.last_matrix_stats.cells_mirrored == 6
+        assert optimizer._get_distance("L2", "L0") == optimizer._get_distance("L0", "L2")
+
+    def test_deadline_falls_back_to_haversine(self, monkeypatch):
+        stub = RecordingRouter(delay=0.5)
+        monkeypatch.setattr(route_optimizer, "route_directions_by_type", stub)
+        optimizer = MultiStopOptimizer(max_workers=2, matrix_deadline_seconds=0.05)
+
+        started = time.perf_counter()
+        optimizer._build_distance_matrix(_locations(3))
+
+        assert time.perf_counter() - started < 0.4
+        stats = optimizer.last_matrix_stats
+        assert stats.deadline_hit
+        assert stats.cells_fallback == 6
+        expected = optimizer._haversine_distance(40.37, 49.83, 40.38, 49.84)
+        assert optimizer._get_distance("L0", "L1") == pytest.approx(expected)
+
+    def test_failed_cell_uses_fallback(self, monkeypatch):
+        stub = RecordingRouter(fail_for={(40.37, 40.38)})
+        monkeypatch.setattr(route_optimizer, "route_directions_by_type", stub)
+        optimizer = MultiStopOptimizer()
+        optimizer._build_distance_matrix(_locations(2))
+
+        assert optimizer.last_matrix_stats.cells_fallback == 1
+        assert optimizer.last_matrix_stats.cells_fetched == 1
+
+    def test_matrix_provider_skips_per_pair_calls(self, router):
+        progress: list[tuple[int, int]] = []
+        optimizer = MultiStopOptimizer(
+            matrix_provider=HaversineMatrixProvider(),
+            on_progress=lambda done, total: progress.append((done, total)),
+        )
+        route = optimizer.optimize_route(_locations(1)[0], _locations(4)[1:])
+
+        assert router.calls == []
+        assert optimizer.last_matrix_stats.provider == "haversine"
+        assert progress[-1] == (12, 12)
+        assert [loc.id for loc in route.locations][0] == "L0"
+
+
+def _random_matrix(stops: int, seed: int = 7, symmetric: bool = False) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    matrix = rng.uniform(0.5, 10.0, size=(stops + 2, stops + 2))
+    if symmetric:
+        matrix = (matrix + matrix.T) / 2
+    np.fill_diagonal(matrix, 0.0)
+    return matrix
+
+
+class TestSolvers:
+    @pytest.mark.parametrize("symmetric", [True, False])
+    def test_held_karp_matches_brute_force(self, symmetric):
+        matrix = _random_matrix(7, symmetric=symmetric)
+        exact = tsp_solvers.held_karp(matrix)
+        enumerated = tsp_solvers.brute_force(matrix)
+
+        assert exact.cost == pytest.approx(enumerated.cost)
+        assert exact.cost == pytest.approx(tsp_solvers.tour_cost(matrix, exact.order))
+        assert sorted(exact.order) == list(range(1, 8))
+
+    def test_local_search_improves_on_nearest_neighbor(self):
+        matrix = _random_matrix(30, seed=3)
+        initial = tsp_solvers.nearest_neighbor(matrix)
+        improved = tsp_solvers.local_search(matrix, initial.order)
+
+        assert sorted(improved.order) == list(range(1, 31))
+        assert improved.cost <= initial.cost
+        assert improved.cost == pytest.approx(tsp_solvers.tour_cost(matrix, improved.order))
+
+    def test_local_search_reaches_optimum_on_small_instance(self):
+        matrix = _random_matrix(9, seed=11, symmetric=True)
+        optimum = tsp_solvers.held_karp(matrix).cost
+        improved = tsp_solvers.local_search(matrix, tsp_solvers.nearest_neighbor(matrix).order)
+
+        assert improved.cost <= optimum * 1.1
+
+    def test_expired_budget_returns_best_so_far(self):
+        matrix = _random_matrix(40, seed=5)
+        initial = tsp_solvers.nearest_neighbor(matrix)
+        result = tsp_solvers.local_search(matrix, initial.order, tsp_solvers.Deadline(0))
+
+        assert result.exhausted
+        assert result.order == initial.order
+        assert tsp_solvers.held_karp(_random_matrix(10), tsp_solvers.Deadline(0)) is None
+
+
+class TestOptimizeRoute:
+    def test_auto_uses_exact_solver_for_small_routes(self):
+        optimizer = MultiStopOptimizer(matrix_provider=HaversineMatrixProvider())
+        locations = _locations(7)
+        # Visit order deliberately scrambled along a straight line
+        scrambled = [locations[i] for i in (4, 1, 6, 2, 5, 3)]
+        route = optimizer.optimize_route(locations[0], scrambled)
+
+        assert route.optimization_method == "held_karp"
+        assert [loc.id for loc in route.locations] == [f"L{i}" for i in range(7)]
+        assert route.savings_km > 0
+
+    def test_time_budget_falls_back_to_heuristic(self):
+        optimizer = MultiStopOptimizer(matrix_provider=HaversineMatrixProvider())
+        locations = _locations(13)
+        route = optimizer.optimize_route(
+            locations[0], locations[1:], return_to_start=True, time_budget_ms=0.001
+        )
+
+        assert route.budget_exhausted
+        assert route.optimization_method == "nearest_neighbor"
+        assert route.locations[-1].id == "L0"
+
+
+class TestTimeWindows:
+    def _optimizer(self) -> MultiStopOptimizer:
+        # 28 km/h haversine durations keep stops 1-2 minutes apart
+        return MultiStopOptimizer(matrix_provider=HaversineMatrixProvider())
+
+    def test_windows_override_shortest_order(self):
+        locations = _locations(4)
+        for loc in locations[1:]:
+            loc.visit_duration_minutes = 60
+        # The farthest stop has the earliest table, the nearest the latest
+        locations[3].reservation_minute = 18 * 60
+        locations[2].reservation_minute = 19 * 60 + 30
+        locations[1].time_window = (21, 23)
+
+        route = self._optimizer().optimize_route(
+            locations[0], locations[1:], departure_minute=17 * 60 + 30
+        )
+
+        assert route.optimization_method == "time_windows"
+        assert [stop["location_id"] for stop in route.schedule] == ["L3", "L2", "L1"]
+        first = route.schedule[0]
+        assert first["arrival_minute"] == 18 * 60
+        assert first["wait_minutes"] > 0
+        assert first["slack_minutes"] == 15
+        assert all(stop["slack_minutes"] >= 0 for stop in route.schedule)
+        # Waiting downstream absorbs delay, so forward slack never exceeds own slack
+        assert first["forward_slack_minutes"] <= first["slack_minutes"]
+
+    def test_infeasible_windows_raise(self):
+        locations = _locations(3)
+        locations[1].reservation_minute = 20 * 60
+        locations[2].reservation_minute = 20 * 60
+        locations[1].visit_duration_minutes = 90
+
+        with pytest.raises(ValueError, match="time window"):
+            self._optimizer().optimize_route(locations[0], locations[1:], departure_minute=19 * 60)
+
+    def test_closing_time_accounts_for_visit_length(self):
+        loc = Location(
+            "late", "Late bar", 40.4, 49.8, visit_duration_minutes=45, time_window=(18, 2)
+        )
+
+        assert MultiStopOptimizer()._arrival_window(loc) == (18 * 60, 26 * 60 - 45)
+
+    @pytest.mark.parametrize("width", [120, 150])
+    def test_time_window_solver_matches_enumeration(self, width):
+        rng = np.random.default_rng(4)
+        n = 7
+        durations = rng.integers(5, 30, size=(n + 2, n + 2)).astype(float)
+        np.fill_diagonal(durations, 0)
+        service = np.full(n + 2, 20.0)
+        earliest = np.concatenate(([0], rng.integers(0, 120, n), [0])).astype(float)
+        latest = earliest + width
+        latest[[0, -1]] = np.inf
+
+        solved = tsp_solvers.time_windows(durations, service, earliest, latest, 0.0)
+
+        best = np.inf
+        for perm in itertools.permutations(range(1, n + 1)):
+            arrivals, _ = tsp_solvers.time_window_schedule(durations, service, earliest, perm, 0.0)
+            if np.all(arrivals[1:-1] <= latest[list(perm)]):
+                best = min(best, arrivals[-1])
+        if np.isinf(best):
+            assert solved is None
+        else:
+            assert solved.cost == pytest.approx(best)
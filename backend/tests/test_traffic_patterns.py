@@ -0,0 +1,309 @@
+"""Tests for historical traffic pattern tracking."""
+
+from __future__ import annotations
+
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from backend.app import traffic_patterns
+from backend.app.traffic_patterns import RunningAggregate, TrafficPatternTracker
+
+MONDAY_8AM = datetime(2026, 3, 2, 8, 15)
+
+
+@pytest.fixture
+def tracker(tmp_path, monkeypatch):
+    monkeypatch.setattr(traffic_patterns.settings, "TRAFFIC_INGEST_BATCH_SIZE", 50)
+    monkeypatch.setattr(traffic_patterns.settings, "TRAFFIC_INGEST_FLUSH_INTERVAL_SECONDS", 0)
+    tracker = TrafficPatternTracker(tmp_path / "traffic.db")
+    yield tracker
+    tracker.close()
+
+
+def _raw_count(tracker: TrafficPatternTracker) -> int:
+    with sqlite3.connect(tracker.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM traffic_observations").fetchone()[0]
+
+
+def _stored_pattern(tracker: TrafficPatternTracker) -> tuple[int, float]:
+    with sqlite3.connect(tracker.db_path) as conn:
+        return conn.execute("SELECT sample_count, severity_avg FROM traffic_patterns").fetchone()
+
+
+def _wait_for(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestRunningAggregate:
+    def test_matches_batch_statistics(self):
+        values = [1, 3, 2, 4, 2, 2, 3]
+        aggregate = RunningAggregate()
+        for value in values:
+            aggregate.add(value, window=100, timestamp=MONDAY_8AM)
+
+        assert aggregate.count == len(values)
+        assert aggregate.mean == pytest.approx(statistics.mean(values))
+        assert aggregate.std == pytest.approx(statistics.stdev(values))
+
+    def test_window_keeps_adapting(self):
+        aggregate = RunningAggregate()
+        for _ in range(10):
+            aggregate.add(1, window=10, timestamp=MONDAY_8AM)
+        for _ in range(30):
+            aggregate.add(4, window=10, timestamp=MONDAY_8AM)
+
+        assert aggregate.count == 10
+        assert aggregate.mean > 3.8
+
+
+class TestBufferedIngestion:
+    def test_observations_buffer_until_batch_size(self, tracker):
+        for _ in range(49):
+            tracker.record_observation(40.41, 49.87, severity=2, timestamp=MONDAY_8AM)
+        assert _raw_count(tracker) == 0
+
+        tracker.record_observation(40.41, 49.87, severity=2, timestamp=MONDAY_8AM)
+        assert _wait_for(lambda: _raw_count(tracker) == 50)
+
+    def test_full_batch_is_flushed_off_the_calling_thread(self, tracker):
+        for _ in range(49):
+            tracker.record_observation(40.41, 49.87, severity=2, timestamp=MONDAY_8AM)
+
+        # As if maintenance were holding the database
+        with tracker._db_lock:
+            caller = threading.Thread(
+                target=tracker.record_observation,
+                args=(40.41, 49.87),
+                kwargs={"severity": 2, "timestamp": MONDAY_8AM},
+            )
+            caller.start()
+            caller.join(timeout=1)
+            assert not caller.is_alive()
+
+        assert _wait_for(lambda: _raw_count(tracker) == 50)
+
+    def test_failed_flush_keeps_the_batch(self, tracker):
+        for _ in range(6):
+            tracker.record_observation(40.41, 49.87, severity=3, timestamp=MONDAY_8AM)
+        with sqlite3.connect(tracker.db_path) as conn:
+            conn.execute(
+                "CREATE TRIGGER reject BEFORE INSERT ON traffic_observations "
+                "BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+            )
+
+        with pytest.raises(sqlite3.DatabaseError):
+            tracker.flush()
+        with sqlite3.connect(tracker.db_path) as conn:
+            conn.execute("DROP TRIGGER reject")
+
+        assert tracker.flush() == 6
+        assert _raw_count(tracker) == 6
+        assert _stored_pattern(tracker) == (6, 3.0)
+
+    def test_workers_sharing_a_database_pool_their_samples(self, tracker, tmp_path):
+        other = TrafficPatternTracker(tmp_path / "traffic.db")
+        try:
+            for _ in range(6):
+                tracker.record_observation(40.41, 49.87, severity=1, timestamp=MONDAY_8AM)
+                other.record_observation(40.41, 49.87, severity=3, timestamp=MONDAY_8AM)
+            tracker.flush()
+            other.flush()
+            tracker.record_observation(40.41, 49.87, severity=1, timestamp=MONDAY_8AM)
+            tracker.flush()
+        finally:
+            other.close()
+
+        count, mean = _stored_pattern(tracker)
+        assert count == 13
+        assert mean == pytest.approx(25 / 13)
+
+    def test_prediction_uses_unflushed_aggregates(self, tracker):
+        for i in range(12):
+            tracker.record_observation(
+                40.41, 49.87, severity=3, timestamp=MONDAY_8AM - timedelta(weeks=i)
+            )
+
+        prediction = tracker.predict_traffic(40.41, 49.87, target_time=MONDAY_8AM)
+
+        assert prediction.prediction_method == "historical_pattern"
+        assert prediction.historical_samples == 12
+        assert _raw_count(tracker) == 0
+
+    def test_aggregates_survive_restart(self, tracker, tmp_path):
+        for severity in (1, 2, 3, 2, 2, 3):
+            tracker.record_observation(40.41, 49.87, severity=severity, timestamp=MONDAY_8AM)
+        tracker.close()
+
+        reopened = TrafficPatternTracker(tmp_path / "traffic.db")
+        try:
+            pattern = reopened._get_pattern(reopened._get_grid_id(40.41, 49.87), 0, 8)
+            assert pattern.sample_count == 6
+            assert pattern.severity_avg == pytest.approx(13 / 6)
+            assert reopened.get_statistics()["total_observations"] == 6
+        finally:
+            reopened.close()
+
+    def test_anomalies_written_with_batch(self, tracker):
+        for _ in range(25):
+            tracker.record_observation(40.41, 49.87, severity=1, timestamp=MONDAY_8AM)
+        tracker.record_observation(40.41, 49.87, severity=4, timestamp=MONDAY_8AM)
+
+        assert tracker.get_statistics()["anomalies_detected"] == 1
+
+
+class TestPatternTensor:
+    def test_batch_matches_single_predictions(self, tracker):
+        for _ in range(15):
+            tracker.record_observation(40.41, 49.87, severity=3, timestamp=MONDAY_8AM)
+            tracker.record_observation(40.45, 49.90, severity=1, timestamp=MONDAY_8AM)
+        points = [(40.41, 49.87), (40.45, 49.90), (40.60, 50.10)]
+        evening = MONDAY_8AM + timedelta(hours=13)
+
+        batch = tracker.predict_traffic_batch(points, [MONDAY_8AM, MONDAY_8AM, evening])
+        single = [
+            tracker.predict_traffic(40.41, 49.87, target_time=MONDAY_8AM),
+            tracker.predict_traffic(40.45, 49.90, target_time=MONDAY_8AM),
+            tracker.predict_traffic(40.60, 50.10, target_time=evening),
+        ]
+
+        assert batch == single
+        assert [p.prediction_method for p in batch] == [
+            "historical_pattern",
+            "historical_pattern",
+            "general_pattern",
+        ]
+
+    def test_tensor_grows_with_new_grid_cells(self, tracker):
+        for i in range(100):
+            tracker.record_observation(40.0 + i * 0.01, 49.8, severity=2, timestamp=MONDAY_8AM)
+
+        assert len(tracker._tensor) == 100
+        assert tracker._tensor.count[:100, 0, 8].sum() == 100
+
+    def test_refresh_picks_up_other_writers(self, tracker, tmp_path):
+        other = TrafficPatternTracker(tmp_path / "traffic.db")
+        try:
+            for _ in range(12):
+                other.record_observation(40.41, 49.87, severity=4, timestamp=MONDAY_8AM)
+            other.flush()
+        finally:
+            other.close()
+
+        before = tracker.predict_traffic(40.41, 49.87, target_time=MONDAY_8AM)
+        assert before.prediction_method == "general_pattern"
+
+        assert tracker.refresh_patterns() == 1
+        after = tracker.predict_traffic(40.41, 49.87, target_time=MONDAY_8AM)
+        assert after.historical_samples == 12
+
+    def test_refresh_during_another_flush_picks_its_rows_up_later(self, tracker, tmp_path):
+        other = TrafficPatternTracker(tmp_path / "traffic.db")
+
+        class RefreshBeforeCommit:
+            """The other worker's connection; this worker refreshes mid-transaction."""
+
+            def __init__(self, conn):
+                self.conn = conn
+
+            def __enter__(self):
+                return self.conn.__enter__()
+
+            def __exit__(self, *exc_info):
+                tracker.refresh_patterns()
+                return self.conn.__exit__(*exc_info)
+
+            def __getattr__(self, name):
+                return getattr(self.conn, name)
+
+        other._conn = RefreshBeforeCommit(other._conn)
+        try:
+            for _ in range(12):
+                other.record_observation(40.41, 49.87, severity=4, timestamp=MONDAY_8AM)
+            other.flush()
+        finally:
+            other.close()
+
+        # Stamped before the mid-flush refresh started, committed after it ran
+        assert tracker.refresh_patterns() == 1
+        after = tracker.predict_traffic(40.41, 49.87, target_time=MONDAY_8AM)
+        assert after.historical_samples == 12
+
+    def test_refresh_keeps_unflushed_readings_on_top(self, tracker, tmp_path):
+        for _ in range(6):
+            tracker.record_observation(40.41, 49.87, severity=1, timestamp=MONDAY_8AM)
+        other = TrafficPatternTracker(tmp_path / "traffic.db")
+        try:
+            for _ in range(12):
+                other.record_observation(40.41, 49.87, severity=4, timestamp=MONDAY_8AM)
+            other.flush()
+        finally:
+            other.close()
+
+        tracker.refresh_patterns()
+        pattern = tracker._get_pattern(tracker._get_grid_id(40.41, 49.87), 0, 8)
+        assert pattern.sample_count == 18
+        assert pattern.severity_avg == pytest.approx(3.0)
+
+        # Refreshed rows are history, not readings of this worker to write again
+        tracker.flush()
+        tracker.refresh_patterns()
+        assert _stored_pattern(tracker) == (18, pytest.approx(3.0))
+
+
+class TestStorageLifecycle:
+    def test_lookup_indexes_exist(self, tracker):
+        with sqlite3.connect(tracker.db_path) as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT severity FROM traffic_observations "
+                "WHERE grid_id = ? AND day_of_week = ? AND hour = ?",
+                ("40.41,49.87", 0, 8),
+            ).fetchall()
+
+        assert any("idx_observations_grid_time" in row[-1] for row in plan)
+
+    def test_old_observations_rolled_up_in_batches(self, tracker, monkeypatch):
+        monkeypatch.setattr(traffic_patterns.settings, "TRAFFIC_PRUNE_BATCH_SIZE", 7)
+        old = MONDAY_8AM - timedelta(days=30)
+        for minute in range(20):
+            tracker.record_observation(
+                40.41, 49.87, severity=2 + minute % 2, timestamp=old + timedelta(minutes=minute)
+            )
+        tracker.record_observation(40.41, 49.87, severity=1, timestamp=MONDAY_8AM)
+        tracker.flush()
+
+        result = tracker.rollup_and_prune(now=MONDAY_8AM)
+
+        assert result["rolled_up"] == 20
+        assert result["batches"] == 3
+        assert _raw_count(tracker) == 1
+        with sqlite3.connect(tracker.db_path) as conn:
+            rollup = conn.execute(
+                "SELECT bucket_start, observation_count, severity_sum FROM traffic_hourly_rollups"
+            ).fetchall()
+        assert rollup == [(old.strftime("%Y-%m-%d %H:00:00"), 20, 50.0)]
+
+    def test_maintenance_reports_and_keeps_patterns(self, tracker, monkeypatch):
+        monkeypatch.setattr(traffic_patterns.settings, "TRAFFIC_VACUUM_FREE_RATIO", 0.0)
+        for _ in range(12):
+            tracker.record_observation(
+                40.41, 49.87, severity=3, timestamp=MONDAY_8AM - timedelta(days=60)
+            )
+        tracker.flush()
+
+        result = tracker.run_maintenance(now=MONDAY_8AM)
+
+        assert result["rolled_up"] == 12
+        assert result["vacuumed"] is True
+        stats = tracker.get_statistics()
+        assert stats["total_observations"] == 0
+        assert stats["rolled_up_observations"] == 12
+        assert stats["patterns_tracked"] == 1
@@ -0,0 +1,77 @@
+"""Tests for background traffic prefetching."""
+
+from __future__ import annotations
+
+import asyncio
+
+from backend.app.traffic_prefetch import TrafficPrefetcher, parse_hot_cells
+
+
+class FakeBreaker:
+    def __init__(self, open_checks: int = 0):
+        self.open_checks = open_checks
+
+    def is_open(self) -> bool:
+        if self.open_checks:
+            self.open_checks -= 1
+            return True
+        return False
+
+
+def _prefetcher(targets, breaker=None, fetch=None):
+    calls: list[tuple[float, float]] = []
+
+    def record(lat, lon):
+        calls.append((lat, lon))
+        return {"severity": 2}
+
+    prefetcher = TrafficPrefetcher(
+        fetch=fetch or record,
+        targets=lambda: targets,
+        breaker=breaker or FakeBreaker(),
+        cycle_seconds=0.0,
+        min_spacing_seconds=0.0,
+    )
+    return prefetcher, calls
+
+
+class TestTrafficPrefetcher:
+    def test_nearby_restaurants_share_one_fetch(self):
+        prefetcher, calls = _prefetcher([(40.37001, 49.83), (40.37002, 49.83), (40.40, 49.85)])
+
+        refreshed = asyncio.run(prefetcher.run_cycle())
+
+        assert refreshed == 2
+        assert calls == [(40.37001, 49.83), (40.40, 49.85)]
+        assert prefetcher.get_stats()["cycles"] == 1
+
+    def test_waits_while_circuit_open(self, monkeypatch):
+        sleeps: list[float] = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+        prefetcher, calls = _prefetcher([(40.37, 49.83)], breaker=FakeBreaker(open_checks=3))
+
+        asyncio.run(prefetcher.run_cycle())
+
+        assert prefetcher.stats.circuit_pauses == 3
+        assert len(sleeps) == 3
+        assert calls == [(40.37, 49.83)]
+
+    def test_failures_do_not_stop_cycle(self):
+        def flaky(lat, lon):
+            if lat < 40.38:
+                raise RuntimeError("upstream error")
+            return None
+
+        prefetcher, _ = _prefetcher([(40.37, 49.83), (40.40, 49.85)], fetch=flaky)
+
+        assert asyncio.run(prefetcher.run_cycle()) == 0
+        assert prefetcher.stats.failures == 1
+        assert prefetcher.stats.cycles == 1
+
+    def test_parse_hot_cells_skips_malformed(self):
+        assert parse_hot_cells("40.4,49.8; bad ;40.5,x;40.6, 49.9") == [(40.4, 49.8), (40.6, 49.9)]
+        assert parse_hot_cells("") == []
@@ -0,0 +1,133 @@
+"""
+Benchmark per-request middleware overhead: one BaseHTTPMiddleware per concern
+(the previous layout) vs the single pure-ASGI pipeline.
+
+Requests are driven straight through the ASGI interface against a trivial
+route, so the numbers are middleware cost, not network or handler time.
+
+Usage:
+    python -m tools.bench_middleware --requests 5000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.metrics import PrometheusStage  # noqa: E402
+from backend.app.middleware import add_pipeline_stage  # noqa: E402
+from backend.app.settings import settings  # noqa: E402
+from backend.app.utils import RateLimiter, RequestIDStage, SecurityHeadersStage  # noqa: E402
+from backend.app.versioning import APIVersionStage  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from starlette.datastructures import MutableHeaders  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import PlainTextResponse  # noqa: E402
+
+
+def stages():
+    # Registration order used by main.py (outermost first)
+    return [
+        PrometheusStage(),
+        APIVersionStage(),
+        RequestIDStage(),
+        SecurityHeadersStage(),
+        RateLimiter(),
+    ]
+
+
+class LayeredStage(BaseHTTPMiddleware):
+    """Runs one stage as its own BaseHTTPMiddleware layer, as before the pipeline."""
+
+    def __init__(self, app, stage):
+        super().__init__(app)
+        self.stage = stage
+
+    async def dispatch(self, request, call_next):
+        state: dict = {}
+        response = await self.stage.on_request(request.scope, state)
+        status_code = 500
+        try:
+            if response is None:
+                response = await call_next(request)
+            status_code = response.status_code
+            headers = MutableHeaders(raw=response.raw_headers)
+            self.stage.on_response(request.scope, state, headers, status_code)
+            return response
+        finally:
+            self.stage.on_complete(request.scope, state, status_code)
+
+
+def build_app(layout: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return PlainTextResponse("ok")
+
+    if layout == "layered":
+        for stage in reversed(stages()):
+            app.add_middleware(LayeredStage, stage=stage)
+    elif layout == "pipeline":
+        for stage in stages():
+            add_pipeline_stage(app, stage)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/health",
+        "raw_path": b"/health",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    # Warm up route matching and lazy middleware stack construction
+    await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    # Keep buckets from filling up so every request takes the normal path
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_REQUESTS = 10**9
+
+    results = {}
+    for layout in ("bare", "layered", "pipeline"):
+        app = build_app(layout)
+        timings = [asyncio.run(drive(app, args.requests)) for _ in range(args.repeat)]
+        results[layout] = statistics.median(timings)
+
+    print(f"{'layout':<10} {'us/request':>11} {'overhead_us':>12}")
+    for layout, micros in results.items():
+        print(f"{layout:<10} {micros:>11.1f} {micros - results['bare']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
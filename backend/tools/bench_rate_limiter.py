@@ -0,0 +1,85 @@
+"""
+Benchmark rate limiter token checks per second for local and Redis buckets.
+
+Local buckets run in process; pass ``--redis-url`` to also measure the shared
+Redis script (one round trip per check).
+
+Usage:
+    python -m tools.bench_rate_limiter --clients 100 10000 --checks 50000
+    python -m tools.bench_rate_limiter --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.rate_limit import LocalBucketStore, RedisBucketStore  # noqa: E402
+
+CAPACITY = 300
+RATE = 5.0  # 300 requests per minute
+
+
+def client_keys(clients: int, checks: int, rng: random.Random) -> list[str]:
+    picks = rng.choices(range(clients), k=checks)
+    return [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in picks]
+
+
+def bench_local(keys: list[str], max_buckets: int) -> tuple[float, int, float]:
+    store = LocalBucketStore(max_buckets=max_buckets)
+    tracemalloc.start()
+    started = time.perf_counter()
+    for key in keys:
+        store.consume(key, CAPACITY, RATE)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(keys) / elapsed, len(store), peak / 1024
+
+
+async def bench_redis(keys: list[str], url: str, concurrency: int) -> float:
+    from redis import asyncio as redis_asyncio
+
+    client = redis_asyncio.from_url(url, decode_responses=True)
+    store = RedisBucketStore(client, prefix="bench:ratelimit:")
+    queue = iter(keys)
+
+    async def worker():
+        for key in queue:
+            await store.consume(key, CAPACITY, RATE)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return len(keys) / elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, nargs="+", default=[100, 10_000, 100_000])
+    ap.add_argument("--checks", type=int, default=100_000)
+    ap.add_argument("--max-buckets", type=int, default=10_000)
+    ap.add_argument("--redis-url", default=None)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'clients':>8}  {'backend':<6} {'checks/s':>12} {'buckets':>8} {'peak_kib':>9}")
+    for clients in args.clients:
+        keys = client_keys(clients, args.checks, rng)
+        rate, buckets, peak_kib = bench_local(keys, args.max_buckets)
+        print(f"{clients:>8}  {'local':<6} {rate:>12,.0f} {buckets:>8} {peak_kib:>9.0f}")
+        if args.redis_url:
+            rate = asyncio.run(bench_redis(keys, args.redis_url, args.concurrency))
+            print(f"{clients:>8}  {'redis':<6} {rate:>12,.0f} {'-':>8} {'-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark route optimizer solve time vs stop count for each algorithm.
+
+Distances come from random points around Baku via the haversine matrix provider,
+so only solver time is measured (no GoMap calls).
+
+Usage:
+    python -m tools.bench_route_optimizer --stops 5 8 10 13 20 50 --repeat 3
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.route_optimizer import (  # noqa: E402
+    HaversineMatrixProvider,
+    Location,
+    MultiStopOptimizer,
+)
+from backend.app.tsp_solvers import BRUTE_FORCE_MAX_STOPS, HELD_KARP_MAX_STOPS  # noqa: E402
+
+ALGORITHMS = ("nearest", "brute_force", "held_karp", "2opt", "genetic")
+
+
+def random_locations(count: int, rng: random.Random) -> list[Location]:
+    return [
+        Location(
+            id=str(i),
+            name=f"Stop {i}",
+            latitude=40.35 + rng.random() * 0.1,
+            longitude=49.80 + rng.random() * 0.15,
+        )
+        for i in range(count + 1)
+    ]
+
+
+def supports(algorithm: str, stops: int) -> bool:
+    if algorithm == "brute_force":
+        return stops <= BRUTE_FORCE_MAX_STOPS
+    if algorithm == "held_karp":
+        return stops <= HELD_KARP_MAX_STOPS
+    return True
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stops", type=int, nargs="+", default=[5, 8, 10, 12, 13, 20, 50])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget-ms", type=int, default=0, help="Solver budget (0 = unlimited)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'stops':>5}  {'algorithm':<12} {'median_ms':>10} {'km':>8} {'budget_hit':>10}")
+    for stops in args.stops:
+        locations = random_locations(stops, rng)
+        for algorithm in ALGORITHMS:
+            if not supports(algorithm, stops):
+                continue
+            timings, distance, exhausted = [], 0.0, False
+            for _ in range(args.repeat):
+                optimizer = MultiStopOptimizer(matrix_provider=HaversineMatrixProvider())
+                started = time.perf_counter()
+                route = optimizer.optimize_route(
+                    locations[0],
+                    locations[1:],
+                    algorithm=algorithm,
+                    return_to_start=True,
+                    time_budget_ms=args.budget_ms,
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+                distance = route.total_distance_km
+                exhausted = exhausted or route.budget_exhausted
+            print(
+                f"{stops:>5}  {algorithm:<12} {statistics.median(timings):>10.2f} "
+                f"{distance:>8.2f} {str(exhausted):>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
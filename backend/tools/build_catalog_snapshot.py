@@ -0,0 +1,76 @@
+"""
+Compile restaurants.json into the binary catalog snapshot loaded at startup.
+
+Writes ``restaurants.snapshot`` next to the seed JSON (normalised records plus
+the list, search, table and concierge indexes, keyed by the JSON's SHA-256 and
+the deriving code's fingerprint) and reports how long a cold load takes from
+JSON versus from the snapshot. Deploys run it before starting the API (see
+PRODUCTION_DEPLOYMENT_GUIDE.md); otherwise the first process to find the
+snapshot missing or stale compiles from JSON and writes it.
+
+Usage:
+    python -m tools.build_catalog_snapshot
+    python -m tools.build_catalog_snapshot --seed /srv/baku-data/restaurants.json
+    python -m tools.build_catalog_snapshot --check  # exit 1 if the snapshot is stale
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.catalog import (  # noqa: E402
+    compile_catalog,
+    content_hash,
+    read_snapshot,
+    snapshot_path,
+    write_snapshot,
+)
+from backend.app.settings import settings  # noqa: E402
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", type=Path, default=settings.data_dir / "restaurants.json")
+    ap.add_argument("--check", action="store_true", help="only verify the snapshot is current")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    seed_path: Path = args.seed
+    target = snapshot_path(seed_path)
+    raw = seed_path.read_bytes()
+    source_hash = content_hash(raw)
+
+    if args.check:
+        if read_snapshot(target, source_hash) is None:
+            print(f"{target} is missing or stale for {seed_path}")
+            sys.exit(1)
+        print(f"{target} is current ({source_hash[:12]})")
+        return
+
+    catalog = compile_catalog(raw, source=seed_path)
+    size = write_snapshot(catalog, target)
+    print(f"wrote {target}: {len(catalog.restaurants)} restaurants, {size / 1024:.0f} KiB")
+
+    from_json = best_of(args.repeat, lambda: compile_catalog(seed_path.read_bytes()))
+    from_snapshot = best_of(
+        args.repeat, lambda: read_snapshot(target, content_hash(seed_path.read_bytes()))
+    )
+    print(f"  load from JSON:     {from_json * 1000:6.1f} ms")
+    print(f"  load from snapshot: {from_snapshot * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Profile cold-start import time of the API.
+
+Imports the target module in fresh interpreters with ``-X importtime`` and
+reports the wall time plus the modules with the largest cumulative and self
+import times, to find what to defer when startup regresses.
+
+Usage:
+    python -m tools.profile_imports --top 25 --repeat 3
+    python -m tools.profile_imports --module backend.app.storage
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+TIMED_IMPORT = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+
+def run_import(module: str, data_dir: str) -> tuple[float, dict[str, tuple[int, int]]]:
+    """Import ``module`` in a new interpreter; returns (seconds, {module: (self_us, cum_us)})."""
+    env = {**os.environ, "DATA_DIR": data_dir}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", TIMED_IMPORT.format(module=module)],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings: dict[str, tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[12:].split("|"))
+        if self_us.isdigit():
+            timings[name] = (int(self_us), int(cumulative_us))
+    return float(proc.stdout.strip().splitlines()[-1]), timings
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--module", default="backend.app.main")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    walls: list[float] = []
+    timings: dict[str, tuple[int, int]] = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for _ in range(args.repeat):
+            wall, timings = run_import(args.module, data_dir)
+            walls.append(wall)
+
+    print(f"import {args.module}: median {statistics.median(walls) * 1000:.0f} ms")
+    print(f"  runs: {', '.join(f'{wall * 1000:.0f}' for wall in walls)} ms")
+    for title, index in (("cumulative", 1), ("self", 0)):
+        print(f"\ntop {args.top} by {title} time (last run)")
+        ranked = sorted(timings.items(), key=lambda item: item[1][index], reverse=True)
+        for name, values in ranked[: args.top]:
+            print(f"  {values[index] / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Train the offline ETA model from logged provider results.
+
+Reads eta_samples.db from the data directory, fits the model, and writes
+eta_model.npz next to it. Running servers pick it up on their next start.
+
+Usage:
+    python -m tools.train_eta_model --min-samples 200
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.eta_model import get_sample_log, model_path, train_eta_model  # noqa: E402
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--min-samples", type=int, default=None, help="Defaults to settings")
+    args = ap.parse_args()
+
+    print(f"samples: {get_sample_log().load_samples().shape[0]}")
+    model = train_eta_model(min_samples=args.min_samples)
+    if model is None:
+        print("not enough samples; model unchanged")
+        sys.exit(1)
+    print(f"trained on {model.samples} samples, MAE {model.mae_seconds:.0f}s -> {model_path()}")
+
+
+if __name__ == "__main__":
+    main()